@@ -1,10 +1,11 @@
 import json
 
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.urls import reverse
 from django.utils.html import format_html
 
 from .models import Check
+from .tasks import generate_ai_feedback_batch_task
 
 
 @admin.register(Check)
@@ -12,6 +13,7 @@ class CheckAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "status", "created_at")
     list_filter = ("status", "created_at")
     search_fields = ("user__username", "user__telegram_id")
+    actions = ("generate_ai_feedback",)
 
     @admin.display(description="Пользователь", ordering="user")
     def user_link(self, obj):
@@ -71,6 +73,24 @@ class CheckAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
 
+    @admin.action(description="Сгенерировать анализ AI для выбранных проверок")
+    def generate_ai_feedback(self, request, queryset):
+        check_ids = list(
+            queryset.filter(ai_suggestion__isnull=True).values_list("id", flat=True)
+        )
+        if not check_ids:
+            self.message_user(
+                request, "У всех выбранных проверок уже есть анализ AI.", messages.INFO
+            )
+            return
+        generate_ai_feedback_batch_task.delay(check_ids)
+        self.message_user(
+            request,
+            f"Запущена генерация анализа AI для {len(check_ids)} проверок. "
+            "Результаты появятся в карточках проверок по мере готовности.",
+            messages.SUCCESS,
+        )
+
     @admin.display(description="Контекст ошибки")
     def formatted_error_context(self, obj: Check):
         if not obj.error_context:
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from . import ai_service
+from .feedback_index import afind_similar_suggestion, aindex_checks
+from .models import Check
+
+logger = logging.getLogger(__name__)
+
+SAVE_BATCH_SIZE = 100
+
+
+async def generate_ai_suggestions(
+    check_ids: list[int], concurrency: int, overwrite: bool = False
+) -> dict:
+    """
+    Генерирует рекомендации AI для набора проверок. Проверки с одинаковым
+    сценарием (одни и те же промпты) обрабатываются одним запросом к AI,
+    результаты сохраняются пачками через bulk_update.
+    """
+    queryset = Check.objects.select_related("task").filter(
+        id__in=check_ids, task__isnull=False
+    )
+    if not overwrite:
+        queryset = queryset.filter(ai_suggestion__isnull=True)
+
+    scenarios: dict[tuple[str, str], list[Check]] = defaultdict(list)
+    skipped = 0
+    async for check in queryset:
+        system_prompt, user_prompt = ai_service.build_prompts(check, check.task)
+        if not user_prompt:
+            skipped += 1
+            continue
+        scenarios[(system_prompt, user_prompt)].append(check)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    pending_save: list[Check] = []
+    stats = {
+        "updated": 0,
+        "failed": 0,
+        "skipped": skipped,
+        "requests": 0,
+        "reused": 0,
+    }
+
+    async def flush():
+        if pending_save:
+            batch = pending_save.copy()
+            pending_save.clear()
+            await Check.objects.abulk_update(
+                batch, ["ai_suggestion", "ai_response_ms"], batch_size=SAVE_BATCH_SIZE
+            )
+            await aindex_checks(batch)
+
+    async def process(prompts: tuple[str, str], checks: list[Check]):
+        system_prompt, user_prompt = prompts
+        start_time = time.monotonic()
+        suggestion = await afind_similar_suggestion(checks[0], checks[0].task)
+        if suggestion:
+            duration_ms = int((time.monotonic() - start_time) * 1000)
+            stats["reused"] += 1
+        else:
+            async with semaphore:
+                suggestion, duration_ms = await ai_service._call_ai_api(
+                    user_prompt=user_prompt, system_prompt=system_prompt
+                )
+            stats["requests"] += 1
+
+        if suggestion in ai_service.AI_ERROR_MESSAGES:
+            stats["failed"] += len(checks)
+            return
+
+        for check in checks:
+            check.ai_suggestion = suggestion
+            check.ai_response_ms = duration_ms
+        pending_save.extend(checks)
+        stats["updated"] += len(checks)
+        if len(pending_save) >= SAVE_BATCH_SIZE:
+            await flush()
+
+    # Ошибка одного сценария не должна отменять результаты остальных.
+    results = await asyncio.gather(
+        *(process(prompts, checks) for prompts, checks in scenarios.items()),
+        return_exceptions=True,
+    )
+    for checks, result in zip(scenarios.values(), results):
+        if isinstance(result, Exception):
+            logger.error(
+                f"Batch AI feedback failed for checks "
+                f"{[check.id for check in checks]}: {result!r}",
+                exc_info=result,
+            )
+            stats["failed"] += len(checks)
+    await flush()
+
+    logger.info(
+        f"Batch AI feedback finished: {stats['requests']} AI requests and "
+        f"{stats['reused']} reused suggestions for "
+        f"{len(check_ids)} checks, updated {stats['updated']}, "
+        f"failed {stats['failed']}, skipped {stats['skipped']}"
+    )
+    return stats
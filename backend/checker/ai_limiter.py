@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import math
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+from django.conf import settings
+
+from backend.core.redis_client import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "ai_limiter"
+WINDOW_MS = 60_000
+# Пауза перед повтором после 429 не дольше этого, даже если провайдер
+# просит больше (Retry-After).
+MAX_RETRY_AFTER_SECONDS = 60
+# Слот освобождается сам, только если воркер умер: аренда должна пережить
+# самый долгий запрос — все попытки по таймауту плюс паузы между ними.
+LEASE_MS = (
+    (settings.AI_MAX_RETRIES + 1) * settings.AI_REQUEST_TIMEOUT_SECONDS
+    + settings.AI_MAX_RETRIES * MAX_RETRY_AFTER_SECONDS
+    + 30
+) * 1000
+HEARTBEAT_MS = 15_000
+MIN_POLL_SECONDS = 0.2
+MAX_POLL_SECONDS = 2.0
+NOTIFY_WAIT_THRESHOLD_SECONDS = 3
+
+# Атомарная попытка занять слот. Запрос обслуживается, только если его тикет
+# стоит первым в очереди (FIFO), есть свободный слот параллельности и не
+# превышены лимиты запросов/токенов за последнюю минуту.
+# Возвращает {granted, position, wait_ms}.
+ACQUIRE_SCRIPT = """
+local queue_key, active_key, requests_key, tokens_key, cooldown_key = KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[5]
+local ticket = ARGV[1]
+local max_active = tonumber(ARGV[2])
+local rpm = tonumber(ARGV[3])
+local tpm = tonumber(ARGV[4])
+local tokens = tonumber(ARGV[5])
+local lease_ms = tonumber(ARGV[6])
+local window_ms = tonumber(ARGV[7])
+local heartbeat_prefix = ARGV[8]
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+redis.call('ZREMRANGEBYSCORE', active_key, '-inf', now)
+redis.call('ZREMRANGEBYSCORE', requests_key, '-inf', now - window_ms)
+redis.call('ZREMRANGEBYSCORE', tokens_key, '-inf', now - window_ms)
+
+while true do
+    local head = redis.call('LINDEX', queue_key, 0)
+    if head and head ~= ticket and redis.call('EXISTS', heartbeat_prefix .. head) == 0 then
+        redis.call('LPOP', queue_key)
+    else
+        break
+    end
+end
+
+local position = redis.call('LPOS', queue_key, ticket)
+if not position then
+    redis.call('RPUSH', queue_key, ticket)
+    position = redis.call('LLEN', queue_key) - 1
+end
+if position > 0 then
+    return {0, position, 0}
+end
+
+local cooldown = redis.call('PTTL', cooldown_key)
+if cooldown > 0 then
+    return {0, 0, cooldown}
+end
+
+if redis.call('ZCARD', active_key) >= max_active then
+    return {0, 0, 0}
+end
+
+if rpm > 0 and redis.call('ZCARD', requests_key) >= rpm then
+    local oldest = redis.call('ZRANGE', requests_key, 0, 0, 'WITHSCORES')
+    return {0, 0, math.max(tonumber(oldest[2]) + window_ms - now, 0)}
+end
+
+if tpm > 0 then
+    local used = 0
+    local entries = redis.call('ZRANGE', tokens_key, 0, -1, 'WITHSCORES')
+    for i = 1, #entries, 2 do
+        used = used + tonumber(string.match(entries[i], ':(%d+)$'))
+    end
+    if used > 0 and used + tokens > tpm then
+        return {0, 0, math.max(tonumber(entries[2]) + window_ms - now, 0)}
+    end
+end
+
+redis.call('LPOP', queue_key)
+redis.call('ZADD', active_key, now + lease_ms, ticket)
+redis.call('ZADD', requests_key, now, ticket)
+redis.call('ZADD', tokens_key, now, ticket .. ':' .. tokens)
+return {1, 0, 0}
+"""
+
+# Замена оценки токенов фактическим расходом из ответа провайдера.
+RECORD_TOKENS_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1] .. ':' .. ARGV[2])
+if score then
+    redis.call('ZREM', KEYS[1], ARGV[1] .. ':' .. ARGV[2])
+    redis.call('ZADD', KEYS[1], score, ARGV[1] .. ':' .. ARGV[3])
+end
+return 0
+"""
+
+
+class AIRateLimiter:
+    """
+    Общий для всех celery-воркеров ограничитель запросов к AI API:
+    лимит запросов и токенов в минуту плюс семафор параллельных запросов.
+    Состояние хранится в redis, ожидающие запросы обслуживаются по очереди (FIFO).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_concurrent: int,
+        key_prefix: str = KEY_PREFIX,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrent = max_concurrent
+        self.key_prefix = key_prefix
+
+    def _key(self, name: str) -> str:
+        return f"{self.key_prefix}:{name}"
+
+    def estimate_wait_seconds(self, position: int, wait_ms: int) -> int:
+        per_request = 60 / self.requests_per_minute if self.requests_per_minute else 0
+        return math.ceil(max(wait_ms / 1000, position * per_request))
+
+    @asynccontextmanager
+    async def acquire(
+        self,
+        estimated_tokens: int,
+        on_wait: Callable[[int], Awaitable[None]] | None = None,
+    ):
+        client = get_async_redis()
+        ticket = str(await client.incr(self._key("ticket")))
+        heartbeat_key = self._key(f"heartbeat:{ticket}")
+        acquire = client.register_script(ACQUIRE_SCRIPT)
+        granted = False
+        notified = False
+        queued_at = asyncio.get_running_loop().time()
+
+        try:
+            while True:
+                await client.set(heartbeat_key, 1, px=HEARTBEAT_MS)
+                granted, position, wait_ms = await acquire(
+                    keys=[
+                        self._key("queue"),
+                        self._key("active"),
+                        self._key("requests"),
+                        self._key("tokens"),
+                        self._key("cooldown"),
+                    ],
+                    args=[
+                        ticket,
+                        self.max_concurrent,
+                        self.requests_per_minute,
+                        self.tokens_per_minute,
+                        estimated_tokens,
+                        LEASE_MS,
+                        WINDOW_MS,
+                        self._key("heartbeat:"),
+                    ],
+                )
+                if granted:
+                    break
+
+                estimated_wait = self.estimate_wait_seconds(position, wait_ms)
+                if (
+                    on_wait
+                    and not notified
+                    and estimated_wait >= NOTIFY_WAIT_THRESHOLD_SECONDS
+                ):
+                    notified = True
+                    await on_wait(estimated_wait)
+
+                await asyncio.sleep(
+                    min(max(wait_ms / 1000, MIN_POLL_SECONDS), MAX_POLL_SECONDS)
+                )
+        finally:
+            if not granted:
+                await client.lrem(self._key("queue"), 0, ticket)
+            await client.delete(heartbeat_key)
+
+        waited_ms = int((asyncio.get_running_loop().time() - queued_at) * 1000)
+        if waited_ms > 0:
+            logger.info(f"AI request {ticket} waited {waited_ms} ms in the queue")
+
+        slot = AISlot(client, self._key("tokens"), ticket, estimated_tokens)
+        try:
+            yield slot
+        finally:
+            await client.zrem(self._key("active"), ticket)
+
+    async def set_cooldown(self, seconds: float):
+        client = get_async_redis()
+        await client.set(self._key("cooldown"), 1, px=max(int(seconds * 1000), 1))
+
+
+class AISlot:
+    def __init__(self, client, tokens_key: str, ticket: str, estimated_tokens: int):
+        self._client = client
+        self._tokens_key = tokens_key
+        self._ticket = ticket
+        self._estimated_tokens = estimated_tokens
+
+    async def record_usage(self, total_tokens: int):
+        script = self._client.register_script(RECORD_TOKENS_SCRIPT)
+        await script(
+            keys=[self._tokens_key],
+            args=[self._ticket, self._estimated_tokens, total_tokens],
+        )
+
+
+limiter = AIRateLimiter(
+    requests_per_minute=settings.AI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.AI_TOKENS_PER_MINUTE,
+    max_concurrent=settings.AI_MAX_CONCURRENT_REQUESTS,
+)
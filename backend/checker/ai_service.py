@@ -1,17 +1,47 @@
+import asyncio
 import logging
 import os
 import time
 from textwrap import dedent
+from typing import Awaitable, Callable
 
 import httpx
+from django.conf import settings
 
 from backend.courses.models import Task
 
+from .ai_limiter import MAX_RETRY_AFTER_SECONDS, AIRateLimiter, limiter
+from .feedback_index import afind_similar_suggestion
 from .models import Check
 
 logger = logging.getLogger(__name__)
 AI_API_KEY = os.getenv("AI_API_KEY")
 AI_MODEL_NAME = os.getenv("AI_MODEL_NAME")
+AI_API_URL = os.getenv(
+    "AI_API_URL", "https://api.groq.com/openai/v1/chat/completions"
+)
+MAX_TOKENS = 2048
+CHARS_PER_TOKEN = 3
+DEFAULT_RETRY_AFTER_SECONDS = 5.0
+
+NO_RESPONSE_MESSAGE = "Не удалось получить ответ от AI."
+OVERLOADED_MESSAGE = (
+    "Сервис AI сейчас перегружен. Попробуйте запросить обратную связь позже."
+)
+CONNECTION_ERROR_MESSAGE = "Не удалось связаться с сервисом AI."
+REJECTED_MESSAGE = "Сервис AI отклонил запрос. Обратитесь в поддержку."
+INVALID_RESPONSE_MESSAGE = "Получен некорректный ответ от сервиса AI."
+NO_SCENARIO_MESSAGE = (
+    "Не удалось определить сценарий для анализа. Обратитесь в поддержку."
+)
+AI_ERROR_MESSAGES = {
+    NO_RESPONSE_MESSAGE,
+    OVERLOADED_MESSAGE,
+    CONNECTION_ERROR_MESSAGE,
+    REJECTED_MESSAGE,
+    INVALID_RESPONSE_MESSAGE,
+    NO_SCENARIO_MESSAGE,
+}
 
 
 def _get_prompt_for_success(task_description: str, user_code: str) -> tuple[str, str]:
@@ -177,10 +207,27 @@ def _get_prompt_for_wrong_answer(
     return system_prompt, user_prompt
 
 
+def _estimate_tokens(system_prompt: str, user_prompt: str, max_tokens: int) -> int:
+    return (len(system_prompt) + len(user_prompt)) // CHARS_PER_TOKEN + max_tokens
+
+
+def _get_retry_after_seconds(response: httpx.Response) -> float:
+    try:
+        retry_after = float(
+            response.headers.get("retry-after", DEFAULT_RETRY_AFTER_SECONDS)
+        )
+    except ValueError:
+        return DEFAULT_RETRY_AFTER_SECONDS
+    return min(max(retry_after, 0), MAX_RETRY_AFTER_SECONDS)
+
+
 async def _call_ai_api(
-    user_prompt: str, system_prompt: str = "Ты — полезный ассистент на русском по коду."
+    user_prompt: str,
+    system_prompt: str = "Ты — полезный ассистент на русском по коду.",
+    on_wait: Callable[[int], Awaitable[None]] | None = None,
+    rate_limiter: AIRateLimiter | None = None,
 ) -> tuple[str, int]:
-    api_url = "https://api.groq.com/openai/v1/chat/completions"
+    rate_limiter = rate_limiter or limiter
     headers = {
         "Authorization": f"Bearer {AI_API_KEY}",
         "Content-Type": "application/json",
@@ -192,30 +239,63 @@ async def _call_ai_api(
             {"role": "user", "content": user_prompt},
         ],
         "temperature": 0.1,
-        "max_tokens": 2048,
+        "max_tokens": MAX_TOKENS,
         "top_p": 0.9,
     }
-    logger.info(f"Запрос к модели {AI_MODEL_NAME}...")
-    start_time = time.monotonic()
-    ai_response = "Не удалось получить ответ от AI."
-    try:
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(api_url, json=payload, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            ai_response = data["choices"][0]["message"]["content"].strip()
-    except httpx.RequestError as e:
-        logger.error(f"AI request failed: {e}")
-        ai_response = "Не удалось связаться с сервисом AI."
-    except (KeyError, IndexError) as e:
-        logger.error(f"Failed to parse AI response: {e}. Response data: {data}")
-        ai_response = "Получен некорректный ответ от сервиса AI."
-    end_time = time.monotonic()
+    estimated_tokens = _estimate_tokens(system_prompt, user_prompt, MAX_TOKENS)
+    ai_response = NO_RESPONSE_MESSAGE
+    data = None
+
+    async with rate_limiter.acquire(estimated_tokens, on_wait=on_wait) as slot:
+        logger.info(f"Запрос к модели {AI_MODEL_NAME}...")
+        start_time = time.monotonic()
+        try:
+            async with httpx.AsyncClient(
+                timeout=settings.AI_REQUEST_TIMEOUT_SECONDS
+            ) as client:
+                for attempt in range(settings.AI_MAX_RETRIES + 1):
+                    response = await client.post(AI_API_URL, json=payload, headers=headers)
+                    if (
+                        response.status_code != httpx.codes.TOO_MANY_REQUESTS
+                        or attempt == settings.AI_MAX_RETRIES
+                    ):
+                        break
+                    retry_after = _get_retry_after_seconds(response)
+                    logger.warning(
+                        f"AI provider rate limit hit, retrying in {retry_after} s"
+                    )
+                    await rate_limiter.set_cooldown(retry_after)
+                    await asyncio.sleep(retry_after)
+
+                response.raise_for_status()
+                data = response.json()
+                ai_response = data["choices"][0]["message"]["content"].strip()
+                total_tokens = data.get("usage", {}).get("total_tokens")
+                if total_tokens:
+                    await slot.record_usage(total_tokens)
+        except httpx.HTTPStatusError as e:
+            status_code = e.response.status_code
+            logger.error(
+                f"AI request failed with status {status_code}: {e.response.text[:500]}"
+            )
+            # Перегрузка — только 429 и 5xx; 4xx (ключ, модель, запрос) так не исправятся.
+            if status_code == httpx.codes.TOO_MANY_REQUESTS or status_code >= 500:
+                ai_response = OVERLOADED_MESSAGE
+            else:
+                ai_response = REJECTED_MESSAGE
+        except httpx.RequestError as e:
+            logger.error(f"AI request failed: {e}")
+            ai_response = CONNECTION_ERROR_MESSAGE
+        except (KeyError, IndexError) as e:
+            logger.error(f"Failed to parse AI response: {e}. Response data: {data}")
+            ai_response = INVALID_RESPONSE_MESSAGE
+        end_time = time.monotonic()
+
     duration_ms = int((end_time - start_time) * 1000)
     return ai_response, duration_ms
 
 
-async def get_ai_suggestion(check: Check, task: Task) -> tuple[str, int]:
+def build_prompts(check: Check, task: Task) -> tuple[str, str]:
     system_prompt, user_prompt = "", ""
     if check.status == Check.Status.SUCCESS:
         system_prompt, user_prompt = _get_prompt_for_success(
@@ -237,7 +317,28 @@ async def get_ai_suggestion(check: Check, task: Task) -> tuple[str, int]:
                 check.stdout,
             )
 
+    return system_prompt, user_prompt
+
+
+async def get_ai_suggestion(
+    check: Check,
+    task: Task,
+    on_wait: Callable[[int], Awaitable[None]] | None = None,
+    rate_limiter: AIRateLimiter | None = None,
+) -> tuple[str, int]:
+    system_prompt, user_prompt = build_prompts(check, task)
+
     if not user_prompt:
-        return "Не удалось определить сценарий для анализа. Обратитесь в поддержку.", 0
+        return NO_SCENARIO_MESSAGE, 0
 
-    return await _call_ai_api(user_prompt=user_prompt, system_prompt=system_prompt)
+    start_time = time.monotonic()
+    reused_suggestion = await afind_similar_suggestion(check, task)
+    if reused_suggestion:
+        return reused_suggestion, int((time.monotonic() - start_time) * 1000)
+
+    return await _call_ai_api(
+        user_prompt=user_prompt,
+        system_prompt=system_prompt,
+        on_wait=on_wait,
+        rate_limiter=rate_limiter,
+    )
@@ -0,0 +1,143 @@
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+from bot.fake_telegram import FakeTelegram
+
+DEFAULT_RESPONSES = [
+    "🧐 **В чем причина ошибки?**\nЭто ответ локальной заглушки AI.\n\n"
+    "✅ **Как это исправить?**\nПроверьте условие задачи ещё раз.",
+    "👍 **Отличное решение!**\nЭто ответ локальной заглушки AI.\n\n"
+    "💡 **Что можно улучшить?**\nКод хорошо написан и не требует существенных улучшений.",
+    "🤔 **В чем может быть ошибка?**\nЭто ответ локальной заглушки AI.\n\n"
+    "🎯 **Подсказка для исправления**\nСравните свой вывод с ожидаемым.",
+]
+STREAM_CHUNK_SIZE = 16
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 800
+    latency_jitter_ms: float = 400
+    latency_distribution: str = "normal"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_seconds: int = 1
+    responses: list[str] = field(default_factory=lambda: list(DEFAULT_RESPONSES))
+
+    def sample_latency(self) -> float:
+        if self.latency_distribution == "uniform":
+            value = random.uniform(
+                self.latency_ms - self.latency_jitter_ms,
+                self.latency_ms + self.latency_jitter_ms,
+            )
+        elif self.latency_distribution == "exponential":
+            value = random.expovariate(1 / self.latency_ms) if self.latency_ms else 0
+        else:
+            value = random.gauss(self.latency_ms, self.latency_jitter_ms)
+        return max(value, 0) / 1000
+
+
+def _completion(model: str, content: str, prompt_tokens: int) -> dict:
+    completion_tokens = len(content) // 3
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> bytes:
+    data = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+
+async def chat_completions(request: web.Request) -> web.StreamResponse:
+    config: StubConfig = request.app["config"]
+    stats = request.app["stats"]
+    payload = await request.json()
+    stats["requests"] += 1
+
+    roll = random.random()
+    if roll < config.rate_limit_rate:
+        stats["rate_limited"] += 1
+        return web.json_response(
+            {"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+            status=429,
+            headers={"retry-after": str(config.retry_after_seconds)},
+        )
+    if roll < config.rate_limit_rate + config.error_rate:
+        stats["errors"] += 1
+        return web.json_response(
+            {"error": {"message": "Internal error", "type": "server_error"}},
+            status=500,
+        )
+
+    model = payload.get("model") or "stub"
+    content = random.choice(config.responses)
+    prompt_tokens = sum(len(m.get("content", "")) for m in payload["messages"]) // 3
+    latency = config.sample_latency()
+
+    if not payload.get("stream"):
+        await asyncio.sleep(latency)
+        return web.json_response(_completion(model, content, prompt_tokens))
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    chunks = [
+        content[i : i + STREAM_CHUNK_SIZE]
+        for i in range(0, len(content), STREAM_CHUNK_SIZE)
+    ]
+    await response.write(_chunk(completion_id, model, {"role": "assistant"}))
+    for piece in chunks:
+        await asyncio.sleep(latency / len(chunks))
+        await response.write(_chunk(completion_id, model, {"content": piece}))
+    await response.write(_chunk(completion_id, model, {}, finish_reason="stop"))
+    await response.write(b"data: [DONE]\n\n")
+    await response.write_eof()
+    return response
+
+
+async def get_stats(request: web.Request) -> web.Response:
+    telegram: FakeTelegram = request.app["telegram"]
+    return web.json_response(
+        {**request.app["stats"], "telegram_calls": sum(telegram.calls.values())}
+    )
+
+
+def create_app(config: StubConfig) -> web.Application:
+    app = web.Application()
+    app["config"] = config
+    app["stats"] = {"requests": 0, "errors": 0, "rate_limited": 0}
+    # Bot API отвечает общий фейк, чтобы бенчмарк не обращался к Telegram.
+    app["telegram"] = telegram = FakeTelegram()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/openai/v1/chat/completions", chat_completions)
+    app.router.add_post("/bot{token}/{method}", telegram.handle_method)
+    app.router.add_get("/stats", get_stats)
+    return app
@@ -0,0 +1,186 @@
+import ast
+import builtins
+import hashlib
+import json
+import logging
+import re
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend.courses.models import Task
+
+from .models import Check, FeedbackFingerprint
+
+logger = logging.getLogger(__name__)
+
+SHINGLE_SIZE = 3
+MAX_CANDIDATES = 500
+BUILTIN_NAMES = frozenset(dir(builtins))
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+QUOTED_RE = re.compile(r"'[^']*'|\"[^\"]*\"")
+NUMBER_RE = re.compile(r"\d+")
+
+
+class _NameNormalizer(ast.NodeTransformer):
+    """
+    Заменяет пользовательские имена (переменные, аргументы, функции, классы)
+    на v0, v1, ... в порядке появления и удаляет строки документации, чтобы
+    решения, отличающиеся только именованием и форматированием, совпадали.
+    """
+
+    def __init__(self):
+        self.names: dict[str, str] = {}
+
+    def _rename(self, name: str) -> str:
+        if name in BUILTIN_NAMES:
+            return name
+        return self.names.setdefault(name, f"v{len(self.names)}")
+
+    def visit_Name(self, node: ast.Name):
+        node.id = self._rename(node.id)
+        return node
+
+    def visit_arg(self, node: ast.arg):
+        node.arg = self._rename(node.arg)
+        node.annotation = None
+        return node
+
+    def _visit_definition(self, node):
+        node.name = self._rename(node.name)
+        self.generic_visit(node)
+        if not node.body:
+            node.body = [ast.Pass()]
+        return node
+
+    visit_FunctionDef = _visit_definition
+    visit_AsyncFunctionDef = _visit_definition
+    visit_ClassDef = _visit_definition
+
+    def visit_Expr(self, node: ast.Expr):
+        if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+            return None
+        return self.generic_visit(node)
+
+
+def normalize_code(code: str) -> str:
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return " ".join(TOKEN_RE.findall(code))
+    return ast.unparse(_NameNormalizer().visit(tree))
+
+
+def _get_shingles(normalized_code: str) -> list[int]:
+    tokens = TOKEN_RE.findall(normalized_code)
+    if len(tokens) < SHINGLE_SIZE:
+        tokens = tokens + [""] * (SHINGLE_SIZE - len(tokens))
+    return sorted(
+        {
+            zlib.crc32(" ".join(tokens[i : i + SHINGLE_SIZE]).encode())
+            for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        }
+    )
+
+
+def _normalize_message(message: str) -> str:
+    return NUMBER_RE.sub("N", QUOTED_RE.sub("'_'", message.strip()))
+
+
+def get_error_signature(check: Check) -> str:
+    if check.status == Check.Status.SUCCESS:
+        signature = "success"
+    elif check.stderr:
+        last_line = check.stderr.strip().splitlines()[-1]
+        signature = f"runtime:{_normalize_message(last_line)}"
+    elif check.error_context:
+        signature = "wrong_answer:" + json.dumps(
+            [
+                check.error_context.get("input"),
+                check.error_context.get("expected"),
+                (check.stdout or "").strip(),
+            ],
+            ensure_ascii=False,
+        )
+    else:
+        signature = "unknown"
+    return hashlib.sha1(signature.encode()).hexdigest()
+
+
+def build_fingerprint(check: Check) -> FeedbackFingerprint:
+    normalized = normalize_code(check.code)
+    return FeedbackFingerprint(
+        source_check=check,
+        task_id=check.task_id,
+        signature=get_error_signature(check),
+        fingerprint=hashlib.sha1(normalized.encode()).hexdigest(),
+        shingles=_get_shingles(normalized),
+    )
+
+
+def _jaccard(first: set[int], second: set[int]) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+def find_similar_suggestion(check: Check, task: Task) -> str | None:
+    """
+    Ищет ранее выданную рекомендацию AI для почти такого же решения той же
+    задачи с той же ошибкой. Возвращает текст рекомендации или None.
+    """
+    candidate = build_fingerprint(check)
+    rows = (
+        FeedbackFingerprint.objects.filter(
+            task=task,
+            signature=candidate.signature,
+            source_check__ai_suggestion__isnull=False,
+        )
+        .exclude(source_check_id=check.id)
+        .order_by("-id")
+        .values_list("fingerprint", "shingles", "source_check__ai_suggestion")[
+            :MAX_CANDIDATES
+        ]
+    )
+
+    shingles = set(candidate.shingles)
+    best_score, best_suggestion = 0.0, None
+    for fingerprint, other_shingles, suggestion in rows:
+        if fingerprint == candidate.fingerprint:
+            return suggestion
+        score = _jaccard(shingles, set(other_shingles))
+        if score > best_score:
+            best_score, best_suggestion = score, suggestion
+
+    if best_score >= settings.AI_FEEDBACK_SIMILARITY_THRESHOLD:
+        logger.info(
+            f"Reusing AI feedback for check {check.id} (similarity {best_score:.2f})"
+        )
+        return best_suggestion
+    return None
+
+
+def index_check(check: Check):
+    fingerprint = build_fingerprint(check)
+    FeedbackFingerprint.objects.update_or_create(
+        source_check=check,
+        defaults={
+            "task_id": fingerprint.task_id,
+            "signature": fingerprint.signature,
+            "fingerprint": fingerprint.fingerprint,
+            "shingles": fingerprint.shingles,
+        },
+    )
+
+
+def index_checks(checks: list[Check], batch_size: int = 500):
+    FeedbackFingerprint.objects.filter(source_check__in=checks).delete()
+    FeedbackFingerprint.objects.bulk_create(
+        [build_fingerprint(check) for check in checks], batch_size=batch_size
+    )
+
+
+afind_similar_suggestion = sync_to_async(find_similar_suggestion)
+aindex_check = sync_to_async(index_check)
+aindex_checks = sync_to_async(index_checks)
@@ -0,0 +1,135 @@
+import asyncio
+import statistics
+import time
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.checker import ai_service
+from backend.checker.ai_limiter import AIRateLimiter
+from backend.checker.models import Check
+from backend.checker.tasks import get_ai_feedback_async
+from backend.core.redis_client import run_async
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives get_ai_feedback_async at a target rate and reports latency. "
+        "Checks are not updated or indexed, and requests use a separate rate "
+        "limiter. Point AI_API_URL at the run_ai_stub server to avoid a paid "
+        "provider."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rate", type=float, default=5, help="Feedback requests per second."
+        )
+        parser.add_argument(
+            "--duration", type=float, default=30, help="Benchmark duration in seconds."
+        )
+        parser.add_argument(
+            "--telegram-url",
+            default="http://localhost:8088",
+            help="Bot API server that accepts the feedback messages (the AI stub).",
+        )
+        parser.add_argument(
+            "--checks",
+            nargs="+",
+            type=int,
+            help="Check IDs to request feedback for (latest checks by default).",
+        )
+
+    def handle(self, *args, **options):
+        if options["rate"] <= 0:
+            raise CommandError("--rate must be positive.")
+
+        queryset = Check.objects.filter(task__isnull=False)
+        if options["checks"]:
+            queryset = queryset.filter(id__in=options["checks"])
+        targets = list(queryset.order_by("-id").values_list("id", "user_id")[:1000])
+        if not targets:
+            raise CommandError("No checks with tasks to benchmark.")
+
+        if ai_service.AI_API_URL.startswith("https://api.groq.com"):
+            self.stdout.write(
+                self.style.WARNING("AI_API_URL points at the real provider!")
+            )
+
+        self.stdout.write(
+            f"Running {options['rate']} req/s for {options['duration']} s "
+            f"over {len(targets)} checks..."
+        )
+        results = run_async(self.run_benchmark(targets, options))
+        self.report(results, options)
+
+    async def run_benchmark(self, targets, options) -> dict:
+        session = AiohttpSession(
+            api=TelegramAPIServer.from_base(options["telegram_url"])
+        )
+        bot = Bot(token="0:benchmark", session=session)
+        # Свой ключ в redis: бенчмарк не расходует общий лимит запросов к AI.
+        rate_limiter = AIRateLimiter(
+            requests_per_minute=settings.AI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.AI_TOKENS_PER_MINUTE,
+            max_concurrent=settings.AI_MAX_CONCURRENT_REQUESTS,
+            key_prefix="ai_limiter_benchmark",
+        )
+        latencies: list[float] = []
+        errors = 0
+
+        async def one_request(check_id: int, user_id: int):
+            nonlocal errors
+            started = time.monotonic()
+            try:
+                await get_ai_feedback_async(
+                    user_id,
+                    check_id,
+                    bot=bot,
+                    persist=False,
+                    rate_limiter=rate_limiter,
+                )
+            except Exception as e:
+                errors += 1
+                self.stderr.write(f"Check {check_id} failed: {e}")
+                return
+            latencies.append(time.monotonic() - started)
+
+        total = int(options["rate"] * options["duration"])
+        interval = 1 / options["rate"]
+        started = time.monotonic()
+        pending = []
+        for i in range(total):
+            delay = started + i * interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            check_id, user_id = targets[i % len(targets)]
+            pending.append(asyncio.create_task(one_request(check_id, user_id)))
+
+        await asyncio.gather(*pending)
+        elapsed = time.monotonic() - started
+        await bot.session.close()
+        return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+    def report(self, results: dict, options):
+        latencies = sorted(results["latencies"])
+        if not latencies:
+            self.stdout.write(self.style.ERROR("All requests failed."))
+            return
+
+        def percentile(p: float) -> float:
+            return latencies[min(int(len(latencies) * p), len(latencies) - 1)]
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Completed {len(latencies)} requests, {results['errors']} errors "
+                f"in {results['elapsed']:.1f} s "
+                f"({len(latencies) / results['elapsed']:.2f} req/s, "
+                f"target {options['rate']} req/s)\n"
+                f"latency mean {statistics.mean(latencies):.2f} s, "
+                f"p50 {percentile(0.5):.2f} s, p95 {percentile(0.95):.2f} s, "
+                f"p99 {percentile(0.99):.2f} s, max {latencies[-1]:.2f} s"
+            )
+        )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from backend.checker.ai_service import AI_ERROR_MESSAGES
+from backend.checker.feedback_index import index_checks
+from backend.checker.models import Check, FeedbackFingerprint
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Builds the index of past AI suggestions for near-duplicate solutions."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Drop the existing index and index all checks again.",
+        )
+
+    def handle(self, *args, **options):
+        if options["rebuild"]:
+            FeedbackFingerprint.objects.all().delete()
+            self.stdout.write(self.style.WARNING("Cleared existing index."))
+
+        queryset = (
+            Check.objects.filter(
+                ai_suggestion__isnull=False,
+                task__isnull=False,
+                fingerprint__isnull=True,
+            )
+            .exclude(ai_suggestion__in=AI_ERROR_MESSAGES)
+            .only(
+                "id", "task_id", "status", "code", "stdout", "stderr", "error_context"
+            )
+            .order_by("id")
+        )
+
+        indexed = 0
+        batch = []
+        for check in queryset.iterator(chunk_size=BATCH_SIZE):
+            batch.append(check)
+            if len(batch) >= BATCH_SIZE:
+                index_checks(batch)
+                indexed += len(batch)
+                batch = []
+        if batch:
+            index_checks(batch)
+            indexed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} checks."))
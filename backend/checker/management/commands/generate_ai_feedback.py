@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from backend.checker.ai_batch import generate_ai_suggestions
+from backend.checker.models import Check
+from backend.core.redis_client import run_async
+
+
+class Command(BaseCommand):
+    help = "Generates AI suggestions for many checks in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", nargs="+", type=int, help="Check IDs.")
+        parser.add_argument("--task", type=int, help="Only checks of this task.")
+        parser.add_argument(
+            "--status",
+            choices=Check.Status.values,
+            help="Only checks with this status.",
+        )
+        parser.add_argument("--limit", type=int, help="Maximum number of checks.")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.AI_MAX_CONCURRENT_REQUESTS,
+            help="Maximum number of simultaneous AI requests.",
+        )
+        parser.add_argument(
+            "--overwrite",
+            action="store_true",
+            help="Regenerate suggestions for checks that already have one.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Check.objects.all()
+        if options["ids"]:
+            queryset = queryset.filter(id__in=options["ids"])
+        if options["task"]:
+            queryset = queryset.filter(task_id=options["task"])
+        if options["status"]:
+            queryset = queryset.filter(status=options["status"])
+        if not options["overwrite"]:
+            queryset = queryset.filter(ai_suggestion__isnull=True)
+
+        check_ids = list(queryset.values_list("id", flat=True)[: options["limit"]])
+        if not check_ids:
+            self.stdout.write(self.style.WARNING("No checks to process."))
+            return
+
+        self.stdout.write(f"Generating AI suggestions for {len(check_ids)} checks...")
+        stats = run_async(
+            generate_ai_suggestions(
+                check_ids,
+                concurrency=options["concurrency"],
+                overwrite=options["overwrite"],
+            )
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Done: {stats['requests']} AI requests, "
+                f"{stats['reused']} reused suggestions, "
+                f"updated {stats['updated']}, failed {stats['failed']}, "
+                f"skipped {stats['skipped']}."
+            )
+        )
@@ -0,0 +1,57 @@
+import json
+
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from backend.checker.ai_stub_server import StubConfig, create_app
+
+
+class Command(BaseCommand):
+    help = "Runs a local OpenAI-compatible AI stub server for load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8088)
+        parser.add_argument("--latency-ms", type=float, default=800)
+        parser.add_argument("--latency-jitter-ms", type=float, default=400)
+        parser.add_argument(
+            "--latency-distribution",
+            choices=("normal", "uniform", "exponential"),
+            default="normal",
+        )
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Share of HTTP 500 answers."
+        )
+        parser.add_argument(
+            "--rate-limit-rate",
+            type=float,
+            default=0.0,
+            help="Share of HTTP 429 answers.",
+        )
+        parser.add_argument("--retry-after", type=int, default=1)
+        parser.add_argument(
+            "--responses-file",
+            help="JSON file with a list of canned answers in Markdown.",
+        )
+
+    def handle(self, *args, **options):
+        config = StubConfig(
+            latency_ms=options["latency_ms"],
+            latency_jitter_ms=options["latency_jitter_ms"],
+            latency_distribution=options["latency_distribution"],
+            error_rate=options["error_rate"],
+            rate_limit_rate=options["rate_limit_rate"],
+            retry_after_seconds=options["retry_after"],
+        )
+        if options["responses_file"]:
+            with open(options["responses_file"], encoding="utf-8") as f:
+                config.responses = json.load(f)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"AI stub listening on http://{options['host']}:{options['port']}/v1/chat/completions"
+            )
+        )
+        web.run_app(
+            create_app(config), host=options["host"], port=options["port"], print=None
+        )
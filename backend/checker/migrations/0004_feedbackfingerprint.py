@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('checker', '0003_delete_commonerror'),
+        ('courses', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedbackFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('signature', models.CharField(max_length=40, verbose_name='Сигнатура ошибки')),
+                ('fingerprint', models.CharField(max_length=40, verbose_name='Отпечаток кода')),
+                ('shingles', models.JSONField(default=list, verbose_name='Шинглы кода')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Время создания')),
+                ('source_check', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='fingerprint', to='checker.check', verbose_name='Проверка')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feedback_fingerprints', to='courses.task', verbose_name='Задача')),
+            ],
+            options={
+                'verbose_name': 'Отпечаток решения',
+                'verbose_name_plural': 'Отпечатки решений',
+                'indexes': [models.Index(fields=['task', 'signature'], name='checker_fee_task_id_e6aaa2_idx')],
+            },
+        ),
+    ]
@@ -61,3 +61,30 @@ class Check(models.Model):
         verbose_name = "Проверка кода"
         verbose_name_plural = "Проверки кода"
         ordering = ["-created_at"]
+
+
+class FeedbackFingerprint(models.Model):
+    source_check = models.OneToOneField(
+        Check,
+        on_delete=models.CASCADE,
+        related_name="fingerprint",
+        verbose_name="Проверка",
+    )
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.CASCADE,
+        related_name="feedback_fingerprints",
+        verbose_name="Задача",
+    )
+    signature = models.CharField(max_length=40, verbose_name="Сигнатура ошибки")
+    fingerprint = models.CharField(max_length=40, verbose_name="Отпечаток кода")
+    shingles = models.JSONField(default=list, verbose_name="Шинглы кода")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Время создания")
+
+    def __str__(self):
+        return f"Отпечаток проверки #{self.source_check_id}"
+
+    class Meta:
+        verbose_name = "Отпечаток решения"
+        verbose_name_plural = "Отпечатки решений"
+        indexes = [models.Index(fields=["task", "signature"])]
@@ -0,0 +1,124 @@
+import ast
+import traceback
+
+FORBIDDEN_MODULES = frozenset(
+    {
+        "ctypes",
+        "http",
+        "importlib",
+        "multiprocessing",
+        "os",
+        "pty",
+        "requests",
+        "shutil",
+        "signal",
+        "socket",
+        "subprocess",
+        "urllib",
+    }
+)
+FORBIDDEN_CALLS = frozenset({"__import__"})
+FILENAME = "main.py"
+# Длиннее решения не бывают; ограничение защищает парсер от раздутого кода.
+MAX_CODE_LENGTH = 50_000
+
+
+def _is_always_true(node: ast.expr) -> bool:
+    return isinstance(node, ast.Constant) and bool(node.value)
+
+
+# Узлы, которые не могут ни бросить исключение, ни передать управление наружу.
+# Цикл считается бесконечным, только если его тело состоит из них целиком
+# (например, pass или присваивание константы): любые вычисления, даже
+# деление или сравнение, могут завершить программу исключением.
+INERT_LOOP_NODES = (
+    ast.Pass,
+    ast.Continue,
+    ast.Expr,
+    ast.Assign,
+    ast.AnnAssign,
+    ast.Constant,
+    ast.Store,
+)
+
+
+def _loop_can_stop(loop: ast.While) -> bool:
+    """
+    Цикл считается способным завершиться, если в его теле есть хоть один
+    узел вне INERT_LOOP_NODES. Имена допускаются только как цели присваивания:
+    чтение имени может бросить NameError.
+    """
+    stack = list(loop.body)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Name):
+            if not isinstance(node.ctx, ast.Store):
+                return True
+        elif not isinstance(node, INERT_LOOP_NODES):
+            return True
+        stack.extend(ast.iter_child_nodes(node))
+    return False
+
+
+def _format_problem(node: ast.AST, code_lines: list[str], message: str) -> str:
+    line = code_lines[node.lineno - 1].strip() if node.lineno <= len(code_lines) else ""
+    return f'  File "{FILENAME}", line {node.lineno}\n    {line}\n{message}'
+
+
+def precheck_code(code: str) -> str | None:
+    """
+    Статическая проверка кода до запуска в песочнице. Возвращает текст ошибки
+    в формате, похожем на traceback Python, или None, если код можно запускать.
+    """
+    if len(code) > MAX_CODE_LENGTH:
+        return f"ValueError: код длиннее {MAX_CODE_LENGTH} символов"
+    try:
+        tree = ast.parse(code, filename=FILENAME)
+    except (SyntaxError, ValueError) as e:
+        return "".join(traceback.format_exception_only(type(e), e)).rstrip()
+    except (MemoryError, RecursionError) as e:
+        # Парсер бросает их на глубоко вложенных выражениях, которые
+        # помещаются и в ограничение длины.
+        return f"{type(e).__name__}: выражения вложены слишком глубоко"
+
+    code_lines = code.splitlines()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names = (
+                [alias.name for alias in node.names]
+                if isinstance(node, ast.Import)
+                else [node.module or ""]
+            )
+            for name in names:
+                if name.split(".")[0] in FORBIDDEN_MODULES:
+                    return _format_problem(
+                        node,
+                        code_lines,
+                        f"ImportError: использование модуля '{name}' запрещено",
+                    )
+
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id in FORBIDDEN_CALLS
+        ):
+            return _format_problem(
+                node,
+                code_lines,
+                f"ImportError: вызов '{node.func.id}' запрещен",
+            )
+
+        elif (
+            isinstance(node, ast.While)
+            and _is_always_true(node.test)
+            and not _loop_can_stop(node)
+        ):
+            return _format_problem(
+                node,
+                code_lines,
+                "RuntimeError: бесконечный цикл — тело цикла не содержит "
+                "ничего, кроме pass и присваивания констант, программа никогда "
+                "не завершится",
+            )
+
+    return None
@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from aiogram import Bot
@@ -10,14 +9,20 @@ from django.db import models
 from django.utils import timezone
 
 from backend.core.markdown import convert_md_to_html_for_telegram
+from backend.core.redis_client import run_async
+from backend.core.telegram import create_bot
 from backend.courses.models import Task, UserTaskStatus
 from backend.users.models import User
 from bot.keyboards.inline_keyboards import get_after_submission_kb
 from bot.utils.db import get_check_for_feedback
 
 from . import ai_service
+from .ai_batch import generate_ai_suggestions
+from .ai_limiter import AIRateLimiter
+from .feedback_index import aindex_check
 from .models import Check
 from .runner import execute_code
+from .static_check import precheck_code
 
 logger = logging.getLogger(__name__)
 
@@ -26,11 +31,11 @@ MAX_OUTPUT_LENGTH = 1000
 
 @shared_task
 def check_solution_task(user_id: int, code: str, task_id: int):
-    asyncio.run(check_solution_async(user_id, code, task_id))
+    run_async(check_solution_async(user_id, code, task_id))
 
 
 async def check_solution_async(user_id: int, code: str, task_id: int):
-    bot = Bot(token=settings.BOT_TOKEN, default=None)
+    bot = create_bot()
     check_instance = None
     try:
         user = await User.objects.aget(telegram_id=user_id)
@@ -49,6 +54,11 @@ async def check_solution_async(user_id: int, code: str, task_id: int):
         tests = task.tests.get("tests", [])
         failed_test_info = None
 
+        static_error = precheck_code(code)
+        if static_error:
+            failed_test_info = {"type": "static_error", "stderr": static_error}
+            tests = []
+
         for i, test in enumerate(tests):
             input_data = "\n".join(map(str, test.get("input", [])))
 
@@ -92,7 +102,10 @@ async def check_solution_async(user_id: int, code: str, task_id: int):
         if failed_test_info:
             check_instance.status = Check.Status.ERROR
 
-            if failed_test_info["type"] == "runtime_error":
+            if failed_test_info["type"] == "static_error":
+                check_instance.stderr = failed_test_info["stderr"][:MAX_OUTPUT_LENGTH]
+                response_text = f"❌ *Ошибка в коде*\n\nКод не прошел проверку перед запуском:\n```\n{check_instance.stderr}\n```"
+            elif failed_test_info["type"] == "runtime_error":
                 check_instance.stderr = failed_test_info["stderr"][:MAX_OUTPUT_LENGTH]
                 response_text = f"❌ *Ошибка выполнения на тесте #{failed_test_info['test_num']}*\n\nВаш код завершился с ошибкой:\n```\n{check_instance.stderr}\n```"
             else:
@@ -155,11 +168,23 @@ async def check_solution_async(user_id: int, code: str, task_id: int):
 
 @shared_task
 def get_ai_feedback_task(user_id: int, check_id: int):
-    asyncio.run(get_ai_feedback_async(user_id, check_id))
-
-
-async def get_ai_feedback_async(user_id: int, check_id: int):
-    bot = Bot(token=settings.BOT_TOKEN, default=None)
+    run_async(get_ai_feedback_async(user_id, check_id))
+
+
+async def get_ai_feedback_async(
+    user_id: int,
+    check_id: int,
+    bot: Bot | None = None,
+    persist: bool = True,
+    rate_limiter: AIRateLimiter | None = None,
+):
+    """
+    С persist=False ответ AI только отправляется пользователю: проверка
+    не обновляется и не попадает в индекс переиспользования (для бенчмарка).
+    """
+    owns_bot = bot is None
+    if owns_bot:
+        bot = create_bot()
 
     check, task = await get_check_for_feedback(check_id, user_id)
     if not check or not task:
@@ -167,18 +192,31 @@ async def get_ai_feedback_async(user_id: int, check_id: int):
             f"AI feedback requested for invalid check_id {check_id} or no access for user {user_id}"
         )
         await bot.send_message(user_id, "Не удалось найти вашу проверку.")
-        await bot.session.close()
+        if owns_bot:
+            await bot.session.close()
         return
 
     course_id = task.level.module.course.id
     module_id = task.level.module.id
     level_id = task.level.id
 
-    ai_suggestion, duration_ms = await ai_service.get_ai_suggestion(check, task)
+    async def notify_wait(seconds: int):
+        await bot.send_message(
+            user_id,
+            f"⏳ Сейчас много запросов к AI, ваш запрос в очереди. "
+            f"Примерное время ожидания: {seconds} сек.",
+        )
+
+    ai_suggestion, duration_ms = await ai_service.get_ai_suggestion(
+        check, task, on_wait=notify_wait, rate_limiter=rate_limiter
+    )
 
-    check.ai_suggestion = ai_suggestion
-    check.ai_response_ms = duration_ms
-    await check.asave(update_fields=["ai_suggestion", "ai_response_ms"])
+    if persist:
+        check.ai_suggestion = ai_suggestion
+        check.ai_response_ms = duration_ms
+        await check.asave(update_fields=["ai_suggestion", "ai_response_ms"])
+        if ai_suggestion not in ai_service.AI_ERROR_MESSAGES:
+            await aindex_check(check)
 
     header = "<b>🤖 Обратная связь от AI:</b>"
     html_suggestion = convert_md_to_html_for_telegram(ai_suggestion)
@@ -207,4 +245,16 @@ async def get_ai_feedback_async(user_id: int, check_id: int):
             reply_markup=keyboard,
         )
     finally:
-        await bot.session.close()
+        if owns_bot:
+            await bot.session.close()
+
+
+@shared_task
+def generate_ai_feedback_batch_task(check_ids: list[int], overwrite: bool = False):
+    return run_async(
+        generate_ai_suggestions(
+            check_ids,
+            concurrency=settings.AI_MAX_CONCURRENT_REQUESTS,
+            overwrite=overwrite,
+        )
+    )
@@ -1,3 +1,129 @@
-from django.test import TestCase
+import asyncio
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.test import SimpleTestCase
+
+from .ai_limiter import AIRateLimiter
+from .static_check import MAX_CODE_LENGTH, precheck_code
+
+
+class AIRateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        patcher = mock.patch(
+            "backend.checker.ai_limiter.get_async_redis", self._client
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _client(self):
+        return fakeredis.FakeAsyncRedis(server=self.server, decode_responses=True)
+
+    def _limiter(self, rpm=0, tpm=0, max_concurrent=10) -> AIRateLimiter:
+        return AIRateLimiter(
+            requests_per_minute=rpm,
+            tokens_per_minute=tpm,
+            max_concurrent=max_concurrent,
+            key_prefix="test_limiter",
+        )
+
+    async def _acquire_nowait(self, limiter: AIRateLimiter, tokens: int = 1) -> bool:
+        try:
+            async with asyncio.timeout(0.5):
+                async with limiter.acquire(tokens):
+                    return True
+        except TimeoutError:
+            return False
+
+    async def test_concurrency_slot_is_released_after_request(self):
+        limiter = self._limiter(max_concurrent=1)
+        async with limiter.acquire(1):
+            self.assertFalse(await self._acquire_nowait(limiter))
+        self.assertTrue(await self._acquire_nowait(limiter))
+
+    async def test_requests_per_minute(self):
+        limiter = self._limiter(rpm=2)
+        self.assertTrue(await self._acquire_nowait(limiter))
+        self.assertTrue(await self._acquire_nowait(limiter))
+        self.assertFalse(await self._acquire_nowait(limiter))
+
+    async def test_tokens_per_minute_uses_recorded_usage(self):
+        limiter = self._limiter(tpm=1000)
+        async with limiter.acquire(900) as slot:
+            await slot.record_usage(100)
+        # Оценка 900 заменена фактическим расходом 100: на 800 токенов места хватает.
+        self.assertTrue(await self._acquire_nowait(limiter, tokens=800))
+        self.assertFalse(await self._acquire_nowait(limiter, tokens=800))
+
+    async def test_cooldown_blocks_requests(self):
+        limiter = self._limiter()
+        await limiter.set_cooldown(5)
+        self.assertFalse(await self._acquire_nowait(limiter))
+
+    async def test_waiters_are_served_in_order(self):
+        limiter = self._limiter(max_concurrent=1)
+        order = []
+
+        async def request(name: str):
+            async with limiter.acquire(1):
+                order.append(name)
+                await asyncio.sleep(0.05)
+
+        async with limiter.acquire(1):
+            first = asyncio.create_task(request("first"))
+            await asyncio.sleep(0.1)
+            second = asyncio.create_task(request("second"))
+            await asyncio.sleep(0.1)
+        await asyncio.gather(first, second)
+        self.assertEqual(order, ["first", "second"])
+
+    async def test_abandoned_ticket_leaves_queue(self):
+        limiter = self._limiter(max_concurrent=1)
+        async with limiter.acquire(1):
+            self.assertFalse(await self._acquire_nowait(limiter))
+            self.assertEqual(await self._client().llen("test_limiter:queue"), 0)
+
+
+class PrecheckCodeTests(SimpleTestCase):
+    def assertRejected(self, code: str, message: str):
+        error = precheck_code(code)
+        self.assertIsNotNone(error)
+        self.assertIn(message, error)
+
+    def test_valid_code_passes(self):
+        self.assertIsNone(precheck_code("n = int(input())\nprint(n * 2)"))
+
+    def test_syntax_error(self):
+        self.assertRejected("print(", "SyntaxError")
+
+    def test_forbidden_import(self):
+        self.assertRejected("import os.path", "ImportError")
+        self.assertRejected("from subprocess import run", "ImportError")
+        self.assertRejected("__import__('os')", "ImportError")
+
+    def test_trivially_infinite_loop(self):
+        self.assertRejected("while True:\n    pass", "бесконечный цикл")
+        self.assertRejected("while 1:\n    x = 5\n    continue", "бесконечный цикл")
+
+    def test_loops_that_can_stop_pass(self):
+        loops = [
+            "while True:\n    break",
+            "while True:\n    print(1)",
+            "while True:\n    x = int(input())",
+            # Завершается ZeroDivisionError на шестой итерации.
+            "i = 5\nwhile True:\n    x = 10 // i\n    i -= 1",
+            "while True:\n    x = y",
+            "while True:\n    a, b = 1, 2, 3",
+            "while n:\n    pass",
+        ]
+        for code in loops:
+            with self.subTest(code=code):
+                self.assertIsNone(precheck_code(code))
+
+    def test_oversized_code(self):
+        self.assertRejected("x = 1\n" * MAX_CODE_LENGTH, "ValueError")
+
+    def test_deeply_nested_expression(self):
+        error = precheck_code("x = " + "-" * (MAX_CODE_LENGTH - 10) + "1")
+        self.assertIsNotNone(error)
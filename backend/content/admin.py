@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.http import HttpResponseRedirect
 from django.urls import reverse
 
-from .models import FAQ, BotTexts, SiteSettings
+from .models import FAQ, BotTexts, SiteSettings, TelegramFile
 
 
 @admin.register(SiteSettings)
@@ -41,3 +41,13 @@ class BotTextsAdmin(admin.ModelAdmin):
 
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(TelegramFile)
+class TelegramFileAdmin(admin.ModelAdmin):
+    list_display = ("path", "media_type", "bot_id", "created_at")
+    search_fields = ("path", "file_id")
+    readonly_fields = ("bot_id", "path", "content_hash", "media_type", "file_id")
+
+    def has_add_permission(self, request):
+        return False
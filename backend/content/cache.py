@@ -0,0 +1,54 @@
+from django.conf import settings
+
+from backend.core.cache import (
+    MISSING,
+    LocalTTLCache,
+    local_caches_enabled,
+    publish_invalidation,
+    register_local_cache,
+)
+from backend.core.db_pool import db_query
+
+from .models import BotTexts, SiteSettings
+
+NAMESPACE = "content"
+BOT_TEXTS_KEY = "bot_texts"
+SITE_SETTINGS_KEY = "site_settings"
+
+# Настройки-синглтоны меняются только из админки, поэтому загружаются один раз
+# на процесс и сбрасываются через pub/sub при сохранении. TTL — страховка на
+# случай потерянного сообщения. Процессы без подписки на инвалидацию читают БД.
+singletons_cache = LocalTTLCache(maxsize=2, ttl=settings.CONTENT_CACHE_TTL)
+register_local_cache(NAMESPACE, singletons_cache)
+
+
+@db_query
+def _load_singleton(model):
+    instance, _ = model.objects.get_or_create(pk=1)
+    return instance
+
+
+async def get_cached_singleton(key: str, model):
+    if not local_caches_enabled():
+        return await _load_singleton(model)
+    instance = singletons_cache.get(key)
+    if instance is MISSING:
+        # Сброс, пришедший во время загрузки, меняет generation, и
+        # прочитанный до него экземпляр не попадет в кэш.
+        generation = singletons_cache.generation
+        instance = await _load_singleton(model)
+        singletons_cache.set(key, instance, generation=generation)
+    return instance
+
+
+async def get_bot_texts_cached() -> BotTexts:
+    return await get_cached_singleton(BOT_TEXTS_KEY, BotTexts)
+
+
+async def get_site_settings_cached() -> SiteSettings:
+    return await get_cached_singleton(SITE_SETTINGS_KEY, SiteSettings)
+
+
+def invalidate_singleton(key: str):
+    singletons_cache.delete(key)
+    publish_invalidation(NAMESPACE, key)
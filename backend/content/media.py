@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import logging
+import os
+import weakref
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from backend.core.cache import MISSING, LocalTTLCache
+from backend.core.db_pool import db_query
+
+from .models import TelegramFile
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Значения совпадают с MediaType у FAQ и Broadcast.
+SEND_METHODS = {
+    "PHOTO": ("send_photo", "photo"),
+    "VIDEO": ("send_video", "video"),
+    "DOCUMENT": ("send_document", "document"),
+    "AUDIO": ("send_audio", "audio"),
+}
+FILE_ATTRIBUTES = ("video", "document", "audio", "animation", "voice")
+
+_file_ids = LocalTTLCache(maxsize=1000, ttl=settings.CONTENT_CACHE_TTL)
+_hashes: dict[str, tuple[float, int, str]] = {}
+# asyncio.Lock привязывается к event loop, а Celery-задачи создают новый loop
+# на каждый запуск, поэтому блокировки хранятся отдельно для каждого loop.
+_upload_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _file_hash(path: str) -> str:
+    stat = os.stat(path)
+    cached = _hashes.get(path)
+    if cached and cached[:2] == (stat.st_mtime, stat.st_size):
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    _hashes[path] = (stat.st_mtime, stat.st_size, digest.hexdigest())
+    return digest.hexdigest()
+
+
+@db_query
+def _load_file_id(bot_id: int, path: str, content_hash: str) -> str | None:
+    return (
+        TelegramFile.objects.filter(bot_id=bot_id, path=path, content_hash=content_hash)
+        .values_list("file_id", flat=True)
+        .first()
+    )
+
+
+@db_query
+def _save_file_id(
+    bot_id: int, path: str, content_hash: str, media_type: str, file_id: str
+):
+    TelegramFile.objects.update_or_create(
+        bot_id=bot_id,
+        path=path,
+        content_hash=content_hash,
+        defaults={"media_type": media_type, "file_id": file_id},
+    )
+
+
+@db_query
+def _forget_file_id(bot_id: int, path: str, content_hash: str):
+    TelegramFile.objects.filter(
+        bot_id=bot_id, path=path, content_hash=content_hash
+    ).delete()
+
+
+def _extract_file_id(message: Message) -> str | None:
+    if message.photo:
+        return message.photo[-1].file_id
+    for attribute in FILE_ATTRIBUTES:
+        media = getattr(message, attribute)
+        if media:
+            return media.file_id
+    return None
+
+
+async def _get_file_id(key: tuple) -> str | None:
+    file_id = _file_ids.get(key)
+    if file_id is MISSING:
+        file_id = await _load_file_id(*key)
+        if file_id:
+            _file_ids.set(key, file_id)
+    return file_id
+
+
+def _get_upload_lock(key: tuple) -> asyncio.Lock:
+    locks = _upload_locks.setdefault(asyncio.get_running_loop(), {})
+    return locks.setdefault(key, asyncio.Lock())
+
+
+async def send_media(
+    bot: Bot, chat_id: int, path: str, media_type: str, **kwargs
+) -> Message:
+    """
+    Отправляет файл с диска, загружая его в Telegram только один раз.
+    Повторные отправки используют сохраненный file_id; одновременные первые
+    отправки одного файла ждут, пока загрузка завершится.
+    """
+    method_name, field = SEND_METHODS[media_type]
+    method = getattr(bot, method_name)
+    content_hash = await sync_to_async(_file_hash, thread_sensitive=False)(path)
+    key = (bot.id, path, content_hash)
+
+    file_id = await _get_file_id(key)
+    if file_id:
+        try:
+            return await method(chat_id, **{field: file_id}, **kwargs)
+        except TelegramBadRequest as e:
+            if "file" not in e.message.lower():
+                raise
+            logger.warning(f"Stored file_id for {path} is rejected, uploading again: {e}")
+            _file_ids.delete(key)
+            await _forget_file_id(*key)
+
+    async with _get_upload_lock(key):
+        file_id = await _get_file_id(key)
+        if not file_id:
+            message = await method(chat_id, **{field: FSInputFile(path)}, **kwargs)
+            file_id = _extract_file_id(message)
+            if file_id:
+                _file_ids.set(key, file_id)
+                await _save_file_id(*key, media_type, file_id)
+            return message
+
+    return await method(chat_id, **{field: file_id}, **kwargs)
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0003_alter_bottexts_ai_analysis_message_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bot_id', models.BigIntegerField(verbose_name='ID бота')),
+                ('path', models.CharField(max_length=500, verbose_name='Путь к файлу')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Хэш содержимого')),
+                ('media_type', models.CharField(max_length=10, verbose_name='Тип медиафайла')),
+                ('file_id', models.CharField(max_length=255, verbose_name='file_id в Telegram')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата загрузки')),
+            ],
+            options={
+                'verbose_name': 'Файл Telegram',
+                'verbose_name_plural': 'Файлы Telegram',
+                'unique_together': {('bot_id', 'path', 'content_hash')},
+            },
+        ),
+    ]
@@ -151,3 +151,26 @@ class BotTexts(models.Model):
     class Meta:
         verbose_name = "Тексты бота"
         verbose_name_plural = "Тексты бота"
+
+
+class TelegramFile(models.Model):
+    """
+    Уже загруженный в Telegram файл. file_id привязан к боту, поэтому ключ
+    включает id бота, а также путь и хэш содержимого: при замене файла
+    по тому же пути он будет загружен заново.
+    """
+
+    bot_id = models.BigIntegerField(verbose_name="ID бота")
+    path = models.CharField(max_length=500, verbose_name="Путь к файлу")
+    content_hash = models.CharField(max_length=64, verbose_name="Хэш содержимого")
+    media_type = models.CharField(max_length=10, verbose_name="Тип медиафайла")
+    file_id = models.CharField(max_length=255, verbose_name="file_id в Telegram")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата загрузки")
+
+    def __str__(self):
+        return self.path
+
+    class Meta:
+        verbose_name = "Файл Telegram"
+        verbose_name_plural = "Файлы Telegram"
+        unique_together = ("bot_id", "path", "content_hash")
@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .cache import BOT_TEXTS_KEY, SITE_SETTINGS_KEY, invalidate_singleton
+from .models import BotTexts, SiteSettings
+
+
+@receiver(post_save, sender=BotTexts)
+def on_bot_texts_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_singleton(BOT_TEXTS_KEY))
+
+
+@receiver(post_save, sender=SiteSettings)
+def on_site_settings_save(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_singleton(SITE_SETTINGS_KEY))
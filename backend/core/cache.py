@@ -0,0 +1,241 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from redis.exceptions import RedisError
+
+from .redis_client import get_async_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+ALL_KEYS = "*"
+RECONNECT_DELAY_SECONDS = 5
+
+MISSING = object()
+
+_local_caches: dict[str, list["LocalTTLCache"]] = {}
+# Локальный слой TwoTierCache используется, только пока процесс подписан на
+# канал инвалидации (бот). В celery-воркерах и админке подписки нет, и без
+# этого флага они видели бы устаревшие данные до истечения local_ttl.
+_listening = False
+
+# Запись загруженного значения, только если с момента чтения версия ключа
+# не изменилась: иначе загрузчик, прочитавший БД до коммита, перезаписал бы
+# более новое значение или вернул бы сброшенное.
+STORE_SCRIPT = """
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+class LocalTTLCache:
+    """
+    LRU-кэш в памяти процесса с ограниченным временем жизни записей.
+    Каждый сброс увеличивает generation: значение, загруженное до сброса,
+    передается в set вместе с прочитанным generation и не сохраняется.
+    Счетчик общий на кэш, а не на ключ, чтобы не хранить версии всех ключей.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return MISSING
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, generation: int | None = None):
+        if generation is not None and generation != self.generation:
+            return
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        self.generation += 1
+        self._data.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._data.clear()
+
+
+def register_local_cache(namespace: str, cache: LocalTTLCache):
+    _local_caches.setdefault(namespace, []).append(cache)
+
+
+def local_caches_enabled() -> bool:
+    """Локальные кэши, сбрасываемые через pub/sub, можно читать и заполнять."""
+    return _listening
+
+
+def publish_invalidation(namespace: str, key: str = ALL_KEYS):
+    try:
+        get_redis().publish(INVALIDATION_CHANNEL, f"{namespace}:{key}")
+    except RedisError as e:
+        logger.warning(f"Failed to publish cache invalidation {namespace}:{key}: {e}")
+
+
+def _clear_all_local_caches():
+    for caches in _local_caches.values():
+        for cache in caches:
+            cache.clear()
+
+
+async def listen_for_invalidations():
+    """
+    Подписка на канал инвалидации: сбрасывает локальные кэши процесса, когда
+    данные меняются в другом процессе (например, в админке). После
+    переподключения локальные кэши очищаются полностью, так как сообщения
+    за время разрыва могли быть потеряны. Пока подписки нет, локальный слой
+    TwoTierCache не используется.
+    """
+    global _listening
+    while True:
+        pubsub = None
+        try:
+            pubsub = get_async_redis().pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            _clear_all_local_caches()
+            _listening = True
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                namespace, _, key = message["data"].partition(":")
+                for cache in _local_caches.get(namespace, []):
+                    if key == ALL_KEYS:
+                        cache.clear()
+                    else:
+                        cache.delete(key)
+        except RedisError as e:
+            _listening = False
+            logger.warning(f"Cache invalidation listener disconnected: {e}")
+            _clear_all_local_caches()
+            await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+        finally:
+            _listening = False
+            if pubsub is not None:
+                await pubsub.aclose()
+
+
+class TwoTierCache:
+    """
+    Двухуровневый кэш: локальный LRU в памяти процесса и общий слой в redis.
+    Значения хранятся в redis в JSON, в памяти процесса — уже преобразованными
+    через decode. При недоступности redis данные загружаются напрямую через loader.
+    Каждый сброс увеличивает версию ключа; загруженное значение сохраняется,
+    только если версия не изменилась, пока работал loader.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: int,
+        local_ttl: float,
+        maxsize: int,
+        decode: Callable[[Any], Any] | None = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.decode = decode
+        self.local = LocalTTLCache(maxsize=maxsize, ttl=local_ttl)
+        register_local_cache(namespace, self.local)
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _version_key(self, key: str) -> str:
+        return f"cache_version:{self.namespace}:{key}"
+
+    async def get(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        use_local = _listening
+        if use_local:
+            value = self.local.get(key)
+            if value is not MISSING:
+                return value
+        generation = self.local.generation
+
+        client = get_async_redis()
+        try:
+            raw, version = await client.mget(
+                self._redis_key(key), self._version_key(key)
+            )
+        except RedisError as e:
+            logger.warning(f"Cache {self.namespace} is unavailable: {e}")
+            return self._decode(await loader())
+
+        stored = True
+        if raw is not None:
+            data = json.loads(raw)
+        else:
+            data = await loader()
+            store = client.register_script(STORE_SCRIPT)
+            try:
+                stored = bool(
+                    await store(
+                        keys=[self._redis_key(key), self._version_key(key)],
+                        args=[version or "", json.dumps(data), self.ttl],
+                    )
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to store {self.namespace}:{key} in cache: {e}")
+                stored = False
+
+        value = self._decode(data)
+        if use_local and stored:
+            self.local.set(key, value, generation=generation)
+        return value
+
+    def _decode(self, data: Any) -> Any:
+        return self.decode(data) if self.decode else data
+
+    def set(self, key: str, data: Any):
+        """
+        Записывает новое значение в redis вместо сброса: следующий запрос
+        не пойдет в БД. Версия ключа увеличивается в той же транзакции, поэтому
+        loader, начавший чтение раньше, не перезапишет значение. Локальные копии
+        в других процессах сбрасываются. Если redis недоступен, старое значение
+        в нем останется до истечения ttl.
+        """
+        self.local.delete(key)
+        try:
+            pipe = get_redis().pipeline()
+            self._bump_version(pipe, key)
+            pipe.set(self._redis_key(key), json.dumps(data), ex=self.ttl)
+            pipe.execute()
+        except RedisError as e:
+            logger.error(f"Failed to store {self.namespace}:{key} in cache: {e}")
+            return
+        publish_invalidation(self.namespace, key)
+
+    def _bump_version(self, pipe, key: str):
+        pipe.incr(self._version_key(key))
+        pipe.expire(self._version_key(key), self.ttl)
+
+    def invalidate(self, key: str):
+        self.local.delete(key)
+        try:
+            pipe = get_redis().pipeline()
+            self._bump_version(pipe, key)
+            pipe.delete(self._redis_key(key))
+            pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to invalidate {self.namespace}:{key}: {e}")
+        publish_invalidation(self.namespace, key)
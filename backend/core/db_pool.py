@@ -0,0 +1,35 @@
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# Асинхронные методы ORM Django (aget, acount и т.д.) выполняются через
+# sync_to_async(thread_sensitive=True), то есть в одном общем потоке.
+# Отдельный пул потоков позволяет выполнять до DB_POOL_SIZE запросов
+# параллельно, у каждого потока свое соединение с БД.
+executor = ThreadPoolExecutor(
+    max_workers=settings.DB_POOL_SIZE, thread_name_prefix="db_query"
+)
+
+
+def db_query(func):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        close_old_connections()
+        started = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            duration_ms = (time.monotonic() - started) * 1000
+            if duration_ms >= settings.DB_SLOW_QUERY_MS:
+                logger.warning(f"Slow DB query {func.__name__}: {duration_ms:.1f} ms")
+            else:
+                logger.debug(f"DB query {func.__name__}: {duration_ms:.1f} ms")
+
+    return sync_to_async(timed, thread_sensitive=False, executor=executor)
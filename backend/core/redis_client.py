@@ -0,0 +1,62 @@
+import asyncio
+import weakref
+from typing import Any, Coroutine
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+_sync_clients: dict[str, redis.Redis] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_redis_url(db: str | int) -> str:
+    return f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{db}"
+
+
+def get_redis(db: str | int | None = None) -> redis.Redis:
+    url = get_redis_url(settings.REDIS_DB_CACHE if db is None else db)
+    client = _sync_clients.get(url)
+    if client is None:
+        client = redis.Redis.from_url(url, decode_responses=True)
+        _sync_clients[url] = client
+    return client
+
+
+def get_async_redis(db: str | int | None = None) -> aioredis.Redis:
+    """
+    Асинхронный клиент привязан к event loop, в котором создан его пул соединений.
+    Celery-задачи запускают новый loop на каждый вызов, поэтому клиенты
+    кэшируются отдельно для каждого loop. Клиент держит ссылку на свой loop,
+    поэтому сам из WeakKeyDictionary не удалится: короткоживущие loop
+    нужно запускать через run_async, который закрывает клиенты.
+    """
+    url = get_redis_url(settings.REDIS_DB_CACHE if db is None else db)
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(url)
+    if client is None:
+        client = aioredis.Redis.from_url(url, decode_responses=True)
+        clients[url] = client
+    return client
+
+
+async def close_async_redis():
+    """Закрывает асинхронные клиенты текущего loop и их соединения."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+def run_async(coro: Coroutine) -> Any:
+    """asyncio.run для celery-задач и команд: в конце закрывает redis-клиенты loop."""
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await close_async_redis()
+
+    return asyncio.run(main())
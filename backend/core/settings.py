@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from celery.schedules import crontab
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -22,6 +24,7 @@ INSTALLED_APPS = [
     "django.contrib.staticfiles",
     "phonenumber_field",
     "jsoneditor",
+    "django_celery_beat",
     "backend.users.apps.UsersConfig",
     "backend.checker.apps.CheckerConfig",
     "backend.sender.apps.SenderConfig",
@@ -108,11 +111,33 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_SLOW_QUERY_MS = int(os.getenv("DB_SLOW_QUERY_MS", "200"))
+
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+# Пустое значение — официальный api.telegram.org; для локальных тестов
+# можно указать адрес заглушки (python bot/fake_telegram.py).
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/bot/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8081"))
+BOT_POLLING_SHARDS = int(os.getenv("BOT_POLLING_SHARDS", "16"))
+BOT_SHARD_QUEUE_SIZE = int(os.getenv("BOT_SHARD_QUEUE_SIZE", "100"))
+BOT_SHARD_CONCURRENCY = int(os.getenv("BOT_SHARD_CONCURRENCY", "16"))
 
 REDIS_HOST = os.getenv("REDIS_HOST")
 REDIS_PORT = os.getenv("REDIS_PORT", "6379")
 REDIS_DB_CELERY = os.environ.get("REDIS_DB_CELERY", "0")
+REDIS_DB_CACHE = os.environ.get("REDIS_DB_CACHE", "1")
+REDIS_DB_FSM = os.environ.get("REDIS_DB_FSM", "2")
+FSM_STATE_TTL = int(os.getenv("FSM_STATE_TTL", "86400"))
+FSM_DATA_TTL = int(os.getenv("FSM_DATA_TTL", "86400"))
+FSM_REDIS_MAX_CONNECTIONS = int(os.getenv("FSM_REDIS_MAX_CONNECTIONS", "50"))
+FSM_REDIS_POOL_TIMEOUT = int(os.getenv("FSM_REDIS_POOL_TIMEOUT", "10"))
 
 CELERY_BROKER_URL = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB_CELERY}"
 CELERY_RESULT_BACKEND = f"redis://{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB_CELERY}"
@@ -120,6 +145,43 @@ CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = TIME_ZONE
+CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+BROADCAST_DISPATCH_INTERVAL = int(os.getenv("BROADCAST_DISPATCH_INTERVAL", "30"))
+BROADCAST_STALE_MINUTES = int(os.getenv("BROADCAST_STALE_MINUTES", "15"))
+ACCESS_SYNC_DEBOUNCE_SECONDS = int(os.getenv("ACCESS_SYNC_DEBOUNCE_SECONDS", "5"))
+CELERY_BEAT_SCHEDULE = {
+    "dispatch-due-broadcasts": {
+        "task": "backend.sender.tasks.dispatch_due_broadcasts",
+        "schedule": BROADCAST_DISPATCH_INTERVAL,
+    },
+    "reconcile-all-access": {
+        "task": "backend.users.tasks.reconcile_all_access",
+        "schedule": crontab(hour=4, minute=0),
+    },
+}
+
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_LOCAL_CACHE_TTL = int(os.getenv("AUTH_LOCAL_CACHE_TTL", "30"))
+AUTH_LOCAL_CACHE_SIZE = int(os.getenv("AUTH_LOCAL_CACHE_SIZE", "10000"))
+COURSE_ACCESS_CACHE_TTL = int(os.getenv("COURSE_ACCESS_CACHE_TTL", "3600"))
+CONTENT_CACHE_TTL = int(os.getenv("CONTENT_CACHE_TTL", "3600"))
+CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "3600"))
+TASK_CARD_CACHE_SIZE = int(os.getenv("TASK_CARD_CACHE_SIZE", "1000"))
+SOLVED_TASKS_TTL = int(os.getenv("SOLVED_TASKS_TTL", "604800"))
+
+BROADCAST_RATE_PER_SECOND = float(os.getenv("BROADCAST_RATE_PER_SECOND", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+BROADCAST_MAX_RETRIES = int(os.getenv("BROADCAST_MAX_RETRIES", "3"))
+BROADCAST_SHARDS = int(os.getenv("BROADCAST_SHARDS", "4"))
+
+AI_REQUESTS_PER_MINUTE = int(os.getenv("AI_REQUESTS_PER_MINUTE", "30"))
+AI_TOKENS_PER_MINUTE = int(os.getenv("AI_TOKENS_PER_MINUTE", "0"))
+AI_MAX_CONCURRENT_REQUESTS = int(os.getenv("AI_MAX_CONCURRENT_REQUESTS", "4"))
+AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "2"))
+AI_REQUEST_TIMEOUT_SECONDS = int(os.getenv("AI_REQUEST_TIMEOUT_SECONDS", "120"))
+AI_FEEDBACK_SIMILARITY_THRESHOLD = float(
+    os.getenv("AI_FEEDBACK_SIMILARITY_THRESHOLD", "0.9")
+)
 
 ADMIN_REORDER = [
     { 'app': 'users', 'label': 'Пользователи и Доступы' },
@@ -0,0 +1,89 @@
+from unittest import mock
+
+import fakeredis
+from django.test import SimpleTestCase
+from redis.exceptions import ConnectionError
+
+from . import cache
+from .cache import TwoTierCache
+
+
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=self.server, decode_responses=True)
+        for name, client in (
+            ("get_redis", lambda: self.redis),
+            ("get_async_redis", self._async_client),
+        ):
+            patcher = mock.patch(f"backend.core.cache.{name}", client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.cache = TwoTierCache("test", ttl=60, local_ttl=60, maxsize=10)
+        self.addCleanup(cache._local_caches.pop, "test", None)
+        self.loads = 0
+
+    def _async_client(self):
+        return fakeredis.FakeAsyncRedis(server=self.server, decode_responses=True)
+
+    def _loader(self, value, during_load=None):
+        async def load():
+            self.loads += 1
+            if during_load:
+                during_load()
+            return value
+
+        return load
+
+    async def test_miss_loads_once_and_stores_in_redis(self):
+        self.assertEqual(await self.cache.get("k", self._loader([1])), [1])
+        self.assertEqual(await self.cache.get("k", self._loader([2])), [1])
+        self.assertEqual(self.loads, 1)
+
+    async def test_invalidate_during_load_discards_loaded_value(self):
+        loader = self._loader(["old"], lambda: self.cache.invalidate("k"))
+        self.assertEqual(await self.cache.get("k", loader), ["old"])
+        self.assertIsNone(self.redis.get("cache:test:k"))
+        self.assertEqual(await self.cache.get("k", self._loader(["new"])), ["new"])
+
+    async def test_set_during_load_wins_over_loaded_value(self):
+        loader = self._loader(["old"], lambda: self.cache.set("k", ["new"]))
+        await self.cache.get("k", loader)
+        self.assertEqual(await self.cache.get("k", self._loader(["other"])), ["new"])
+
+    async def test_local_tier_only_while_listening(self):
+        await self.cache.get("k", self._loader([1]))
+        self.redis.set("cache:test:k", "[2]")
+        self.assertEqual(await self.cache.get("k", self._loader([3])), [2])
+
+        with mock.patch("backend.core.cache._listening", True):
+            self.assertEqual(await self.cache.get("k", self._loader([3])), [2])
+            self.redis.set("cache:test:k", "[4]")
+            self.assertEqual(await self.cache.get("k", self._loader([3])), [2])
+
+    async def test_local_tier_skips_value_loaded_across_eviction(self):
+        with mock.patch("backend.core.cache._listening", True):
+            loader = self._loader([1], lambda: self.cache.local.delete("k"))
+            await self.cache.get("k", loader)
+            self.assertIs(self.cache.local.get("k"), cache.MISSING)
+
+    async def test_decode_is_applied_to_cached_values(self):
+        decoded = TwoTierCache("test", ttl=60, local_ttl=60, maxsize=10, decode=set)
+        self.assertEqual(await decoded.get("k", self._loader([1, 1])), {1})
+        self.assertEqual(await decoded.get("k", self._loader([2])), {1})
+
+    async def test_redis_unavailable(self):
+        def broken(*args):
+            raise ConnectionError("down")
+
+        broken_client = mock.Mock(
+            mget=mock.AsyncMock(side_effect=ConnectionError("down")),
+            pipeline=broken,
+            publish=broken,
+        )
+        with mock.patch("backend.core.cache.get_async_redis", lambda: broken_client):
+            self.assertEqual(await self.cache.get("k", self._loader([1])), [1])
+            self.assertEqual(await self.cache.get("k", self._loader([2])), [2])
+        with mock.patch("backend.core.cache.get_redis", lambda: broken_client):
+            self.cache.set("k", [3])
+            self.cache.invalidate("k")
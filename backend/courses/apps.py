@@ -5,3 +5,6 @@ class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.courses'
     verbose_name = 'Учебные курсы'
+
+    def ready(self):
+        import backend.courses.signals
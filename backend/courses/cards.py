@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from backend.core.cache import TwoTierCache
+from backend.core.db_pool import db_query
+
+from .models import Task
+
+SOLVED_STATUS_TEXT = "✅ *Решение принято*\n\n"
+
+
+class TaskCard:
+    """
+    Подготовленная карточка задачи для бота: заголовок и описание уже
+    собраны, при показе добавляется только отметка о решении.
+    """
+
+    parse_mode = "Markdown"
+
+    def __init__(self, data: dict):
+        self.id = data["id"]
+        self.number = data["number"]
+        self.title = data["title"]
+        self.image = data["image"]
+        self.header = f"**Задача #{self.number}: {self.title}**\n\n"
+        self.description = data["description"]
+
+    @property
+    def image_path(self) -> str | None:
+        return default_storage.path(self.image) if self.image else None
+
+    def render(self, solved: bool) -> str:
+        status_text = SOLVED_STATUS_TEXT if solved else ""
+        return f"{self.header}{status_text}{self.description}"
+
+
+def _decode_card(data: dict | None) -> TaskCard | None:
+    return TaskCard(data) if data else None
+
+
+@db_query
+def _load_task_card(task_id: int) -> dict | None:
+    return (
+        Task.objects.filter(id=task_id)
+        .values("id", "number", "title", "description", "image")
+        .first()
+    )
+
+
+task_card_cache = TwoTierCache(
+    namespace="task_card",
+    ttl=settings.CATALOG_CACHE_TTL,
+    local_ttl=settings.CATALOG_CACHE_TTL,
+    maxsize=settings.TASK_CARD_CACHE_SIZE,
+    decode=_decode_card,
+)
+
+
+async def get_task_card(task_id: int) -> TaskCard | None:
+    return await task_card_cache.get(str(task_id), lambda: _load_task_card(task_id))
+
+
+def invalidate_task_card(task_id: int):
+    task_card_cache.invalidate(str(task_id))
@@ -0,0 +1,120 @@
+from collections import defaultdict
+
+from django.conf import settings
+
+from backend.core.cache import TwoTierCache
+from backend.core.db_pool import db_query
+
+from .models import Course, DifficultyLevel, Module, Task
+
+CATALOG_KEY = "all"
+
+
+class Catalog:
+    """
+    Снимок всего дерева курсов (курсы → модули → уровни → задачи) для
+    навигации в боте без запросов к БД. Порядок элементов совпадает с
+    сортировкой, которую раньше задавали запросы навигации.
+    """
+
+    def __init__(self, data: dict):
+        self.courses: dict[int, str] = {}
+        self.modules: dict[int, dict] = {}
+        self.levels: dict[int, dict] = {}
+        self.tasks: dict[int, dict] = {}
+        self._course_modules: dict[int, list[int]] = defaultdict(list)
+        self._module_levels: dict[int, list[int]] = defaultdict(list)
+        self._level_tasks: dict[int, list[int]] = defaultdict(list)
+
+        for course_id, title in data["courses"]:
+            self.courses[course_id] = title
+        for module_id, course_id, title in data["modules"]:
+            self.modules[module_id] = {"course_id": course_id, "title": title}
+            self._course_modules[course_id].append(module_id)
+        for level_id, module_id, title in data["levels"]:
+            self.levels[level_id] = {"module_id": module_id, "title": title}
+            self._module_levels[module_id].append(level_id)
+        for task_id, level_id, number, title in data["tasks"]:
+            self.tasks[task_id] = {
+                "id": task_id,
+                "level_id": level_id,
+                "number": number,
+                "title": title,
+            }
+            self._level_tasks[level_id].append(task_id)
+
+    def get_courses(self, course_ids: set[int]) -> list[tuple[int, str]]:
+        return [(pk, title) for pk, title in self.courses.items() if pk in course_ids]
+
+    def get_course_modules(self, course_id: int) -> list[tuple[int, str]]:
+        return [
+            (pk, self.modules[pk]["title"]) for pk in self._course_modules[course_id]
+        ]
+
+    def get_module_levels(self, module_id: int) -> list[tuple[int, str]]:
+        return [
+            (pk, self.levels[pk]["title"]) for pk in self._module_levels[module_id]
+        ]
+
+    def get_level_tasks(self, level_id: int) -> list[dict]:
+        return [self.tasks[pk] for pk in self._level_tasks[level_id]]
+
+    def get_module_course_id(self, module_id: int) -> int | None:
+        module = self.modules.get(module_id)
+        return module["course_id"] if module else None
+
+    def get_level_course_id(self, level_id: int) -> int | None:
+        level = self.levels.get(level_id)
+        return self.get_module_course_id(level["module_id"]) if level else None
+
+    def get_task_course_id(self, task_id: int) -> int | None:
+        task = self.tasks.get(task_id)
+        return self.get_level_course_id(task["level_id"]) if task else None
+
+    def get_task_path(self, task_id: int) -> tuple[int, int, int] | None:
+        """Возвращает (course_id, module_id, level_id) задачи."""
+        task = self.tasks.get(task_id)
+        if not task:
+            return None
+        level_id = task["level_id"]
+        module_id = self.levels[level_id]["module_id"]
+        return self.modules[module_id]["course_id"], module_id, level_id
+
+
+@db_query
+def build_catalog_data() -> dict:
+    return {
+        "courses": list(Course.objects.order_by("title").values_list("id", "title")),
+        "modules": list(
+            Module.objects.order_by("course", "order", "title").values_list(
+                "id", "course_id", "title"
+            )
+        ),
+        "levels": list(
+            DifficultyLevel.objects.order_by("module", "order", "title").values_list(
+                "id", "module_id", "title"
+            )
+        ),
+        "tasks": list(
+            Task.objects.order_by("level", "number").values_list(
+                "id", "level_id", "number", "title"
+            )
+        ),
+    }
+
+
+catalog_cache = TwoTierCache(
+    namespace="catalog",
+    ttl=settings.CATALOG_CACHE_TTL,
+    local_ttl=settings.CATALOG_CACHE_TTL,
+    maxsize=1,
+    decode=Catalog,
+)
+
+
+async def get_catalog() -> Catalog:
+    return await catalog_cache.get(CATALOG_KEY, build_catalog_data)
+
+
+def invalidate_catalog():
+    catalog_cache.invalidate(CATALOG_KEY)
@@ -0,0 +1,80 @@
+import logging
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from backend.core.db_pool import db_query
+from backend.core.redis_client import get_async_redis, get_redis
+
+from .models import UserTaskStatus
+
+logger = logging.getLogger(__name__)
+
+# Решенные задачи пользователя хранятся битовой картой в redis: бит с номером
+# task_id установлен, если задача решена. Бит 0 (id задач начинаются с 1) —
+# признак того, что карта собрана из UserTaskStatus полностью. Отдельные биты
+# могут появиться и раньше (при решении задачи), тогда карта достраивается
+# из БД при первом чтении.
+BUILT_BIT = 0
+
+
+def _key(user_id: int) -> str:
+    return f"progress:solved:{user_id}"
+
+
+@db_query
+def _load_solved_task_ids(user_id: int) -> set[int]:
+    return set(
+        UserTaskStatus.objects.filter(
+            user_id=user_id, status=UserTaskStatus.Status.SOLVED
+        ).values_list("task_id", flat=True)
+    )
+
+
+async def _rebuild(client, user_id: int) -> set[int]:
+    task_ids = await _load_solved_task_ids(user_id)
+    pipe = client.pipeline(transaction=True)
+    pipe.setbit(_key(user_id), BUILT_BIT, 1)
+    for task_id in task_ids:
+        pipe.setbit(_key(user_id), task_id, 1)
+    pipe.expire(_key(user_id), settings.SOLVED_TASKS_TTL)
+    await pipe.execute()
+    return task_ids
+
+
+async def get_solved_task_ids(user_id: int, task_ids: list[int]) -> set[int]:
+    client = get_async_redis()
+    try:
+        pipe = client.pipeline(transaction=False)
+        pipe.getbit(_key(user_id), BUILT_BIT)
+        for task_id in task_ids:
+            pipe.getbit(_key(user_id), task_id)
+        built, *bits = await pipe.execute()
+        if not built:
+            return await _rebuild(client, user_id) & set(task_ids)
+    except RedisError as e:
+        logger.warning(f"Solved tasks set for user {user_id} is unavailable: {e}")
+        return await _load_solved_task_ids(user_id) & set(task_ids)
+    return {task_id for task_id, bit in zip(task_ids, bits) if bit}
+
+
+async def is_task_solved(user_id: int, task_id: int) -> bool:
+    return task_id in await get_solved_task_ids(user_id, [task_id])
+
+
+def mark_task_solved(user_id: int, task_id: int):
+    try:
+        pipe = get_redis().pipeline(transaction=True)
+        pipe.setbit(_key(user_id), task_id, 1)
+        pipe.expire(_key(user_id), settings.SOLVED_TASKS_TTL)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Failed to mark task {task_id} solved for user {user_id}: {e}")
+        drop_solved_tasks(user_id)
+
+
+def drop_solved_tasks(user_id: int):
+    try:
+        get_redis().delete(_key(user_id))
+    except RedisError as e:
+        logger.warning(f"Failed to drop solved tasks set for user {user_id}: {e}")
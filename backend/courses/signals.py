@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cards import invalidate_task_card
+from .catalog import invalidate_catalog
+from .models import Course, DifficultyLevel, Module, Task, UserTaskStatus
+from .progress import drop_solved_tasks, mark_task_solved
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=DifficultyLevel)
+@receiver(post_delete, sender=DifficultyLevel)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def on_catalog_change(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_catalog)
+    if sender is Task:
+        task_id = instance.id
+        transaction.on_commit(lambda: invalidate_task_card(task_id))
+
+
+@receiver(post_save, sender=UserTaskStatus)
+def on_task_status_save(sender, instance, **kwargs):
+    user_id, task_id = instance.user_id, instance.task_id
+    if instance.status == UserTaskStatus.Status.SOLVED:
+        transaction.on_commit(lambda: mark_task_solved(user_id, task_id))
+    else:
+        transaction.on_commit(lambda: drop_solved_tasks(user_id))
+
+
+@receiver(post_delete, sender=UserTaskStatus)
+def on_task_status_delete(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: drop_solved_tasks(user_id))
@@ -1,35 +1,67 @@
+from django import forms
 from django.contrib import admin, messages
-from django.db import transaction
+from django.contrib.admin.views.main import ChangeList
 from django.http import HttpResponseRedirect
 from django.urls import path, reverse
-from django.utils.html import format_html
+from django.utils.html import format_html, format_html_join
 
-from backend.core.celery import app as celery_app
-
-from .models import Broadcast
+from .ledger import get_delivery_stats
+from .models import Broadcast, BroadcastDelivery
+from .segments import get_segment_preview
 from .tasks import send_broadcast_task
 
 
-def schedule_broadcast_task(broadcast: Broadcast):
-    task = send_broadcast_task.apply_async(
-        args=[broadcast.id], eta=broadcast.scheduled_at
-    )
-    Broadcast.objects.filter(pk=broadcast.pk).update(task_id=task.id)
+class BroadcastAdminForm(forms.ModelForm):
+    class Meta:
+        model = Broadcast
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Форма проверяется внутри транзакции changeform_view, поэтому строка
+        # остается заблокированной до конца сохранения (включая связи
+        # segment_courses): диспетчер не заберет рассылку, пока она
+        # редактируется, а уже забранную нельзя изменить.
+        if self.instance.pk and not (
+            Broadcast.objects.select_for_update()
+            .filter(
+                pk=self.instance.pk,
+                status__in=[Broadcast.Status.DRAFT, Broadcast.Status.SCHEDULED],
+            )
+            .exists()
+        ):
+            raise forms.ValidationError(
+                "Рассылка уже отправляется, изменения не сохранены."
+            )
+        return cleaned_data
+
+
+class BroadcastChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        # Статистика доставок только для рассылок на текущей странице.
+        stats = get_delivery_stats([broadcast.pk for broadcast in self.result_list])
+        for broadcast in self.result_list:
+            broadcast.delivery_counts = stats[broadcast.pk]
 
 
 @admin.register(Broadcast)
 class BroadcastAdmin(admin.ModelAdmin):
+    form = BroadcastAdminForm
     list_display = (
         "id",
         "short_text",
         "scheduled_at",
         "status_colored",
+        "delivery_stats",
         "media_type",
         "actions_column",
     )
-    list_filter = ("status", "media_type", "scheduled_at")
+    list_filter = ("status", "repeat", "media_type", "scheduled_at")
     search_fields = ("text",)
     ordering = ("-scheduled_at",)
+    actions = ("resume_broadcasts", "retry_failed_deliveries")
+    filter_horizontal = ("segment_courses",)
 
     readonly_fields = ("status", "task_id")
 
@@ -41,46 +73,103 @@ class BroadcastAdmin(admin.ModelAdmin):
                 "description": "Заполните текст и, при необходимости, прикрепите медиафайл.",
             },
         ),
+        (
+            "Аудитория",
+            {
+                "fields": (
+                    "segment_courses",
+                    ("active_within_days", "inactive_for_days"),
+                    ("min_solved_tasks", "max_solved_tasks"),
+                    ("min_checks", "max_checks"),
+                    "audience_preview",
+                ),
+                "description": "Пустые условия не ограничивают аудиторию. Рассылка уходит только пользователям из белого списка. "
+                "Чтобы проверить аудиторию до отправки, сохраните рассылку как черновик.",
+            },
+        ),
         (
             "Планирование и Статус",
             {
-                "fields": ("scheduled_at", "status"),
+                "fields": ("scheduled_at", "repeat", "status", "delivery_stats"),
                 "classes": ("collapse",),
             },
         ),
     )
 
-    readonly_fields = ("status",)
+    readonly_fields = ("status", "delivery_stats", "audience_preview")
 
     def get_readonly_fields(self, request, obj=None):
-        if obj and obj.status != Broadcast.Status.SCHEDULED:
-            return [f.name for f in self.model._meta.fields]
+        if obj and obj.status not in (
+            Broadcast.Status.DRAFT,
+            Broadcast.Status.SCHEDULED,
+        ):
+            return [f.name for f in self.model._meta.fields] + [
+                "segment_courses",
+                "delivery_stats",
+                "audience_preview",
+            ]
         return self.readonly_fields
 
+    def get_changelist(self, request, **kwargs):
+        return BroadcastChangeList
+
     def save_model(self, request, obj: Broadcast, form, change):
-        if obj.media_file and not obj.media_type:
-            messages.error(
-                request, "Если вы загрузили файл, необходимо указать его тип."
-            )
+        if "_save_draft" in request.POST:
+            obj.status = Broadcast.Status.DRAFT
+            super().save_model(request, obj, form, change)
             return
 
-        if change and obj.task_id:
-            celery_app.control.revoke(obj.task_id, terminate=True)
-            messages.info(
-                request, f"Старая запланированная задача {obj.task_id} отменена."
-            )
-
+        # Отправку запускает dispatch_due_broadcasts, когда наступит scheduled_at.
         obj.status = Broadcast.Status.SCHEDULED
         super().save_model(request, obj, form, change)
 
-        transaction.on_commit(lambda: schedule_broadcast_task(obj))
-
         self.message_user(
             request,
             f"Рассылка запланирована на {obj.scheduled_at.strftime('%d.%m.%Y %H:%M')}",
             messages.SUCCESS,
         )
 
+    def _response_draft(self, request, obj: Broadcast):
+        count, _ = get_segment_preview(obj)
+        self.message_user(
+            request,
+            f"Черновик сохранен, получателей: {count}. Нажмите «Сохранить», чтобы запланировать рассылку.",
+            messages.INFO,
+        )
+        return HttpResponseRedirect(
+            reverse("admin:sender_broadcast_change", args=[obj.pk])
+        )
+
+    def response_add(self, request, obj, post_url_continue=None):
+        if "_save_draft" in request.POST:
+            return self._response_draft(request, obj)
+        return super().response_add(request, obj, post_url_continue)
+
+    def response_change(self, request, obj):
+        if "_save_draft" in request.POST:
+            return self._response_draft(request, obj)
+        return super().response_change(request, obj)
+
+    @admin.display(description="Предпросмотр аудитории")
+    def audience_preview(self, obj: Broadcast):
+        if obj.pk is None:
+            return "Сохраните черновик, чтобы увидеть аудиторию."
+        count, sample = get_segment_preview(obj)
+        if not count:
+            return "Нет получателей."
+        return format_html(
+            "<b>Получателей: {}</b><br>{}",
+            count,
+            format_html_join(
+                ", ",
+                "{} ({})",
+                (
+                    (user["telegram_id"], user["username"] or "—")
+                    for user in sample
+                ),
+            ),
+        )
+
     @admin.display(description="Текст", ordering="text")
     def short_text(self, obj: Broadcast):
         return obj.text[:50] + "..." if len(obj.text) > 50 else obj.text
@@ -88,7 +177,9 @@ class BroadcastAdmin(admin.ModelAdmin):
     @admin.display(description="Статус", ordering="status")
     def status_colored(self, obj: Broadcast):
         colors = {
+            Broadcast.Status.DRAFT: "slategray",
             Broadcast.Status.SCHEDULED: "teal",
+            Broadcast.Status.SENDING: "orange",
             Broadcast.Status.SENT: "green",
             Broadcast.Status.ERROR: "red",
             Broadcast.Status.CANCELED: "gray",
@@ -99,9 +190,47 @@ class BroadcastAdmin(admin.ModelAdmin):
             obj.get_status_display(),
         )
 
+    @admin.display(description="Доставка")
+    def delivery_stats(self, obj: Broadcast):
+        if obj.pk is None:
+            return "—"
+        counts = getattr(obj, "delivery_counts", None)
+        if counts is None:
+            counts = get_delivery_stats([obj.pk])[obj.pk]
+        statuses = BroadcastDelivery.Status
+        return format_html(
+            "✅ {} · 🚫 {} · ❌ {} · ⏳ {}",
+            counts[statuses.SENT],
+            counts[statuses.BLOCKED],
+            counts[statuses.FAILED],
+            counts[statuses.PENDING],
+        )
+
+    @admin.action(description="Продолжить отправку прерванных рассылок")
+    def resume_broadcasts(self, request, queryset):
+        resumed = 0
+        for broadcast in queryset.filter(
+            status__in=[Broadcast.Status.SENDING, Broadcast.Status.ERROR]
+        ):
+            send_broadcast_task.delay(broadcast.id)
+            resumed += 1
+        self.message_user(
+            request, f"Продолжение отправки запущено для {resumed} рассылок."
+        )
+
+    @admin.action(description="Повторить отправку неудавшимся получателям")
+    def retry_failed_deliveries(self, request, queryset):
+        retried = 0
+        for broadcast in queryset.filter(status=Broadcast.Status.ERROR):
+            send_broadcast_task.delay(broadcast.id, retry_failed=True)
+            retried += 1
+        self.message_user(
+            request, f"Повторная отправка запущена для {retried} рассылок."
+        )
+
     @admin.display(description="Действия")
     def actions_column(self, obj):
-        if obj.status == Broadcast.Status.SCHEDULED:
+        if obj.status in (Broadcast.Status.DRAFT, Broadcast.Status.SCHEDULED):
             cancel_url = reverse("admin:sender_broadcast_cancel", args=[obj.pk])
             return format_html('<a class="button" href="{}">Отменить</a>', cancel_url)
         return "—"
@@ -118,15 +247,34 @@ class BroadcastAdmin(admin.ModelAdmin):
         return custom_urls + urls
 
     def process_cancel(self, request, object_id, *args, **kwargs):
-        obj = self.get_object(request, object_id)
-        if obj and obj.task_id and obj.status == Broadcast.Status.SCHEDULED:
-            celery_app.control.revoke(obj.task_id, terminate=True)
-            obj.status = Broadcast.Status.CANCELED
-            obj.save()
-            self.message_user(request, f"Рассылка {obj.id} отменена.", messages.WARNING)
+        # Условное обновление: рассылку, которую диспетчер уже забрал
+        # на отправку, отменить нельзя.
+        canceled = Broadcast.objects.filter(
+            pk=object_id,
+            status__in=[Broadcast.Status.DRAFT, Broadcast.Status.SCHEDULED],
+        ).update(status=Broadcast.Status.CANCELED)
+        if canceled:
+            self.message_user(
+                request, f"Рассылка {object_id} отменена.", messages.WARNING
+            )
         else:
             self.message_user(
                 request, "Невозможно отменить эту рассылку.", messages.ERROR
             )
 
         return HttpResponseRedirect(reverse("admin:sender_broadcast_changelist"))
+
+
+@admin.register(BroadcastDelivery)
+class BroadcastDeliveryAdmin(admin.ModelAdmin):
+    list_display = ("broadcast", "chat_id", "status", "attempts", "updated_at")
+    list_filter = ("status",)
+    search_fields = ("chat_id",)
+    list_select_related = ("broadcast",)
+    readonly_fields = [f.name for f in BroadcastDelivery._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterable, Awaitable, Callable, NamedTuple
+
+from aiogram.exceptions import (
+    RestartingTelegram,
+    TelegramAPIError,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY_SECONDS = 2
+TRANSIENT_ERRORS = (
+    TelegramNetworkError,
+    TelegramServerError,
+    RestartingTelegram,
+    asyncio.TimeoutError,
+)
+
+SENT = "sent"
+BLOCKED = "blocked"
+FAILED = "failed"
+
+
+class Recipient(NamedTuple):
+    chat_id: int
+    delivery_id: int | None = None
+    attempts: int = 0
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты отправки для одного процесса. pause() останавливает
+    выдачу токенов всем отправителям — так обрабатывается RetryAfter от Telegram.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if self.paused_until > now:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class BroadcastEngine:
+    """
+    Отправка рассылки получателям из асинхронного источника:
+    - не больше `concurrency` одновременных запросов и не чаще, чем позволяет
+      limiter;
+    - RetryAfter приостанавливает всю рассылку на указанное Telegram время,
+      сообщение отправляется повторно без учета попытки;
+    - временные ошибки (сеть, 5xx) повторяются с растущей задержкой до
+      `max_retries` раз, остальные ошибки считаются окончательными.
+    Источник читается по мере отправки: в очереди не больше `queue_size`
+    получателей.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int], Awaitable[Any]],
+        limiter,
+        concurrency: int,
+        max_retries: int,
+        queue_size: int = 1000,
+        on_result: Callable[[Recipient, str, int, Any, str], None] | None = None,
+    ):
+        self.send = send
+        self.on_result = on_result
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.queue: asyncio.Queue[tuple[Recipient, int]] = asyncio.Queue()
+        self.slots = asyncio.Semaphore(queue_size)
+        self.stats = {SENT: 0, BLOCKED: 0, FAILED: 0, "retried": 0, "rate_limited": 0}
+        self._retry_tasks: set[asyncio.Task] = set()
+
+    def _finish(
+        self,
+        recipient: Recipient,
+        status: str,
+        attempts: int,
+        result: Any = None,
+        error: str = "",
+    ):
+        self.stats[status] += 1
+        self.slots.release()
+        if status == FAILED:
+            logger.error(
+                f"Не удалось отправить сообщение пользователю {recipient.chat_id}: {error}"
+            )
+        if self.on_result:
+            self.on_result(recipient, status, attempts, result, error)
+
+    async def _requeue_later(self, item: tuple[Recipient, int], delay: float):
+        await asyncio.sleep(delay)
+        await self.queue.put(item)
+        self.queue.task_done()
+
+    async def _process(self, recipient: Recipient, attempt: int) -> bool:
+        """Возвращает True, если повторная отправка запланирована с задержкой."""
+        await self.limiter.acquire()
+        try:
+            result = await self.send(recipient.chat_id)
+        except TelegramRetryAfter as e:
+            self.stats["rate_limited"] += 1
+            logger.warning(f"Telegram flood limit, pause for {e.retry_after} s")
+            await self.limiter.pause(e.retry_after)
+            await self.queue.put((recipient, attempt))
+        except TelegramForbiddenError as e:
+            logger.warning(
+                f"Не удалось отправить сообщение пользователю {recipient.chat_id} (т.к. заблочил/удалил бота): {e}"
+            )
+            self._finish(recipient, BLOCKED, attempt + 1, error=str(e))
+        except TRANSIENT_ERRORS as e:
+            if attempt >= self.max_retries:
+                self._finish(recipient, FAILED, attempt + 1, error=str(e))
+                return False
+            self.stats["retried"] += 1
+            delay = RETRY_BASE_DELAY_SECONDS * 2**attempt
+            retry_task = asyncio.create_task(
+                self._requeue_later((recipient, attempt + 1), delay)
+            )
+            self._retry_tasks.add(retry_task)
+            retry_task.add_done_callback(self._retry_tasks.discard)
+            return True
+        except TelegramAPIError as e:
+            self._finish(recipient, FAILED, attempt + 1, error=str(e))
+        else:
+            self._finish(recipient, SENT, attempt + 1, result=result)
+        return False
+
+    async def _worker(self):
+        while True:
+            recipient, attempt = await self.queue.get()
+            requeued_later = False
+            try:
+                requeued_later = await self._process(recipient, attempt)
+            except Exception as e:
+                logger.exception(
+                    f"Unexpected error while sending to {recipient.chat_id}: {e}"
+                )
+                self._finish(recipient, FAILED, attempt + 1, error=str(e))
+            finally:
+                if not requeued_later:
+                    self.queue.task_done()
+
+    async def run(self, recipients: AsyncIterable[Recipient]) -> dict:
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        try:
+            async for recipient in recipients:
+                await self.slots.acquire()
+                await self.queue.put((recipient, 0))
+            await self.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+        return self.stats
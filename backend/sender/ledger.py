@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator
+
+from django.db.models import Count, F, QuerySet
+from django.utils import timezone
+
+from .engine import BLOCKED, FAILED, SENT, Recipient
+from .models import BroadcastDelivery
+from .recipients import RECIPIENTS_CHUNK_SIZE, iter_recipient_ids
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 200
+FLUSH_INTERVAL_SECONDS = 1
+
+DELIVERY_STATUSES = {
+    SENT: BroadcastDelivery.Status.SENT,
+    BLOCKED: BroadcastDelivery.Status.BLOCKED,
+    FAILED: BroadcastDelivery.Status.FAILED,
+}
+
+
+async def create_deliveries(broadcast_id: int, recipients: QuerySet) -> int:
+    """
+    Заполняет журнал доставки получателями рассылки. Повторный вызов
+    добавляет только новых получателей, уже записанные не меняются.
+    """
+    created = 0
+    batch: list[BroadcastDelivery] = []
+    async for chat_id in iter_recipient_ids(recipients):
+        batch.append(BroadcastDelivery(broadcast_id=broadcast_id, chat_id=chat_id))
+        if len(batch) >= RECIPIENTS_CHUNK_SIZE:
+            await BroadcastDelivery.objects.abulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+            batch = []
+    if batch:
+        await BroadcastDelivery.objects.abulk_create(batch, ignore_conflicts=True)
+        created += len(batch)
+    return created
+
+
+async def iter_deliveries(
+    broadcast_id: int,
+    statuses: list[str],
+    shard: int = 0,
+    shards: int = 1,
+    chunk_size: int = RECIPIENTS_CHUNK_SIZE,
+) -> AsyncIterator[Recipient]:
+    """Получатели шарда `shard` из `shards`: chat_id % shards == shard."""
+    queryset = BroadcastDelivery.objects.filter(
+        broadcast_id=broadcast_id, status__in=statuses
+    )
+    if shards > 1:
+        queryset = queryset.alias(shard=F("chat_id") % shards).filter(shard=shard)
+    queryset = queryset.order_by("id").values_list("id", "chat_id", "attempts")
+    last_id = 0
+    while True:
+        chunk = [row async for row in queryset.filter(id__gt=last_id)[:chunk_size]]
+        for delivery_id, chat_id, attempts in chunk:
+            yield Recipient(chat_id=chat_id, delivery_id=delivery_id, attempts=attempts)
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1][0]
+
+
+class DeliveryRecorder:
+    """
+    Копит результаты отправки и раз в FLUSH_INTERVAL_SECONDS записывает их
+    в журнал пачками через bulk_update.
+    """
+
+    def __init__(self):
+        self.pending: list[BroadcastDelivery] = []
+        self._flush_task: asyncio.Task | None = None
+
+    def record(
+        self, recipient: Recipient, status: str, attempts: int, result: Any, error: str
+    ):
+        self.pending.append(
+            BroadcastDelivery(
+                id=recipient.delivery_id,
+                status=DELIVERY_STATUSES[status],
+                message_id=getattr(result, "message_id", None),
+                attempts=recipient.attempts + attempts,
+                error=error[:1000],
+                updated_at=timezone.now(),
+            )
+        )
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        await BroadcastDelivery.objects.abulk_update(
+            batch,
+            ["status", "message_id", "attempts", "error", "updated_at"],
+            batch_size=FLUSH_BATCH_SIZE,
+        )
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            if self.pending:
+                try:
+                    await self.flush()
+                except Exception as e:
+                    logger.exception(f"Failed to save broadcast deliveries: {e}")
+
+    async def __aenter__(self):
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._flush_task.cancel()
+        await self.flush()
+
+
+def get_delivery_stats(broadcast_ids: list[int]) -> dict[int, dict[str, int]]:
+    """Счетчики доставок по статусам одним сгруппированным запросом."""
+    stats = {
+        broadcast_id: {status: 0 for status in BroadcastDelivery.Status.values}
+        for broadcast_id in broadcast_ids
+    }
+    rows = (
+        BroadcastDelivery.objects.filter(broadcast_id__in=broadcast_ids)
+        .values("broadcast_id", "status")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        stats[row["broadcast_id"]][row["status"]] = row["count"]
+    return stats
+
+
+async def aget_delivery_stats(broadcast_id: int) -> dict[str, int]:
+    rows = (
+        BroadcastDelivery.objects.filter(broadcast_id=broadcast_id)
+        .values("status")
+        .annotate(count=Count("id"))
+    )
+    stats = {status: 0 for status in BroadcastDelivery.Status.values}
+    async for row in rows:
+        stats[row["status"]] = row["count"]
+    return stats
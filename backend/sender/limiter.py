@@ -0,0 +1,80 @@
+import asyncio
+
+from backend.core.redis_client import get_async_redis
+
+KEY_PREFIX = "broadcast_limiter"
+MIN_POLL_SECONDS = 0.01
+
+# Атомарная попытка взять токен из общего ведра. Пока действует пауза после
+# RetryAfter, токены не выдаются. Возвращает 0, если токен получен, иначе
+# сколько миллисекунд подождать перед следующей попыткой.
+ACQUIRE_SCRIPT = """
+local bucket_key, cooldown_key = KEYS[1], KEYS[2]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+
+local cooldown = redis.call('PTTL', cooldown_key)
+if cooldown > 0 then
+    return cooldown
+end
+
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+
+local bucket = redis.call('HMGET', bucket_key, 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate / 1000)
+
+local wait_ms = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait_ms = math.ceil((1 - tokens) * 1000 / rate)
+end
+
+redis.call('HSET', bucket_key, 'tokens', tostring(tokens), 'updated_at', now)
+redis.call('PEXPIRE', bucket_key, math.ceil(capacity * 1000 / rate) + 1000)
+return wait_ms
+"""
+
+# Пауза продлевается, но не сокращается; накопленные токены сгорают, чтобы
+# после паузы воркеры не отправили пачку сообщений разом.
+PAUSE_SCRIPT = """
+local bucket_key, cooldown_key = KEYS[1], KEYS[2]
+local pause_ms = tonumber(ARGV[1])
+if redis.call('PTTL', cooldown_key) < pause_ms then
+    redis.call('SET', cooldown_key, 1, 'PX', pause_ms)
+end
+redis.call('HSET', bucket_key, 'tokens', 0)
+return 0
+"""
+
+
+class RedisTokenBucket:
+    """
+    Ограничитель частоты отправки, общий для всех celery-воркеров: шарды
+    рассылки берут токены из одного ведра в redis, поэтому суммарная скорость
+    не превышает `rate` независимо от числа шардов. Интерфейс совпадает
+    с TokenBucket.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+
+    @staticmethod
+    def _keys() -> list[str]:
+        return [f"{KEY_PREFIX}:bucket", f"{KEY_PREFIX}:cooldown"]
+
+    async def acquire(self):
+        acquire = get_async_redis().register_script(ACQUIRE_SCRIPT)
+        while True:
+            wait_ms = await acquire(keys=self._keys(), args=[self.rate, self.capacity])
+            if not wait_ms:
+                return
+            await asyncio.sleep(max(wait_ms / 1000, MIN_POLL_SECONDS))
+
+    async def pause(self, seconds: float):
+        pause = get_async_redis().register_script(PAUSE_SCRIPT)
+        await pause(keys=self._keys(), args=[max(int(seconds * 1000), 1)])
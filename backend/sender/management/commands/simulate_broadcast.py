@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.core.redis_client import run_async
+from backend.sender.engine import BLOCKED, FAILED, SENT
+from backend.sender.models import Broadcast
+from backend.sender.simulation import simulate_broadcast
+from bot.fake_telegram import FakeTelegramConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Dry-runs a broadcast against a local fake Telegram server and projects "
+        "how long the full send takes. Nothing is sent to users and the "
+        "broadcast itself is not changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("broadcast_id", type=int)
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=500,
+            help="How many recipients to send to; the result is extrapolated.",
+        )
+        parser.add_argument("--latency-ms", type=float, default=50)
+        parser.add_argument("--latency-jitter-ms", type=float, default=20)
+        parser.add_argument(
+            "--flood-limit",
+            type=int,
+            default=30,
+            help="Messages per second the fake accepts before answering 429 (0 - no limit).",
+        )
+        parser.add_argument("--retry-after", type=int, default=5)
+        parser.add_argument(
+            "--error-rate", type=float, default=0.0, help="Share of HTTP 500 answers."
+        )
+
+    def handle(self, *args, **options):
+        if options["sample"] <= 0:
+            raise CommandError("--sample must be positive.")
+        try:
+            broadcast = Broadcast.objects.get(id=options["broadcast_id"])
+        except Broadcast.DoesNotExist:
+            raise CommandError(f"Broadcast {options['broadcast_id']} not found.")
+
+        config = FakeTelegramConfig(
+            latency_ms=options["latency_ms"],
+            latency_jitter_ms=options["latency_jitter_ms"],
+            flood_limit=options["flood_limit"],
+            retry_after_seconds=options["retry_after"],
+            error_rate=options["error_rate"],
+        )
+        self.stdout.write(
+            f"Dry run of broadcast {broadcast.id} on up to {options['sample']} recipients..."
+        )
+        report = run_async(simulate_broadcast(broadcast, config, options["sample"]))
+
+        if not report.sample:
+            self.stdout.write(self.style.WARNING("The broadcast audience is empty."))
+            return
+
+        stats = report.engine_stats
+        projected = timedelta(seconds=round(report.projected_seconds))
+        finish_at = timezone.localtime(report.finish_at)
+        self.stdout.write(
+            f"Sample: {report.sample} of {report.audience} recipients in "
+            f"{report.elapsed:.1f} s ({report.throughput:.1f} msg/s, "
+            f"limit {report.rate:g} msg/s)\n"
+            f"sent {stats[SENT]}, blocked {stats[BLOCKED]}, failed {stats[FAILED]}, "
+            f"retried {stats['retried']}, 429 answers {stats['rate_limited']}, "
+            f"media uploads {report.stub_stats['uploads']}"
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Projected duration for {report.audience} recipients: {projected}, "
+                f"finish at about {finish_at:%d.%m.%Y %H:%M}\n"
+                f"Expected blocked (from previous broadcasts): {report.expected_blocked}, "
+                f"expected failed: {round(report.failure_share * report.audience)}"
+            )
+        )
+        if stats["rate_limited"]:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Flood control was hit: lower BROADCAST_RATE_PER_SECOND below "
+                    f"the limit of {options['flood_limit']} msg/s."
+                )
+            )
+        for other in report.overlapping:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"Overlaps with broadcast {other.id} "
+                    f"({other.get_status_display()}, "
+                    f"{timezone.localtime(other.scheduled_at):%d.%m.%Y %H:%M}); "
+                    "they share the same rate limit."
+                )
+            )
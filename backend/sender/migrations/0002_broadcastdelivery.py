@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sender', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='broadcast',
+            name='status',
+            field=models.CharField(choices=[('SCHEDULED', 'Запланировано'), ('SENDING', 'Отправляется'), ('SENT', 'Отправлено'), ('ERROR', 'Ошибка'), ('CANCELED', 'Отменена')], default='SCHEDULED', max_length=10, verbose_name='Статус'),
+        ),
+        migrations.CreateModel(
+            name='BroadcastDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chat_id', models.BigIntegerField(verbose_name='Телеграм ID получателя')),
+                ('status', models.CharField(choices=[('PENDING', 'Ожидает отправки'), ('SENT', 'Доставлено'), ('BLOCKED', 'Бот заблокирован'), ('FAILED', 'Ошибка')], default='PENDING', max_length=10, verbose_name='Статус')),
+                ('message_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID сообщения в Telegram')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток отправки')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('updated_at', models.DateTimeField(blank=True, null=True, verbose_name='Обновлено')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='sender.broadcast', verbose_name='Рассылка')),
+            ],
+            options={
+                'verbose_name': 'Доставка рассылки',
+                'verbose_name_plural': 'Доставки рассылок',
+                'indexes': [models.Index(fields=['broadcast', 'status'], name='sender_broa_broadca_e160ac_idx')],
+                'unique_together': {('broadcast', 'chat_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_initial'),
+        ('sender', '0002_broadcastdelivery'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='active_within_days',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Активны за последние N дней'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='inactive_for_days',
+            field=models.PositiveIntegerField(blank=True, help_text='Включая пользователей, которые ни разу не были активны.', null=True, verbose_name='Неактивны не менее N дней'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='max_checks',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Проверок кода не больше'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='max_solved_tasks',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Решено задач не больше'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='min_checks',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Проверок кода не меньше'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='min_solved_tasks',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Решено задач не меньше'),
+        ),
+        migrations.AddField(
+            model_name='broadcast',
+            name='segment_courses',
+            field=models.ManyToManyField(blank=True, help_text='Только пользователи с доступом хотя бы к одному из выбранных курсов.', related_name='broadcasts', to='courses.course', verbose_name='Курсы'),
+        ),
+        migrations.AlterField(
+            model_name='broadcast',
+            name='status',
+            field=models.CharField(choices=[('DRAFT', 'Черновик'), ('SCHEDULED', 'Запланировано'), ('SENDING', 'Отправляется'), ('SENT', 'Отправлено'), ('ERROR', 'Ошибка'), ('CANCELED', 'Отменена')], default='SCHEDULED', max_length=10, verbose_name='Статус'),
+        ),
+    ]
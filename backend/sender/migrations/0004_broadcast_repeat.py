@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_initial'),
+        ('sender', '0003_broadcast_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='repeat',
+            field=models.CharField(blank=True, choices=[('DAILY', 'Каждый день'), ('WEEKLY', 'Каждую неделю')], default='', help_text='После отправки рассылка будет запланирована снова через выбранный интервал.', max_length=10, verbose_name='Повторять'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['status', 'scheduled_at'], name='sender_broa_status_4fecb9_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sender', '0004_broadcast_repeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Передана на отправку'),
+        ),
+    ]
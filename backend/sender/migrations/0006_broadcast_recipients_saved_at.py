@@ -0,0 +1,30 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:14
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_saved_recipients(apps, schema_editor):
+    # У рассылок, уже начавших отправку, журнал заполнен: при продолжении
+    # его не нужно пополнять новыми участниками сегмента.
+    Broadcast = apps.get_model("sender", "Broadcast")
+    BroadcastDelivery = apps.get_model("sender", "BroadcastDelivery")
+    Broadcast.objects.filter(
+        id__in=BroadcastDelivery.objects.values("broadcast_id")
+    ).update(recipients_saved_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sender', '0005_broadcast_dispatched_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broadcast',
+            name='recipients_saved_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Получатели записаны в журнал'),
+        ),
+        migrations.RunPython(mark_saved_recipients, migrations.RunPython.noop),
+    ]
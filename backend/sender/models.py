@@ -1,14 +1,21 @@
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
 
 class Broadcast(models.Model):
     class Status(models.TextChoices):
+        DRAFT = "DRAFT", "Черновик"
         SCHEDULED = "SCHEDULED", "Запланировано"
+        SENDING = "SENDING", "Отправляется"
         SENT = "SENT", "Отправлено"
         ERROR = "ERROR", "Ошибка"
         CANCELED = "CANCELED", "Отменена"
 
+    class Repeat(models.TextChoices):
+        DAILY = "DAILY", "Каждый день"
+        WEEKLY = "WEEKLY", "Каждую неделю"
+
     class MediaType(models.TextChoices):
         PHOTO = "PHOTO", "Фото"
         VIDEO = "VIDEO", "Видео"
@@ -45,6 +52,14 @@ class Broadcast(models.Model):
         default=Status.SCHEDULED,
         verbose_name="Статус",
     )
+    repeat = models.CharField(
+        max_length=10,
+        choices=Repeat.choices,
+        blank=True,
+        default="",
+        verbose_name="Повторять",
+        help_text="После отправки рассылка будет запланирована снова через выбранный интервал.",
+    )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     task_id = models.CharField(
         max_length=255,
@@ -53,6 +68,76 @@ class Broadcast(models.Model):
         verbose_name="ID задачи Celery",
         editable=False,
     )
+    dispatched_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Передана на отправку",
+        editable=False,
+    )
+    recipients_saved_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Получатели записаны в журнал",
+        editable=False,
+    )
+
+    segment_courses = models.ManyToManyField(
+        "courses.Course",
+        blank=True,
+        related_name="broadcasts",
+        verbose_name="Курсы",
+        help_text="Только пользователи с доступом хотя бы к одному из выбранных курсов.",
+    )
+    active_within_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Активны за последние N дней",
+    )
+    inactive_for_days = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Неактивны не менее N дней",
+        help_text="Включая пользователей, которые ни разу не были активны.",
+    )
+    min_solved_tasks = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Решено задач не меньше"
+    )
+    max_solved_tasks = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Решено задач не больше"
+    )
+    min_checks = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Проверок кода не меньше"
+    )
+    max_checks = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name="Проверок кода не больше"
+    )
+
+    def clean(self):
+        """
+        Отклоняет файл без типа и противоречивые условия сегмента: с ними
+        аудитория всегда пуста.
+        """
+        errors = {}
+        for low, high in (
+            ("min_solved_tasks", "max_solved_tasks"),
+            ("min_checks", "max_checks"),
+        ):
+            low_value, high_value = getattr(self, low), getattr(self, high)
+            if None not in (low_value, high_value) and low_value > high_value:
+                errors[high] = "Максимум не может быть меньше минимума."
+        if (
+            self.active_within_days is not None
+            and self.inactive_for_days is not None
+            and self.inactive_for_days >= self.active_within_days
+        ):
+            errors["inactive_for_days"] = (
+                "Вместе с «Активны за последние N дней» срок неактивности "
+                "должен быть меньше, иначе аудитория будет пустой."
+            )
+        if self.media_file and not self.media_type:
+            errors["media_type"] = "Если вы загрузили файл, необходимо указать его тип."
+        if errors:
+            raise ValidationError(errors)
 
     def __str__(self):
         return f"Рассылка от {self.scheduled_at.strftime('%Y-%m-%d %H:%M')} ({self.get_status_display()})"
@@ -61,3 +146,41 @@ class Broadcast(models.Model):
         verbose_name = "Рассылка"
         verbose_name_plural = "Рассылки"
         ordering = ["-scheduled_at"]
+        indexes = [models.Index(fields=["status", "scheduled_at"])]
+
+
+class BroadcastDelivery(models.Model):
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Ожидает отправки"
+        SENT = "SENT", "Доставлено"
+        BLOCKED = "BLOCKED", "Бот заблокирован"
+        FAILED = "FAILED", "Ошибка"
+
+    broadcast = models.ForeignKey(
+        Broadcast,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        verbose_name="Рассылка",
+    )
+    chat_id = models.BigIntegerField(verbose_name="Телеграм ID получателя")
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name="Статус",
+    )
+    message_id = models.BigIntegerField(
+        null=True, blank=True, verbose_name="ID сообщения в Telegram"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток отправки")
+    error = models.TextField(blank=True, default="", verbose_name="Ошибка")
+    updated_at = models.DateTimeField(null=True, blank=True, verbose_name="Обновлено")
+
+    def __str__(self):
+        return f"{self.chat_id} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Доставка рассылки"
+        verbose_name_plural = "Доставки рассылок"
+        unique_together = ("broadcast", "chat_id")
+        indexes = [models.Index(fields=["broadcast", "status"])]
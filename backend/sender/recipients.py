@@ -0,0 +1,33 @@
+from typing import AsyncIterator
+
+from django.db.models import QuerySet
+
+from backend.users.models import User, Whitelist
+
+RECIPIENTS_CHUNK_SIZE = 1000
+
+
+def get_recipients_queryset() -> QuerySet:
+    return User.objects.filter(
+        phone_number__in=Whitelist.objects.values("phone_number")
+    )
+
+
+async def iter_recipient_ids(
+    queryset: QuerySet, chunk_size: int = RECIPIENTS_CHUNK_SIZE
+) -> AsyncIterator[int]:
+    """
+    Отдает telegram_id получателей, читая их из БД порциями по первичному
+    ключу (keyset pagination), чтобы не загружать всю аудиторию в память.
+    Следующая порция запрашивается, только когда предыдущая разобрана.
+    """
+    queryset = queryset.order_by("telegram_id").values_list("telegram_id", flat=True)
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(telegram_id__gt=last_id)
+        chunk = [telegram_id async for telegram_id in page[:chunk_size]]
+        for telegram_id in chunk:
+            yield telegram_id
+        if len(chunk) < chunk_size:
+            return
+        last_id = chunk[-1]
@@ -0,0 +1,108 @@
+import uuid
+from datetime import timedelta
+from functools import partial
+from typing import Callable
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Broadcast
+
+DISPATCH_BATCH_SIZE = 100
+
+REPEAT_INTERVALS = {
+    Broadcast.Repeat.DAILY: timedelta(days=1),
+    Broadcast.Repeat.WEEKLY: timedelta(weeks=1),
+}
+
+
+def schedule_next(broadcast: Broadcast) -> Broadcast:
+    """
+    Создает следующую рассылку повторяющейся серии с теми же содержимым
+    и аудиторией. Пропущенные (пока планировщик не работал) повторы не
+    отправляются — следующая рассылка всегда в будущем.
+    """
+    interval = REPEAT_INTERVALS[broadcast.repeat]
+    scheduled_at = broadcast.scheduled_at + interval
+    now = timezone.now()
+    while scheduled_at <= now:
+        scheduled_at += interval
+
+    next_broadcast = Broadcast.objects.create(
+        text=broadcast.text,
+        media_file=broadcast.media_file.name or None,
+        media_type=broadcast.media_type,
+        scheduled_at=scheduled_at,
+        repeat=broadcast.repeat,
+        active_within_days=broadcast.active_within_days,
+        inactive_for_days=broadcast.inactive_for_days,
+        min_solved_tasks=broadcast.min_solved_tasks,
+        max_solved_tasks=broadcast.max_solved_tasks,
+        min_checks=broadcast.min_checks,
+        max_checks=broadcast.max_checks,
+    )
+    next_broadcast.segment_courses.set(broadcast.segment_courses.all())
+    return next_broadcast
+
+
+def _dispatch(broadcast: Broadcast, enqueue: Callable[[Broadcast], None]):
+    broadcast.status = Broadcast.Status.SENDING
+    broadcast.task_id = str(uuid.uuid4())
+    broadcast.dispatched_at = timezone.now()
+    broadcast.save(update_fields=["status", "task_id", "dispatched_at"])
+    transaction.on_commit(partial(enqueue, broadcast))
+
+
+def claim_due_broadcasts(
+    enqueue: Callable[[Broadcast], None], limit: int = DISPATCH_BATCH_SIZE
+) -> list[Broadcast]:
+    """
+    Забирает рассылки, время отправки которых наступило, переводит их
+    в статус SENDING и после коммита передает в enqueue. Строки блокируются
+    с SKIP LOCKED, поэтому несколько диспетчеров не заберут одну рассылку
+    дважды. Выборка идет по индексу (status, scheduled_at).
+    """
+    with transaction.atomic():
+        due = list(
+            Broadcast.objects.select_for_update(skip_locked=True)
+            .filter(status=Broadcast.Status.SCHEDULED, scheduled_at__lte=timezone.now())
+            .order_by("scheduled_at")[:limit]
+        )
+        for broadcast in due:
+            _dispatch(broadcast, enqueue)
+            if broadcast.repeat:
+                schedule_next(broadcast)
+    return due
+
+
+def claim_stale_broadcasts(
+    enqueue: Callable[[Broadcast], None],
+    is_running: Callable[[int], bool],
+    stale_after: timedelta,
+    limit: int = DISPATCH_BATCH_SIZE,
+) -> list[Broadcast]:
+    """
+    Повторно передает в enqueue рассылки, застрявшие в SENDING: задача не
+    попала в брокер (сбой брокера или celery beat между коммитом и
+    отправкой) или потерялась. Рассылка считается застрявшей, если с
+    последней передачи на отправку прошло больше stale_after и ни одна
+    задача сейчас ее не отправляет (is_running). Уже доставленные сообщения
+    повторно не отправляются — их отмечает журнал доставки.
+    """
+    with transaction.atomic():
+        candidates = (
+            Broadcast.objects.select_for_update(skip_locked=True)
+            .filter(status=Broadcast.Status.SENDING)
+            .filter(
+                Q(dispatched_at__lt=timezone.now() - stale_after)
+                | Q(dispatched_at__isnull=True)
+            )
+            .order_by("scheduled_at")[:limit]
+        )
+        stale = [
+            broadcast for broadcast in candidates if not is_running(broadcast.id)
+        ]
+        for broadcast in stale:
+            _dispatch(broadcast, enqueue)
+    return stale
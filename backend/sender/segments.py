@@ -0,0 +1,83 @@
+from datetime import timedelta
+
+from django.db.models import Count, Exists, IntegerField, OuterRef, Q, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from backend.courses.models import UserTaskStatus
+from backend.users.models import CourseAccess
+
+from .models import Broadcast
+from .recipients import get_recipients_queryset
+
+PREVIEW_SAMPLE_SIZE = 10
+
+
+def get_segment_queryset(broadcast: Broadcast) -> QuerySet:
+    """
+    Аудитория рассылки: пользователи из белого списка, отфильтрованные по
+    условиям сегмента. Условия собираются в один запрос: доступ к курсам
+    и число решенных задач — коррелированными подзапросами по индексам
+    (user, course) и (user, task), активность и число проверок — по индексам
+    на полях пользователя.
+    """
+    queryset = get_recipients_queryset()
+
+    if broadcast.pk and broadcast.segment_courses.exists():
+        queryset = queryset.filter(
+            Exists(
+                CourseAccess.objects.filter(
+                    user=OuterRef("pk"),
+                    course__in=broadcast.segment_courses.values("pk"),
+                )
+            )
+        )
+
+    now = timezone.now()
+    if broadcast.active_within_days is not None:
+        queryset = queryset.filter(
+            last_activity_at__gte=now - timedelta(days=broadcast.active_within_days)
+        )
+    if broadcast.inactive_for_days is not None:
+        queryset = queryset.filter(
+            Q(last_activity_at__lt=now - timedelta(days=broadcast.inactive_for_days))
+            | Q(last_activity_at__isnull=True)
+        )
+
+    if broadcast.min_checks is not None:
+        queryset = queryset.filter(checks_count__gte=broadcast.min_checks)
+    if broadcast.max_checks is not None:
+        queryset = queryset.filter(checks_count__lte=broadcast.max_checks)
+
+    if broadcast.min_solved_tasks is not None or broadcast.max_solved_tasks is not None:
+        solved_count = (
+            UserTaskStatus.objects.filter(
+                user=OuterRef("pk"), status=UserTaskStatus.Status.SOLVED
+            )
+            .order_by()
+            .values("user")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        queryset = queryset.alias(
+            solved_count=Coalesce(
+                Subquery(solved_count, output_field=IntegerField()), 0
+            )
+        )
+        if broadcast.min_solved_tasks is not None:
+            queryset = queryset.filter(solved_count__gte=broadcast.min_solved_tasks)
+        if broadcast.max_solved_tasks is not None:
+            queryset = queryset.filter(solved_count__lte=broadcast.max_solved_tasks)
+
+    return queryset
+
+
+def get_segment_preview(broadcast: Broadcast) -> tuple[int, list]:
+    """Размер аудитории и несколько первых получателей для админки."""
+    queryset = get_segment_queryset(broadcast)
+    sample = list(
+        queryset.order_by("telegram_id").values("telegram_id", "username")[
+            :PREVIEW_SAMPLE_SIZE
+        ]
+    )
+    return queryset.count(), sample
@@ -0,0 +1,145 @@
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp import web
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from backend.content.models import TelegramFile
+from bot.fake_telegram import FakeTelegram, FakeTelegramConfig
+
+from .engine import FAILED, BroadcastEngine, Recipient, TokenBucket
+from .models import Broadcast, BroadcastDelivery
+from .recipients import iter_recipient_ids
+from .segments import get_segment_queryset
+from .tasks import send_message_to_user
+
+# Токен с id бота 0: file_id из заглушки не смешиваются с настоящими.
+DRY_RUN_TOKEN = "0:dry-run"
+
+
+@dataclass
+class SimulationReport:
+    audience: int
+    sample: int
+    elapsed: float
+    rate: float
+    expected_blocked: int
+    start_at: datetime
+    engine_stats: dict = field(default_factory=dict)
+    stub_stats: dict = field(default_factory=dict)
+    overlapping: list[Broadcast] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        return self.sample / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def projected_seconds(self) -> float:
+        """Время отправки всей аудитории при скорости, измеренной на выборке."""
+        if not self.sample:
+            return 0.0
+        return max(self.audience / self.throughput, self.audience / self.rate)
+
+    @property
+    def finish_at(self) -> datetime:
+        return self.start_at + timedelta(seconds=self.projected_seconds)
+
+    @property
+    def failure_share(self) -> float:
+        if not self.sample:
+            return 0.0
+        return self.engine_stats.get(FAILED, 0) / self.sample
+
+
+async def simulate_broadcast(
+    broadcast: Broadcast, config: FakeTelegramConfig, sample_size: int
+) -> SimulationReport:
+    """
+    Пробный прогон рассылки без отправки пользователям: аудитория берется из
+    сегмента рассылки, первые `sample_size` получателей отправляются через
+    BroadcastEngine, ограничитель скорости и send_media в локальную заглушку
+    Telegram. Журнал доставки и статус рассылки не меняются. Получатели,
+    заблокировавшие бота в прошлых рассылках, считаются заблокированными
+    и сейчас.
+    """
+    start_at = max(broadcast.scheduled_at, timezone.now())
+    queryset = await sync_to_async(get_segment_queryset)(broadcast)
+    audience = await queryset.acount()
+    blocked_before = BroadcastDelivery.objects.filter(
+        status=BroadcastDelivery.Status.BLOCKED,
+        chat_id__in=queryset.values("telegram_id"),
+    )
+    expected_blocked = await blocked_before.values("chat_id").distinct().acount()
+
+    sample_ids = []
+    async for chat_id in iter_recipient_ids(queryset):
+        if len(sample_ids) >= sample_size:
+            break
+        sample_ids.append(chat_id)
+    config.blocked_chat_ids = {
+        chat_id
+        async for chat_id in blocked_before.filter(chat_id__in=sample_ids).values_list(
+            "chat_id", flat=True
+        )
+    }
+
+    fake = FakeTelegram(config)
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    host, port = runner.addresses[0][:2]
+    bot = Bot(
+        token=DRY_RUN_TOKEN,
+        session=AiohttpSession(api=TelegramAPIServer.from_base(f"http://{host}:{port}")),
+    )
+
+    rate = settings.BROADCAST_RATE_PER_SECOND
+    engine = BroadcastEngine(
+        send=lambda chat_id: send_message_to_user(bot, chat_id, broadcast),
+        limiter=TokenBucket(rate=rate),
+        concurrency=settings.BROADCAST_CONCURRENCY * settings.BROADCAST_SHARDS,
+        max_retries=settings.BROADCAST_MAX_RETRIES,
+    )
+
+    async def recipients():
+        for chat_id in sample_ids:
+            yield Recipient(chat_id=chat_id)
+
+    started = time.monotonic()
+    try:
+        stats = await engine.run(recipients())
+    finally:
+        elapsed = time.monotonic() - started
+        await bot.session.close()
+        await runner.cleanup()
+        await TelegramFile.objects.filter(bot_id=bot.id).adelete()
+
+    report = SimulationReport(
+        audience=audience,
+        sample=len(sample_ids),
+        elapsed=elapsed,
+        rate=rate,
+        expected_blocked=expected_blocked,
+        start_at=start_at,
+        engine_stats=stats,
+        stub_stats=dict(fake.stats),
+    )
+    report.overlapping = [
+        other
+        async for other in Broadcast.objects.filter(
+            Q(status=Broadcast.Status.SENDING)
+            | Q(
+                status=Broadcast.Status.SCHEDULED,
+                scheduled_at__gte=report.start_at,
+                scheduled_at__lt=report.finish_at,
+            )
+        ).exclude(pk=broadcast.pk)
+    ]
+    return report
@@ -1,98 +1,298 @@
 import asyncio
 import logging
+import uuid
+from contextlib import asynccontextmanager
+from datetime import timedelta
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError
-from aiogram.types import FSInputFile
 from asgiref.sync import sync_to_async
-from celery import shared_task
+from celery import chord, shared_task
 from django.conf import settings
+from django.utils import timezone
 
-from backend.users.models import User, Whitelist
+from backend.content.media import send_media
+from backend.core.redis_client import get_async_redis, get_redis, run_async
+from backend.core.telegram import create_bot
 
-from .models import Broadcast
+from .engine import BroadcastEngine
+from .ledger import (
+    DeliveryRecorder,
+    aget_delivery_stats,
+    create_deliveries,
+    iter_deliveries,
+)
+from .limiter import RedisTokenBucket
+from .models import Broadcast, BroadcastDelivery
+from .scheduling import claim_due_broadcasts, claim_stale_broadcasts
+from .segments import get_segment_queryset
 
 logger = logging.getLogger(__name__)
 
+LOCK_TTL_SECONDS = 60
 
-async def send_message_to_user(bot: Bot, user: User, broadcast: Broadcast):
-    try:
-        if broadcast.media_file and broadcast.media_type:
-            file = FSInputFile(broadcast.media_file.path)
-            media_type = broadcast.media_type
-
-            if media_type == Broadcast.MediaType.PHOTO:
-                await bot.send_photo(user.telegram_id, file, caption=broadcast.text)
-            elif media_type == Broadcast.MediaType.VIDEO:
-                await bot.send_video(user.telegram_id, file, caption=broadcast.text)
-            elif media_type == Broadcast.MediaType.DOCUMENT:
-                await bot.send_document(user.telegram_id, file, caption=broadcast.text)
-            elif media_type == Broadcast.MediaType.AUDIO:
-                await bot.send_audio(user.telegram_id, file, caption=broadcast.text)
-        else:
-            await bot.send_message(user.telegram_id, broadcast.text)
-
-        logger.info(f"Сообщение успешно отправлено пользователю {user.telegram_id}")
-        return True
-    except TelegramForbiddenError as e:
-        logger.warning(
-            f"Не удалось отправить сообщение пользователю {user.telegram_id} (т.к. заблочил/удалил бота): {e}"
-        )
-        return True
-    except TelegramAPIError as e:
-        logger.error(
-            f"Не удалось отправить сообщение пользователю {user.telegram_id}: {e}"
+# Продление и снятие блокировки, только если она все еще принадлежит задаче:
+# после истечения TTL ее могла занять другая задача.
+REFRESH_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class BroadcastLocked(Exception):
+    """Рассылкой или ее шардом сейчас занимается другая задача."""
+
+
+async def send_message_to_user(bot: Bot, chat_id: int, broadcast: Broadcast):
+    if broadcast.media_file and broadcast.media_type:
+        return await send_media(
+            bot,
+            chat_id,
+            broadcast.media_file.path,
+            broadcast.media_type,
+            caption=broadcast.text,
         )
-        return False
+    else:
+        return await bot.send_message(chat_id, broadcast.text)
+
+
+@asynccontextmanager
+async def broadcast_lock(key: str):
+    """
+    Не дает двум задачам одновременно работать с одной рассылкой (или одним
+    ее шардом). Блокировка продлевается, пока задача идет, и истекает сама,
+    если воркер упал.
+    """
+    client = get_async_redis()
+    token = uuid.uuid4().hex
+    if not await client.set(key, token, nx=True, ex=LOCK_TTL_SECONDS):
+        yield False
+        return
 
+    refresh_lock = client.register_script(REFRESH_LOCK_SCRIPT)
+    release_lock = client.register_script(RELEASE_LOCK_SCRIPT)
 
-async def run_broadcast(broadcast_id: int):
+    async def refresh():
+        while True:
+            await asyncio.sleep(LOCK_TTL_SECONDS / 3)
+            if not await refresh_lock(keys=[key], args=[token, LOCK_TTL_SECONDS]):
+                logger.warning(f"Lock {key} was lost, it is held by another task now")
+                return
+
+    refresher = asyncio.create_task(refresh())
     try:
-        broadcast = await Broadcast.objects.aget(id=broadcast_id)
+        yield True
+    finally:
+        refresher.cancel()
+        await release_lock(keys=[key], args=[token])
 
-        whitelisted_phones = Whitelist.objects.values_list("phone_number", flat=True)
-        users_to_send = await sync_to_async(list)(
-            User.objects.filter(phone_number__in=whitelisted_phones)
-        )
 
-        if not users_to_send:
-            logger.warning(f"Рассылка {broadcast_id}: нет пользователей для отправки.")
-            broadcast.status = Broadcast.Status.ERROR
-            await broadcast.asave(update_fields=["status"])
-            return
+def get_lock_key(broadcast_id: int, shard: int | None = None) -> str:
+    if shard is None:
+        return f"broadcast:lock:{broadcast_id}"
+    return f"broadcast:lock:{broadcast_id}:{shard}"
 
-        bot = Bot(token=settings.BOT_TOKEN, default=None)
 
-        tasks = [send_message_to_user(bot, user, broadcast) for user in users_to_send]
-        results = await asyncio.gather(*tasks)
+async def set_broadcast_status(broadcast_id: int, status: str):
+    await Broadcast.objects.filter(id=broadcast_id).aupdate(status=status)
 
-        await bot.session.close()
 
-        if all(results):
-            broadcast.status = Broadcast.Status.SENT
-        else:
-            broadcast.status = Broadcast.Status.ERROR
+async def prepare_broadcast(broadcast_id: int) -> bool:
+    """
+    Записывает получателей в журнал доставки и переводит рассылку в статус
+    SENDING. Получатели записываются один раз, до начала отправки: повторный
+    запуск продолжает с тех, кому сообщение еще не отправлено, и не добавляет
+    попавших в сегмент позже. Возвращает False, если отправлять нечего.
+    """
+    try:
+        broadcast = await Broadcast.objects.aget(id=broadcast_id)
+        if broadcast.status in (
+            Broadcast.Status.DRAFT,
+            Broadcast.Status.CANCELED,
+            Broadcast.Status.SENT,
+        ):
+            logger.warning(
+                f"Рассылка {broadcast_id} в статусе {broadcast.status}, отправка пропущена."
+            )
+            return False
 
-        await broadcast.asave(update_fields=["status"])
-        logger.info(
-            f"Рассылка {broadcast_id} завершена со статусом {broadcast.status}."
-        )
+        async with broadcast_lock(get_lock_key(broadcast_id)) as acquired:
+            if not acquired:
+                logger.warning(f"Рассылка {broadcast_id} уже запускается другой задачей.")
+                return False
+
+            if broadcast.recipients_saved_at is None:
+                # Если запись прервалась, повторный запуск ее дописывает:
+                # create_deliveries пропускает уже записанных получателей.
+                recipients = await sync_to_async(get_segment_queryset)(broadcast)
+                await create_deliveries(broadcast.id, recipients)
+                await Broadcast.objects.filter(id=broadcast.id).aupdate(
+                    recipients_saved_at=timezone.now()
+                )
+
+            if not await broadcast.deliveries.aexists():
+                logger.warning(
+                    f"Рассылка {broadcast.id}: нет пользователей для отправки."
+                )
+                await set_broadcast_status(broadcast.id, Broadcast.Status.ERROR)
+                return False
+
+            await set_broadcast_status(broadcast.id, Broadcast.Status.SENDING)
+            return True
 
     except Broadcast.DoesNotExist:
         logger.error(f"Рассылка с ID {broadcast_id} не найдена.")
     except Exception as e:
         logger.exception(
-            f"Критическая ошибка при выполнении рассылки {broadcast_id}: {e}"
+            f"Критическая ошибка при подготовке рассылки {broadcast_id}: {e}"
         )
+        await set_broadcast_status(broadcast_id, Broadcast.Status.ERROR)
+    return False
+
+
+async def run_broadcast_shard(
+    broadcast_id: int, shard: int, shards: int, statuses: list[str]
+) -> dict:
+    """
+    Отправляет рассылку получателям одного шарда. Скорость ограничивается
+    общим для всех шардов RedisTokenBucket.
+    """
+    async with broadcast_lock(get_lock_key(broadcast_id, shard)) as acquired:
+        if not acquired:
+            raise BroadcastLocked(
+                f"Шард {shard} рассылки {broadcast_id} уже отправляется другой задачей."
+            )
+
+        broadcast = await Broadcast.objects.aget(id=broadcast_id)
+        bot = create_bot()
         try:
-            broadcast = await Broadcast.objects.aget(id=broadcast_id)
-            broadcast.status = Broadcast.Status.ERROR
-            await broadcast.asave(update_fields=["status"])
-        except Broadcast.DoesNotExist:
-            pass
+            async with DeliveryRecorder() as recorder:
+                engine = BroadcastEngine(
+                    send=lambda chat_id: send_message_to_user(bot, chat_id, broadcast),
+                    limiter=RedisTokenBucket(rate=settings.BROADCAST_RATE_PER_SECOND),
+                    concurrency=settings.BROADCAST_CONCURRENCY,
+                    max_retries=settings.BROADCAST_MAX_RETRIES,
+                    on_result=recorder.record,
+                )
+                stats = await engine.run(
+                    iter_deliveries(broadcast_id, statuses, shard=shard, shards=shards)
+                )
+        finally:
+            await bot.session.close()
+
+    logger.info(f"Рассылка {broadcast_id}, шард {shard}/{shards}: {stats}")
+    return stats
+
+
+async def finalize_broadcast(broadcast_id: int, shards: int):
+    shard_locks = [get_lock_key(broadcast_id, shard) for shard in range(shards)]
+    if await get_async_redis().exists(*shard_locks):
+        raise BroadcastLocked(
+            f"Рассылка {broadcast_id}: часть шардов еще отправляется."
+        )
+
+    stats = await aget_delivery_stats(broadcast_id)
+    if stats[BroadcastDelivery.Status.PENDING] or stats[BroadcastDelivery.Status.FAILED]:
+        status = Broadcast.Status.ERROR
+    else:
+        status = Broadcast.Status.SENT
+    await set_broadcast_status(broadcast_id, status)
+    logger.info(f"Рассылка {broadcast_id} завершена со статусом {status}: {stats}")
 
 
 @shared_task
-def send_broadcast_task(broadcast_id: int):
+def send_broadcast_task(broadcast_id: int, retry_failed: bool = False):
+    """
+    Готовит журнал доставки и запускает отправку шардами на всех свободных
+    воркерах; после завершения всех шардов finalize_broadcast_task выставляет
+    итоговый статус. retry_failed повторяет отправку и неудавшимся получателям.
+    """
     logger.info(f"Запуск задачи рассылки для ID: {broadcast_id}")
-    asyncio.run(run_broadcast(broadcast_id))
+    if not run_async(prepare_broadcast(broadcast_id)):
+        return
+
+    statuses = [BroadcastDelivery.Status.PENDING]
+    if retry_failed:
+        statuses.append(BroadcastDelivery.Status.FAILED)
+    shards = settings.BROADCAST_SHARDS
+    chord(
+        send_broadcast_shard_task.s(broadcast_id, shard, shards, statuses)
+        for shard in range(shards)
+    )(finalize_broadcast_task.s(broadcast_id, shards))
+
+
+# Блокировку держит живая задача (например, повторно запущенная отправка)
+# или упавший воркер — тогда она истечет через LOCK_TTL_SECONDS. В обоих
+# случаях задача повторяется, пока блокировка не освободится.
+@shared_task(
+    bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=None
+)
+def send_broadcast_shard_task(
+    self, broadcast_id: int, shard: int, shards: int, statuses: list[str]
+) -> dict:
+    # Если воркер упал, брокер отдаст шард другому воркеру; уже отправленные
+    # получатели отмечены в журнале и повторно не получат сообщение.
+    try:
+        return run_async(run_broadcast_shard(broadcast_id, shard, shards, statuses))
+    except BroadcastLocked as e:
+        logger.warning(f"{e} Повтор через {LOCK_TTL_SECONDS} с.")
+        raise self.retry(exc=e, countdown=LOCK_TTL_SECONDS)
+    except Exception as e:
+        # Исключение не пробрасывается, иначе chord не запустит
+        # finalize_broadcast_task и рассылка останется в SENDING. Неотправленные
+        # получатели шарда остаются PENDING, и рассылка получит статус ERROR.
+        logger.exception(
+            f"Ошибка при отправке шарда {shard} рассылки {broadcast_id}: {e}"
+        )
+        return {"error": repr(e)}
+
+
+@shared_task(bind=True, max_retries=None)
+def finalize_broadcast_task(self, results: list[dict], broadcast_id: int, shards: int):
+    failed = [shard for shard, stats in enumerate(results) if "error" in stats]
+    if failed:
+        logger.error(f"Рассылка {broadcast_id}: шарды {failed} завершились с ошибкой.")
+    try:
+        run_async(finalize_broadcast(broadcast_id, shards))
+    except BroadcastLocked as e:
+        logger.warning(f"{e} Повтор через {LOCK_TTL_SECONDS} с.")
+        raise self.retry(exc=e, countdown=LOCK_TTL_SECONDS)
+
+
+def enqueue_broadcast(broadcast: Broadcast):
+    send_broadcast_task.apply_async(args=[broadcast.id], task_id=broadcast.task_id)
+
+
+def is_broadcast_running(broadcast_id: int) -> bool:
+    lock_keys = [get_lock_key(broadcast_id)] + [
+        get_lock_key(broadcast_id, shard) for shard in range(settings.BROADCAST_SHARDS)
+    ]
+    return bool(get_redis().exists(*lock_keys))
+
+
+@shared_task
+def dispatch_due_broadcasts():
+    """
+    Запускается celery beat раз в BROADCAST_DISPATCH_INTERVAL секунд.
+    Запланированные рассылки хранятся только в БД, воркеры не держат
+    отложенных (eta) задач. Задачи ставятся в очередь после коммита; если
+    это не удалось, рассылка останется в SENDING без блокировок и будет
+    передана на отправку снова через BROADCAST_STALE_MINUTES.
+    """
+    for broadcast in claim_due_broadcasts(enqueue_broadcast):
+        logger.info(f"Рассылка {broadcast.id}: наступило время отправки.")
+    for broadcast in claim_stale_broadcasts(
+        enqueue_broadcast,
+        is_broadcast_running,
+        stale_after=timedelta(minutes=settings.BROADCAST_STALE_MINUTES),
+    ):
+        logger.warning(
+            f"Рассылка {broadcast.id} зависла в статусе SENDING, повторная отправка."
+        )
@@ -1,3 +1,202 @@
+from types import SimpleNamespace
+from unittest import mock
+
+import fakeredis
 from django.test import TestCase
 
-# Create your tests here.
+from backend.users.models import User, Whitelist
+
+from .models import Broadcast, BroadcastDelivery
+from .tasks import (
+    BroadcastLocked,
+    finalize_broadcast,
+    get_lock_key,
+    prepare_broadcast,
+    run_broadcast_shard,
+)
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent: list[int] = []
+        self.session = SimpleNamespace(close=mock.AsyncMock())
+
+    async def send_message(self, chat_id: int, text: str):
+        self.sent.append(chat_id)
+        return SimpleNamespace(message_id=chat_id)
+
+
+class BroadcastTestCase(TestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        for target in ("backend.sender.tasks", "backend.sender.limiter"):
+            patcher = mock.patch(f"{target}.get_async_redis", self._redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _redis(self):
+        return fakeredis.FakeAsyncRedis(server=self.server, decode_responses=True)
+
+    async def add_recipient(self, telegram_id: int):
+        phone_number = f"+7999{telegram_id:07d}"
+        await Whitelist.objects.acreate(phone_number=phone_number)
+        await User.objects.acreate(telegram_id=telegram_id, phone_number=phone_number)
+
+    async def ledger(self, broadcast: Broadcast) -> dict[int, str]:
+        return {
+            chat_id: status
+            async for chat_id, status in BroadcastDelivery.objects.filter(
+                broadcast=broadcast
+            ).values_list("chat_id", "status")
+        }
+
+
+class PrepareBroadcastTests(BroadcastTestCase):
+    async def test_first_run_records_recipients(self):
+        await self.add_recipient(1)
+        await self.add_recipient(2)
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+
+        self.assertTrue(await prepare_broadcast(broadcast.id))
+
+        await broadcast.arefresh_from_db()
+        self.assertIsNotNone(broadcast.recipients_saved_at)
+        self.assertEqual(broadcast.status, Broadcast.Status.SENDING)
+        self.assertEqual(set(await self.ledger(broadcast)), {1, 2})
+
+    async def test_resume_does_not_add_new_segment_members(self):
+        await self.add_recipient(1)
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+        await prepare_broadcast(broadcast.id)
+        await self.add_recipient(2)
+
+        self.assertTrue(await prepare_broadcast(broadcast.id))
+        self.assertEqual(set(await self.ledger(broadcast)), {1})
+
+    async def test_interrupted_first_run_is_completed(self):
+        await self.add_recipient(1)
+        await self.add_recipient(2)
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+        await BroadcastDelivery.objects.acreate(broadcast=broadcast, chat_id=1)
+
+        self.assertTrue(await prepare_broadcast(broadcast.id))
+        self.assertEqual(set(await self.ledger(broadcast)), {1, 2})
+
+    async def test_empty_audience_is_an_error(self):
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+
+        with self.assertLogs("backend.sender.tasks", "WARNING"):
+            self.assertFalse(await prepare_broadcast(broadcast.id))
+        await broadcast.arefresh_from_db()
+        self.assertEqual(broadcast.status, Broadcast.Status.ERROR)
+
+    async def test_resumed_error_with_empty_ledger_stays_error(self):
+        await self.add_recipient(1)
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.ERROR
+        )
+        await Broadcast.objects.filter(id=broadcast.id).aupdate(
+            recipients_saved_at=broadcast.created_at
+        )
+
+        with self.assertLogs("backend.sender.tasks", "WARNING"):
+            self.assertFalse(await prepare_broadcast(broadcast.id))
+        await broadcast.arefresh_from_db()
+        self.assertEqual(broadcast.status, Broadcast.Status.ERROR)
+        self.assertEqual(await self.ledger(broadcast), {})
+
+    async def test_finished_broadcasts_are_skipped(self):
+        await self.add_recipient(1)
+        for status in (
+            Broadcast.Status.DRAFT,
+            Broadcast.Status.CANCELED,
+            Broadcast.Status.SENT,
+        ):
+            with self.subTest(status=status):
+                broadcast = await Broadcast.objects.acreate(text="hi", status=status)
+                with self.assertLogs("backend.sender.tasks", "WARNING"):
+                    self.assertFalse(await prepare_broadcast(broadcast.id))
+                self.assertEqual(await self.ledger(broadcast), {})
+
+    async def test_locked_broadcast_is_skipped(self):
+        await self.add_recipient(1)
+        broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+        await self._redis().set(get_lock_key(broadcast.id), "other")
+
+        with self.assertLogs("backend.sender.tasks", "WARNING"):
+            self.assertFalse(await prepare_broadcast(broadcast.id))
+        self.assertEqual(await self.ledger(broadcast), {})
+
+
+class BroadcastShardTests(BroadcastTestCase):
+    async def create_ledger(self):
+        self.broadcast = await Broadcast.objects.acreate(
+            text="hi", status=Broadcast.Status.SENDING
+        )
+        for chat_id, status in (
+            (1, BroadcastDelivery.Status.SENT),
+            (2, BroadcastDelivery.Status.PENDING),
+            (3, BroadcastDelivery.Status.PENDING),
+            (4, BroadcastDelivery.Status.FAILED),
+        ):
+            await BroadcastDelivery.objects.acreate(
+                broadcast=self.broadcast, chat_id=chat_id, status=status
+            )
+
+    async def run_shards(self, statuses: list[str], shards: int = 2) -> FakeBot:
+        bot = FakeBot()
+        with mock.patch("backend.sender.tasks.create_bot", return_value=bot):
+            for shard in range(shards):
+                await run_broadcast_shard(self.broadcast.id, shard, shards, statuses)
+        return bot
+
+    async def test_resume_sends_only_pending_recipients(self):
+        await self.create_ledger()
+        bot = await self.run_shards([BroadcastDelivery.Status.PENDING])
+
+        self.assertEqual(sorted(bot.sent), [2, 3])
+        ledger = await self.ledger(self.broadcast)
+        self.assertEqual(ledger[2], BroadcastDelivery.Status.SENT)
+        self.assertEqual(ledger[4], BroadcastDelivery.Status.FAILED)
+
+    async def test_retry_failed_includes_failed_recipients(self):
+        await self.create_ledger()
+        bot = await self.run_shards(
+            [BroadcastDelivery.Status.PENDING, BroadcastDelivery.Status.FAILED]
+        )
+        self.assertEqual(sorted(bot.sent), [2, 3, 4])
+
+    async def test_locked_shard_raises(self):
+        await self.create_ledger()
+        await self._redis().set(get_lock_key(self.broadcast.id, 0), "other")
+        with self.assertRaises(BroadcastLocked):
+            await self.run_shards([BroadcastDelivery.Status.PENDING], shards=1)
+
+    async def test_finalize_sets_status_from_ledger(self):
+        await self.create_ledger()
+        await finalize_broadcast(self.broadcast.id, shards=2)
+        await self.broadcast.arefresh_from_db()
+        self.assertEqual(self.broadcast.status, Broadcast.Status.ERROR)
+
+        await BroadcastDelivery.objects.filter(broadcast=self.broadcast).aupdate(
+            status=BroadcastDelivery.Status.SENT
+        )
+        await finalize_broadcast(self.broadcast.id, shards=2)
+        await self.broadcast.arefresh_from_db()
+        self.assertEqual(self.broadcast.status, Broadcast.Status.SENT)
+
+    async def test_finalize_waits_for_running_shards(self):
+        await self.create_ledger()
+        await self._redis().set(get_lock_key(self.broadcast.id, 1), "other")
+        with self.assertRaises(BroadcastLocked):
+            await finalize_broadcast(self.broadcast.id, shards=2)
@@ -0,0 +1,80 @@
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import transaction
+
+from .cache import set_course_access
+from .models import CourseAccess, User, Whitelist
+
+RECONCILE_BATCH_SIZE = 1000
+
+WhitelistCourse = Whitelist.courses.through
+
+
+def _reconcile_batch(phone_numbers: list[str]) -> dict[int, set[int]]:
+    # Номер у User не уникален: за одним номером может быть несколько аккаунтов.
+    users: dict[str, list[int]] = defaultdict(list)
+    for phone_number, telegram_id in User.objects.filter(
+        phone_number__in=phone_numbers
+    ).values_list("phone_number", "telegram_id"):
+        users[str(phone_number)].append(telegram_id)
+    if not users:
+        return {}
+
+    wanted = {
+        (user_id, course_id)
+        for phone_number, course_id in WhitelistCourse.objects.filter(
+            whitelist__phone_number__in=list(users)
+        ).values_list("whitelist__phone_number", "course_id")
+        for user_id in users[str(phone_number)]
+    }
+    current = {
+        (user_id, course_id): access_id
+        for access_id, user_id, course_id in CourseAccess.objects.filter(
+            user_id__in=[user_id for ids in users.values() for user_id in ids]
+        ).values_list("id", "user_id", "course_id")
+    }
+
+    stale = {
+        pair: access_id for pair, access_id in current.items() if pair not in wanted
+    }
+    missing = wanted - current.keys()
+    if stale:
+        CourseAccess.objects.filter(id__in=stale.values()).delete()
+    CourseAccess.objects.bulk_create(
+        [
+            CourseAccess(user_id=user_id, course_id=course_id)
+            for user_id, course_id in missing
+        ],
+        ignore_conflicts=True,
+    )
+    changed = {user_id: set() for user_id, _ in stale.keys() | missing}
+    for user_id, course_id in wanted:
+        if user_id in changed:
+            changed[user_id].add(course_id)
+    return changed
+
+
+def reconcile_course_access(phone_numbers: Iterable[str]) -> dict[int, set[int]]:
+    """
+    Приводит CourseAccess пользователей с этими номерами в соответствие с
+    белым списком: на каждую пачку номеров три SELECT, один DELETE и один
+    INSERT вместо запросов на каждого пользователя. Номера без записи в белом
+    списке теряют все доступы. Возвращает новые наборы курсов пользователей,
+    чьи доступы изменились (telegram_id -> course_id); после коммита они
+    записываются в кэш доступов.
+    """
+    phone_numbers = sorted({str(phone_number) for phone_number in phone_numbers})
+    changed: dict[int, set[int]] = {}
+    with transaction.atomic():
+        for start in range(0, len(phone_numbers), RECONCILE_BATCH_SIZE):
+            changed |= _reconcile_batch(
+                phone_numbers[start : start + RECONCILE_BATCH_SIZE]
+            )
+
+        def update_cache():
+            for user_id, course_ids in changed.items():
+                set_course_access(user_id, course_ids)
+
+        transaction.on_commit(update_cache)
+    return changed
@@ -1,10 +1,26 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.models import Group
 from django.contrib.auth.models import User as AuthUser
-from django.urls import reverse
+from django.http import HttpResponseRedirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 
 from .models import CourseAccess, User, Whitelist
+from .whitelist_import import import_whitelist
+
+
+class WhitelistImportForm(forms.Form):
+    file = forms.FileField(
+        label="Файл CSV или XLSX",
+        help_text="Первая колонка — номер телефона, вторая — курсы через «;» (названия или ID).",
+    )
+    replace_courses = forms.BooleanField(
+        label="Заменить курсы",
+        required=False,
+        help_text="Оставить номерам из файла только перечисленные курсы. Иначе курсы добавляются к уже выданным.",
+    )
 
 
 class CourseAccessInline(admin.TabularInline):
@@ -90,6 +106,60 @@ class WhitelistAdmin(admin.ModelAdmin):
             return "Нет"
         return ", ".join(obj.courses.values_list("title", flat=True))
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path(
+                "import/",
+                self.admin_site.admin_view(self.import_view),
+                name="users_whitelist_import",
+            )
+        ]
+        return custom_urls + urls
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return HttpResponseRedirect(reverse("admin:users_whitelist_changelist"))
+
+        form = WhitelistImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+            try:
+                result = import_whitelist(
+                    upload.name,
+                    upload.read(),
+                    replace_courses=form.cleaned_data["replace_courses"],
+                )
+            except ValueError as e:
+                self.message_user(request, str(e), messages.ERROR)
+            else:
+                for error in result.errors[:20]:
+                    self.message_user(request, error, messages.WARNING)
+                if len(result.errors) > 20:
+                    self.message_user(
+                        request,
+                        f"И еще {len(result.errors) - 20} ошибок.",
+                        messages.WARNING,
+                    )
+                self.message_user(
+                    request,
+                    f"Импортировано номеров: {result.phones} (новых: {result.created}), "
+                    f"привязок курсов добавлено: {result.links_added}, удалено: {result.links_removed}, "
+                    f"доступы обновлены у {result.users_synced} пользователей.",
+                    messages.SUCCESS,
+                )
+                return HttpResponseRedirect(
+                    reverse("admin:users_whitelist_changelist")
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Импорт белого списка",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/users/whitelist/import.html", context)
+
 
 admin.site.unregister(AuthUser)
 admin.site.unregister(Group)
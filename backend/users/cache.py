@@ -0,0 +1,97 @@
+from django.conf import settings
+
+from backend.core.cache import TwoTierCache
+from backend.core.db_pool import db_query
+
+from .models import CourseAccess, User, Whitelist
+
+user_cache = TwoTierCache(
+    namespace="auth_user",
+    ttl=settings.AUTH_CACHE_TTL,
+    local_ttl=settings.AUTH_LOCAL_CACHE_TTL,
+    maxsize=settings.AUTH_LOCAL_CACHE_SIZE,
+)
+whitelist_cache = TwoTierCache(
+    namespace="auth_whitelist",
+    ttl=settings.AUTH_CACHE_TTL,
+    local_ttl=settings.AUTH_LOCAL_CACHE_TTL,
+    maxsize=settings.AUTH_LOCAL_CACHE_SIZE,
+)
+
+# Набор курсов пользователя обновляется при каждой сверке доступов
+# (write-through), поэтому может жить в redis дольше остальных записей.
+course_access_cache = TwoTierCache(
+    namespace="course_access",
+    ttl=settings.COURSE_ACCESS_CACHE_TTL,
+    local_ttl=settings.AUTH_LOCAL_CACHE_TTL,
+    maxsize=settings.AUTH_LOCAL_CACHE_SIZE,
+    decode=set,
+)
+
+
+@db_query
+def _load_user(telegram_id: int) -> dict | None:
+    user = (
+        User.objects.filter(telegram_id=telegram_id)
+        .values("telegram_id", "username", "phone_number")
+        .first()
+    )
+    if user and user["phone_number"]:
+        user["phone_number"] = str(user["phone_number"])
+    return user
+
+
+@db_query
+def _load_whitelisted(phone_number: str) -> bool:
+    return Whitelist.objects.filter(phone_number=phone_number).exists()
+
+
+@db_query
+def _load_course_ids(user_id: int) -> list[int]:
+    return list(
+        CourseAccess.objects.filter(user_id=user_id).values_list("course_id", flat=True)
+    )
+
+
+async def get_cached_user(telegram_id: int) -> User | None:
+    """
+    Возвращает пользователя из кэша. Это несохраняемый экземпляр только с
+    идентификационными полями (telegram_id, username, phone_number).
+    """
+    fields = await user_cache.get(
+        str(telegram_id), lambda: _load_user(telegram_id)
+    )
+    if fields is None:
+        return None
+    return User(**fields)
+
+
+async def is_whitelisted_cached(phone_number) -> bool:
+    if not phone_number:
+        return False
+    phone_number = str(phone_number)
+    return await whitelist_cache.get(
+        phone_number, lambda: _load_whitelisted(phone_number)
+    )
+
+
+def invalidate_user(telegram_id: int):
+    user_cache.invalidate(str(telegram_id))
+
+
+def invalidate_whitelist(phone_number):
+    whitelist_cache.invalidate(str(phone_number))
+
+
+async def get_user_course_ids(user_id: int) -> set[int]:
+    return await course_access_cache.get(
+        str(user_id), lambda: _load_course_ids(user_id)
+    )
+
+
+def set_course_access(user_id: int, course_ids: set[int]):
+    course_access_cache.set(str(user_id), sorted(course_ids))
+
+
+def invalidate_course_access(user_id: int):
+    course_access_cache.invalidate(str(user_id))
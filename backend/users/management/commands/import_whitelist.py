@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.users.whitelist_import import import_whitelist
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports whitelist phones from a CSV or XLSX file: phone in the first "
+        "column, course titles or IDs separated by ';' in the second."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path to a .csv or .xlsx file.")
+        parser.add_argument(
+            "--replace-courses",
+            action="store_true",
+            help="Leave imported phones only the courses listed in the file.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"File {path} not found.")
+        with open(path, "rb") as f:
+            content = f.read()
+
+        started = time.monotonic()
+        try:
+            result = import_whitelist(
+                path, content, replace_courses=options["replace_courses"]
+            )
+        except ValueError as e:
+            raise CommandError(f"Failed to read {path}: {e}")
+        elapsed = time.monotonic() - started
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.phones} phones in {elapsed:.1f} s: "
+                f"{result.created} new, {result.links_added} course links added, "
+                f"{result.links_removed} removed, access changed for "
+                f"{result.users_synced} users, {len(result.errors)} errors."
+            )
+        )
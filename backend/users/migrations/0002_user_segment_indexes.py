@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['last_activity_at'], name='users_user_last_ac_ed8f6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['checks_count'], name='users_user_checks__e73802_idx'),
+        ),
+    ]
@@ -34,6 +34,10 @@ class User(models.Model):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
+        indexes = [
+            models.Index(fields=["last_activity_at"]),
+            models.Index(fields=["checks_count"]),
+        ]
 
 
 class Whitelist(models.Model):
@@ -1,22 +1,78 @@
-from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
 from django.dispatch import receiver
 
-from .models import User, Whitelist
-from .tasks import sync_access_from_whitelist
+from .cache import invalidate_course_access, invalidate_user, invalidate_whitelist
+from .models import CourseAccess, User, Whitelist
+from .tasks import request_access_sync
 
 
 @receiver(m2m_changed, sender=Whitelist.courses.through)
 def on_whitelist_courses_change(sender, instance, action, **kwargs):
     if action in ["post_add", "post_remove", "post_clear"]:
-        sync_access_from_whitelist.delay(str(instance.phone_number))
+        phone_number = str(instance.phone_number)
+        transaction.on_commit(lambda: request_access_sync(phone_number))
+
+
+@receiver(pre_save, sender=Whitelist)
+def on_whitelist_entry_pre_save(sender, instance, **kwargs):
+    if instance.pk:
+        instance._previous_phone_number = (
+            Whitelist.objects.filter(pk=instance.pk)
+            .values_list("phone_number", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Whitelist)
+def on_whitelist_entry_save(sender, instance, **kwargs):
+    phone_numbers = {str(instance.phone_number)}
+    previous_phone_number = getattr(instance, "_previous_phone_number", None)
+    if previous_phone_number:
+        phone_numbers.add(str(previous_phone_number))
+    for phone_number in phone_numbers:
+        transaction.on_commit(
+            lambda phone_number=phone_number: invalidate_whitelist(phone_number)
+        )
+    # При смене номера доступы переходят к пользователю с новым номером.
+    if previous_phone_number and str(previous_phone_number) != str(
+        instance.phone_number
+    ):
+        for phone_number in phone_numbers:
+            transaction.on_commit(
+                lambda phone_number=phone_number: request_access_sync(phone_number)
+            )
 
 
 @receiver(post_delete, sender=Whitelist)
 def on_whitelist_entry_delete(sender, instance, **kwargs):
-    sync_access_from_whitelist.delay(str(instance.phone_number))
+    phone_number = str(instance.phone_number)
+    transaction.on_commit(lambda: invalidate_whitelist(phone_number))
+    transaction.on_commit(lambda: request_access_sync(phone_number))
 
 
 @receiver(post_save, sender=User)
 def on_user_create_or_update(sender, instance, created, **kwargs):
+    telegram_id = instance.telegram_id
+    transaction.on_commit(lambda: invalidate_user(telegram_id))
     if created and instance.phone_number:
-        sync_access_from_whitelist.delay(str(instance.phone_number))
+        phone_number = str(instance.phone_number)
+        transaction.on_commit(lambda: request_access_sync(phone_number))
+
+
+@receiver(post_delete, sender=User)
+def on_user_delete(sender, instance, **kwargs):
+    telegram_id = instance.telegram_id
+    transaction.on_commit(lambda: invalidate_user(telegram_id))
+
+
+@receiver(post_save, sender=CourseAccess)
+@receiver(post_delete, sender=CourseAccess)
+def on_course_access_change(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_course_access(user_id))
@@ -1,44 +1,95 @@
+import logging
+
 from celery import shared_task
-from django.db import transaction
+from django.conf import settings
+from django.db.models import Q
+from redis.exceptions import RedisError
 
-from backend.users.models import CourseAccess, User, Whitelist
+from backend.core.redis_client import get_redis
+from backend.users.access import reconcile_course_access
+from backend.users.models import CourseAccess, User
 
+logger = logging.getLogger(__name__)
 
-@shared_task
-def sync_access_from_whitelist(phone_number_str: str):
-    with transaction.atomic():
-        try:
-            user = User.objects.get(phone_number=phone_number_str)
-        except User.DoesNotExist:
-            return False
+FULL_RECONCILE_BATCH_SIZE = 1000
 
-        try:
-            whitelist_entry = Whitelist.objects.prefetch_related("courses").get(
-                phone_number=phone_number_str
-            )
 
-            courses_in_whitelist_ids = set(
-                whitelist_entry.courses.values_list("id", flat=True)
-            )
+def _sync_key(phone_number: str) -> str:
+    return f"access_sync:{phone_number}"
 
-            current_access_ids = set(
-                user.course_accesses.values_list("course_id", flat=True)
-            )
 
-            ids_to_add = courses_in_whitelist_ids - current_access_ids
-            ids_to_remove = current_access_ids - courses_in_whitelist_ids
+def request_access_sync(phone_number: str):
+    """
+    Откладывает сверку доступов по номеру на ACCESS_SYNC_DEBOUNCE_SECONDS.
+    Все запросы по одному номеру за это время (post_add и post_remove при
+    сохранении в админке, создание пользователя) выполняются одной задачей.
+    Вызывать после коммита, чтобы задача увидела изменения.
+    """
+    phone_number = str(phone_number)
+    delay = settings.ACCESS_SYNC_DEBOUNCE_SECONDS
+    try:
+        # TTL с запасом: если задача потеряется, ключ истечет сам.
+        scheduled = get_redis().set(
+            _sync_key(phone_number), 1, nx=True, ex=delay * 4 + 60
+        )
+    except RedisError as e:
+        logger.warning(f"Access sync debounce is unavailable: {e}")
+        scheduled = True
+    if not scheduled:
+        return
+    try:
+        sync_access_from_whitelist.apply_async((phone_number,), countdown=delay)
+    except Exception as e:
+        # Без задачи ключ глушил бы все запросы по номеру до истечения TTL.
+        # Вызывается после коммита, поэтому ошибка не пробрасывается:
+        # доступы исправит ночная сверка или следующее изменение.
+        logger.exception(f"Failed to schedule access sync for {phone_number}: {e}")
+        try:
+            get_redis().delete(_sync_key(phone_number))
+        except RedisError:
+            pass
 
-            if ids_to_remove:
-                CourseAccess.objects.filter(user=user, course_id__in=ids_to_remove).delete()
 
-            if ids_to_add:
-                new_accesses = [
-                    CourseAccess(user=user, course_id=course_id) for course_id in ids_to_add
-                ]
-                CourseAccess.objects.bulk_create(new_accesses)
+@shared_task
+def sync_access_from_whitelist(phone_number_str: str):
+    # Ключ снимается до сверки: изменения, закоммиченные во время сверки,
+    # запланируют следующую задачу.
+    try:
+        get_redis().delete(_sync_key(phone_number_str))
+    except RedisError as e:
+        logger.warning(f"Failed to release access sync for {phone_number_str}: {e}")
+    return bool(reconcile_course_access([phone_number_str]))
 
-            return True
 
-        except Whitelist.DoesNotExist:
-            user.course_accesses.all().delete()
-            return False
+@shared_task
+def reconcile_all_access():
+    """
+    Периодическая полная сверка CourseAccess с белым списком: исправляет
+    расхождения, если какой-то сигнал или задача синхронизации потерялись.
+    """
+    without_phone = Q(phone_number__isnull=True) | Q(phone_number="")
+    queryset = (
+        User.objects.exclude(without_phone)
+        .order_by("telegram_id")
+        .values_list("telegram_id", "phone_number")
+    )
+    changed = 0
+    last_id = None
+    while True:
+        page = queryset if last_id is None else queryset.filter(telegram_id__gt=last_id)
+        chunk = list(page[:FULL_RECONCILE_BATCH_SIZE])
+        if not chunk:
+            break
+        changed += len(
+            reconcile_course_access(str(phone_number) for _, phone_number in chunk)
+        )
+        last_id = chunk[-1][0]
+
+    orphaned, _ = CourseAccess.objects.filter(
+        user__in=User.objects.filter(without_phone)
+    ).delete()
+    logger.info(
+        f"Full access reconciliation: changed {changed} users, "
+        f"removed {orphaned} accesses of users without phone"
+    )
+    return changed
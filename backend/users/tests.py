@@ -1,3 +1,168 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.test import SimpleTestCase, TestCase
+
+from backend.courses.models import Course
+
+from .access import reconcile_course_access
+from .models import CourseAccess, User, Whitelist
+from .tasks import reconcile_all_access, request_access_sync
+from .whitelist_import import import_whitelist, read_table
+
+PHONE = "+79990000001"
+OTHER_PHONE = "+79990000002"
+
+
+class UsersTestCase(TestCase):
+    def setUp(self):
+        # Кэш доступов и инвалидация работают через redis, здесь они не нужны.
+        for target in (
+            "backend.users.access.set_course_access",
+            "backend.users.signals.invalidate_course_access",
+            "backend.users.signals.invalidate_user",
+            "backend.users.signals.invalidate_whitelist",
+            "backend.users.signals.request_access_sync",
+            "backend.users.whitelist_import.invalidate_whitelist",
+        ):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.python = Course.objects.create(title="Python")
+        self.sql = Course.objects.create(title="SQL")
+
+    def accesses(self, user_id: int) -> set[int]:
+        return set(
+            CourseAccess.objects.filter(user_id=user_id).values_list(
+                "course_id", flat=True
+            )
+        )
+
+
+class ReconcileCourseAccessTests(UsersTestCase):
+    def test_grants_and_revokes_courses(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        CourseAccess.objects.create(user_id=1, course=self.sql)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            changed = reconcile_course_access([PHONE])
+
+        self.assertEqual(changed, {1: {self.python.id}})
+        self.assertEqual(self.accesses(1), {self.python.id})
+
+    def test_unchanged_users_are_not_reported(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        CourseAccess.objects.create(user_id=1, course=self.python)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+
+        self.assertEqual(reconcile_course_access([PHONE]), {})
+
+    def test_phone_without_whitelist_loses_access(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        CourseAccess.objects.create(user_id=1, course=self.python)
+
+        self.assertEqual(reconcile_course_access([PHONE]), {1: set()})
+        self.assertEqual(self.accesses(1), set())
+
+    def test_all_accounts_sharing_a_phone(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        User.objects.create(telegram_id=2, phone_number=PHONE)
+        CourseAccess.objects.create(user_id=2, course=self.sql)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+
+        changed = reconcile_course_access([PHONE])
+
+        self.assertEqual(changed, {1: {self.python.id}, 2: {self.python.id}})
+        self.assertEqual(self.accesses(1), {self.python.id})
+        self.assertEqual(self.accesses(2), {self.python.id})
+
+    def test_cache_is_updated_after_commit(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+
+        with mock.patch("backend.users.access.set_course_access") as set_access:
+            with self.captureOnCommitCallbacks(execute=True):
+                reconcile_course_access([PHONE])
+        set_access.assert_called_once_with(1, {self.python.id})
+
+
+class WhitelistImportTests(UsersTestCase):
+    def test_csv_import_creates_entries_and_grants_access(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        content = (
+            "phone,courses\n"
+            "79990000001,Python\n"
+            f'{OTHER_PHONE},"{self.sql.id}; Unknown"\n'
+            "not a phone,Python\n"
+        ).encode()
+
+        result = import_whitelist("list.csv", content)
+
+        self.assertEqual(result.phones, 2)
+        self.assertEqual(result.created, 2)
+        self.assertEqual(result.users_synced, 1)
+        self.assertEqual(len(result.errors), 2)
+        self.assertEqual(self.accesses(1), {self.python.id})
+        self.assertEqual(
+            set(
+                Whitelist.objects.get(phone_number=OTHER_PHONE).courses.values_list(
+                    "id", flat=True
+                )
+            ),
+            {self.sql.id},
+        )
+
+    def test_replace_courses(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+        CourseAccess.objects.create(user_id=1, course=self.python)
+
+        import_whitelist("list.csv", f"{PHONE},SQL\n".encode())
+        self.assertEqual(self.accesses(1), {self.python.id, self.sql.id})
+
+        import_whitelist("list.csv", f"{PHONE},SQL\n".encode(), replace_courses=True)
+        self.assertEqual(self.accesses(1), {self.sql.id})
+
+    def test_malformed_xlsx_is_reported(self):
+        with self.assertRaises(ValueError):
+            read_table("list.xlsx", b"not a zip archive")
+
+
+class ReconcileAllAccessTests(UsersTestCase):
+    def test_reconciles_users_and_drops_accesses_without_phone(self):
+        User.objects.create(telegram_id=1, phone_number=PHONE)
+        Whitelist.objects.create(phone_number=PHONE).courses.add(self.python)
+        for telegram_id, phone_number in ((2, None), (3, "")):
+            User.objects.create(telegram_id=telegram_id, phone_number=phone_number)
+            CourseAccess.objects.create(user_id=telegram_id, course=self.sql)
+
+        self.assertEqual(reconcile_all_access(), 1)
+        self.assertEqual(self.accesses(1), {self.python.id})
+        self.assertEqual(self.accesses(2), set())
+        self.assertEqual(self.accesses(3), set())
+
+
+class RequestAccessSyncTests(SimpleTestCase):
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        patcher = mock.patch("backend.users.tasks.get_redis", lambda: self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_requests_are_debounced_per_phone(self):
+        with mock.patch(
+            "backend.users.tasks.sync_access_from_whitelist.apply_async"
+        ) as apply_async:
+            request_access_sync(PHONE)
+            request_access_sync(PHONE)
+            request_access_sync(OTHER_PHONE)
+        self.assertEqual(apply_async.call_count, 2)
+
+    def test_failed_enqueue_releases_debounce(self):
+        with mock.patch(
+            "backend.users.tasks.sync_access_from_whitelist.apply_async",
+            side_effect=ConnectionError("broker is down"),
+        ), self.assertLogs("backend.users.tasks", "ERROR"):
+            request_access_sync(PHONE)
+        self.assertFalse(self.redis.exists(f"access_sync:{PHONE}"))
@@ -0,0 +1,275 @@
+import csv
+import io
+import re
+import zipfile
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from xml.etree import ElementTree
+
+from django.db import transaction
+from phonenumber_field.phonenumber import to_python
+
+from backend.courses.models import Course
+
+from .access import WhitelistCourse, reconcile_course_access
+from .cache import invalidate_whitelist
+from .models import Whitelist
+
+IMPORT_BATCH_SIZE = 1000
+COURSES_SEPARATOR = re.compile(r"[;\n]")
+
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+XLSX_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+XLSX_PACKAGE_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+@dataclass
+class WhitelistImportResult:
+    phones: int = 0
+    created: int = 0
+    links_added: int = 0
+    links_removed: int = 0
+    users_synced: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def _xlsx_cell_value(cell, shared_strings: list[str]) -> str:
+    cell_type = cell.get("t")
+    if cell_type == "s":
+        index = int(cell.findtext(f"{XLSX_NS}v") or "")
+        if not 0 <= index < len(shared_strings):
+            raise ValueError(f"Ссылка на несуществующую строку {index}.")
+        return shared_strings[index]
+    if cell_type == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{XLSX_NS}t"))
+    value = cell.findtext(f"{XLSX_NS}v") or ""
+    # Номера телефонов в числовых ячейках Excel хранит как 79991234567 или 7.9991234567E10.
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return value
+    if number.is_finite() and number == number.to_integral_value():
+        return str(int(number))
+    return value
+
+
+def _xlsx_column_index(reference: str) -> int:
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord("A") + 1
+    return index - 1
+
+
+def _xlsx_first_sheet(archive: zipfile.ZipFile) -> str:
+    workbook = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+    sheet = workbook.find(f"{XLSX_NS}sheets/{XLSX_NS}sheet")
+    if sheet is None:
+        raise ValueError("В файле XLSX нет листов.")
+    relation_id = sheet.get(f"{XLSX_REL_NS}id")
+    relations = ElementTree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for relation in relations.iter(f"{XLSX_PACKAGE_REL_NS}Relationship"):
+        if relation.get("Id") == relation_id and relation.get("Target"):
+            target = relation.get("Target")
+            return target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+    raise ValueError("В файле XLSX не найден первый лист.")
+
+
+def read_xlsx(content: bytes) -> list[list[str]]:
+    """Первый лист XLSX без сторонних библиотек: файл — zip-архив с XML."""
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        shared_strings = []
+        if "xl/sharedStrings.xml" in archive.namelist():
+            root = ElementTree.fromstring(archive.read("xl/sharedStrings.xml"))
+            shared_strings = [
+                "".join(t.text or "" for t in item.iter(f"{XLSX_NS}t"))
+                for item in root.findall(f"{XLSX_NS}si")
+            ]
+        sheet = ElementTree.fromstring(archive.read(_xlsx_first_sheet(archive)))
+
+    rows = []
+    for row in sheet.iter(f"{XLSX_NS}row"):
+        values: dict[int, str] = {}
+        for position, cell in enumerate(row.findall(f"{XLSX_NS}c")):
+            reference = cell.get("r")
+            column = _xlsx_column_index(reference) if reference else position
+            values[column] = _xlsx_cell_value(cell, shared_strings)
+        rows.append([values.get(i, "") for i in range(max(values, default=-1) + 1)])
+    return rows
+
+
+def read_csv(content: bytes) -> list[list[str]]:
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = content.decode("cp1251")
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    return list(csv.reader(io.StringIO(text), dialect))
+
+
+def read_table(file_name: str, content: bytes) -> list[list[str]]:
+    # Битый или нестандартный файл дает понятную ошибку, а не ошибку 500.
+    if file_name.lower().endswith(".xlsx"):
+        try:
+            return read_xlsx(content)
+        except (
+            ValueError,
+            zipfile.BadZipFile,
+            KeyError,
+            ElementTree.ParseError,
+            AttributeError,
+            IndexError,
+            TypeError,
+            OverflowError,
+        ) as e:
+            raise ValueError(f"Не удалось прочитать XLSX: {e}")
+    try:
+        return read_csv(content)
+    except csv.Error as e:
+        raise ValueError(f"Не удалось прочитать CSV: {e}")
+
+
+def parse_phone_number(value: str) -> str | None:
+    phone_number = to_python(value)
+    # В таблицах номер часто записан без "+": 79991234567.
+    if (not phone_number or not phone_number.is_valid()) and value.isdigit():
+        phone_number = to_python(f"+{value}")
+    if phone_number and phone_number.is_valid():
+        return str(phone_number)
+    return None
+
+
+def parse_rows(
+    rows: list[list[str]], result: WhitelistImportResult
+) -> dict[str, set[int]]:
+    """
+    Первая колонка — номер телефона, вторая — курсы через ";" (названия или
+    ID). Строка заголовка пропускается. Один номер может встречаться
+    в нескольких строках, курсы объединяются.
+    """
+    courses = {}
+    for course_id, title in Course.objects.values_list("id", "title"):
+        courses[str(course_id)] = course_id
+        courses[title.strip().lower()] = course_id
+
+    entries: dict[str, set[int]] = {}
+    for line_number, row in enumerate(rows, start=1):
+        raw_phone = row[0].strip() if row else ""
+        if not raw_phone:
+            continue
+        phone_number = parse_phone_number(raw_phone)
+        if phone_number is None:
+            if line_number > 1:
+                result.errors.append(
+                    f"Строка {line_number}: неверный номер телефона «{raw_phone}»."
+                )
+            continue
+
+        course_ids = entries.setdefault(phone_number, set())
+        raw_courses = row[1] if len(row) > 1 else ""
+        for reference in COURSES_SEPARATOR.split(raw_courses):
+            reference = reference.strip()
+            if not reference:
+                continue
+            course_id = courses.get(reference.lower())
+            if course_id is None:
+                result.errors.append(
+                    f"Строка {line_number}: курс «{reference}» не найден."
+                )
+                continue
+            course_ids.add(course_id)
+    return entries
+
+
+def _import_batch(
+    entries: dict[str, set[int]],
+    phone_numbers: list[str],
+    replace_courses: bool,
+    result: WhitelistImportResult,
+) -> list[str]:
+    existing = {
+        str(phone_number)
+        for phone_number in Whitelist.objects.filter(
+            phone_number__in=phone_numbers
+        ).values_list("phone_number", flat=True)
+    }
+    created = [
+        phone_number for phone_number in phone_numbers if phone_number not in existing
+    ]
+    Whitelist.objects.bulk_create(
+        [Whitelist(phone_number=phone_number) for phone_number in created],
+        ignore_conflicts=True,
+    )
+
+    whitelist_ids = {
+        str(phone_number): whitelist_id
+        for whitelist_id, phone_number in Whitelist.objects.filter(
+            phone_number__in=phone_numbers
+        ).values_list("id", "phone_number")
+    }
+    current = {
+        (whitelist_id, course_id): link_id
+        for link_id, whitelist_id, course_id in WhitelistCourse.objects.filter(
+            whitelist_id__in=whitelist_ids.values()
+        ).values_list("id", "whitelist_id", "course_id")
+    }
+    wanted = {
+        (whitelist_ids[phone_number], course_id)
+        for phone_number in phone_numbers
+        for course_id in entries[phone_number]
+    }
+
+    if replace_courses:
+        stale_ids = [link_id for pair, link_id in current.items() if pair not in wanted]
+        if stale_ids:
+            WhitelistCourse.objects.filter(id__in=stale_ids).delete()
+        result.links_removed += len(stale_ids)
+
+    new_links = [
+        WhitelistCourse(whitelist_id=whitelist_id, course_id=course_id)
+        for whitelist_id, course_id in wanted
+        if (whitelist_id, course_id) not in current
+    ]
+    WhitelistCourse.objects.bulk_create(new_links, ignore_conflicts=True)
+    result.links_added += len(new_links)
+    result.created += len(created)
+    return created
+
+
+def import_whitelist(
+    file_name: str, content: bytes, replace_courses: bool = False
+) -> WhitelistImportResult:
+    """
+    Массовый импорт белого списка из CSV или XLSX. Записи и привязки курсов
+    создаются пачками через bulk_create (без сигналов и celery-задач на каждый
+    номер), затем доступы всех затронутых пользователей сверяются разом
+    через reconcile_course_access. По умолчанию курсы добавляются к уже
+    выданным; с replace_courses у импортируемых номеров остаются только курсы
+    из файла.
+    """
+    result = WhitelistImportResult()
+    entries = parse_rows(read_table(file_name, content), result)
+    phone_numbers = sorted(entries)
+    result.phones = len(phone_numbers)
+
+    with transaction.atomic():
+        created = []
+        for start in range(0, len(phone_numbers), IMPORT_BATCH_SIZE):
+            created += _import_batch(
+                entries,
+                phone_numbers[start : start + IMPORT_BATCH_SIZE],
+                replace_courses,
+                result,
+            )
+        result.users_synced = len(reconcile_course_access(phone_numbers))
+
+        def invalidate():
+            for phone_number in created:
+                invalidate_whitelist(phone_number)
+
+        transaction.on_commit(invalidate)
+    return result
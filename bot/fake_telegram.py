@@ -0,0 +1,239 @@
+"""
+Локальная заглушка Telegram для нагрузочной проверки бота в режиме webhook.
+
+Поднимает фейковый Bot API (бот запускается с TELEGRAM_API_URL, указывающим
+на него) и отправляет в webhook бота апдейты от множества пользователей,
+измеряя время до первого ответа бота каждому пользователю. Тот же фейковый
+Bot API используется в заглушке AI (run_ai_stub) и для пробного прогона
+рассылок (simulate_broadcast): FakeTelegramConfig задает задержку ответа,
+лимит 429, долю ошибок 500 и пользователей, заблокировавших бота (403).
+
+    BOT_MODE=webhook WEBHOOK_SECRET=local TELEGRAM_API_URL=http://localhost:8090 \
+        python bot/main.py
+    python bot/fake_telegram.py --webhook-url http://localhost:8081/bot/webhook \
+        --secret local
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+import aiohttp
+from aiohttp import web
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+TRUE_METHODS = {
+    "setwebhook",
+    "deletewebhook",
+    "answercallbackquery",
+    "deletemessage",
+    "setmycommands",
+    "sendchataction",
+}
+# Поля файла в ответе на send_* — по ним send_media сохраняет file_id.
+MEDIA_FIELDS = {
+    "sendphoto": ("photo", {"width": 1, "height": 1}),
+    "sendvideo": ("video", {"width": 1, "height": 1, "duration": 1}),
+    "senddocument": ("document", {}),
+    "sendaudio": ("audio", {"duration": 1}),
+}
+
+
+@dataclass
+class FakeTelegramConfig:
+    latency_ms: float = 0
+    latency_jitter_ms: float = 0
+    # Сколько сообщений в секунду принимается до ответа 429 (0 — без лимита).
+    flood_limit: int = 0
+    retry_after_seconds: int = 5
+    error_rate: float = 0.0
+    blocked_chat_ids: set[int] = field(default_factory=set)
+
+    def sample_latency(self) -> float:
+        return max(random.gauss(self.latency_ms, self.latency_jitter_ms), 0) / 1000
+
+
+def _error(code: int, description: str, **parameters) -> web.Response:
+    payload = {"ok": False, "error_code": code, "description": description}
+    if parameters:
+        payload["parameters"] = parameters
+    return web.json_response(payload, status=code)
+
+
+class FakeTelegram:
+    def __init__(self, config: FakeTelegramConfig | None = None):
+        self.config = config or FakeTelegramConfig()
+        self.message_ids = itertools.count(1)
+        self.update_ids = itertools.count(1)
+        self.calls: dict[str, int] = {}
+        self.stats = {
+            "messages": 0,
+            "uploads": 0,
+            "rate_limited": 0,
+            "blocked": 0,
+            "errors": 0,
+        }
+        self.waiters: dict[int, asyncio.Future] = {}
+        self._window: deque[float] = deque()
+
+    def _is_flooded(self) -> bool:
+        """Скользящее окно в одну секунду, как у лимита Telegram на рассылки."""
+        now = time.monotonic()
+        while self._window and self._window[0] <= now - 1:
+            self._window.popleft()
+        if self.config.flood_limit and len(self._window) >= self.config.flood_limit:
+            return True
+        self._window.append(now)
+        return False
+
+    async def handle_method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        self.calls[method] = self.calls.get(method, 0) + 1
+        data = await request.post()
+        latency = self.config.sample_latency()
+        if latency:
+            await asyncio.sleep(latency)
+
+        if method == "getme":
+            return web.json_response({"ok": True, "result": BOT_USER})
+        if method in TRUE_METHODS:
+            return web.json_response({"ok": True, "result": True})
+
+        if self._is_flooded():
+            self.stats["rate_limited"] += 1
+            retry_after = self.config.retry_after_seconds
+            return _error(
+                429,
+                f"Too Many Requests: retry after {retry_after}",
+                retry_after=retry_after,
+            )
+        chat_id = int(data.get("chat_id", 0) or 0)
+        if chat_id in self.config.blocked_chat_ids:
+            self.stats["blocked"] += 1
+            return _error(403, "Forbidden: bot was blocked by the user")
+        if random.random() < self.config.error_rate:
+            self.stats["errors"] += 1
+            return _error(500, "Internal Server Error")
+
+        self.stats["messages"] += 1
+        waiter = self.waiters.pop(chat_id, None)
+        if waiter and not waiter.done():
+            waiter.set_result(time.monotonic())
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+        }
+        if method in MEDIA_FIELDS:
+            name, extra = MEDIA_FIELDS[method]
+            # Новый файл aiogram передает как attach://, известный — как file_id.
+            if str(data.get(name, "")).startswith("attach://"):
+                self.stats["uploads"] += 1
+            file = {"file_id": f"fake-{name}", "file_unique_id": name, **extra}
+            message[name] = [file] if name == "photo" else file
+            message["caption"] = data.get("caption", "")
+        else:
+            message["text"] = data.get("text", "")
+        return web.json_response({"ok": True, "result": message})
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=50 * 1024 * 1024)
+        app.router.add_post("/bot{token}/{method}", self.handle_method)
+        return app
+
+    def make_update(self, user_id: int, text: str) -> dict:
+        user = {"id": user_id, "is_bot": False, "first_name": f"User {user_id}"}
+        return {
+            "update_id": next(self.update_ids),
+            "message": {
+                "message_id": next(self.message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": user,
+                "text": text,
+            },
+        }
+
+
+async def run_user(fake, session, args, user_id, latencies, stats):
+    headers = {}
+    if args.secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = args.secret
+    for _ in range(args.updates_per_user):
+        waiter = asyncio.get_running_loop().create_future()
+        fake.waiters[user_id] = waiter
+        started = time.monotonic()
+        async with session.post(
+            args.webhook_url, json=fake.make_update(user_id, args.text), headers=headers
+        ) as response:
+            if response.status != 200:
+                stats["webhook_errors"] += 1
+                fake.waiters.pop(user_id, None)
+                continue
+        try:
+            replied_at = await asyncio.wait_for(waiter, timeout=args.timeout)
+            latencies.append(replied_at - started)
+        except asyncio.TimeoutError:
+            fake.waiters.pop(user_id, None)
+            stats["timeouts"] += 1
+
+
+async def main(args):
+    fake = FakeTelegram()
+    runner = web.AppRunner(fake.create_app())
+    await runner.setup()
+    await web.TCPSite(runner, args.host, args.port).start()
+    print(f"Fake Bot API: http://{args.host}:{args.port}")
+    await asyncio.sleep(args.delay)
+
+    latencies: list[float] = []
+    stats = {"webhook_errors": 0, "timeouts": 0}
+    started = time.monotonic()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(
+            *[
+                run_user(fake, session, args, args.first_user_id + i, latencies, stats)
+                for i in range(args.users)
+            ]
+        )
+    elapsed = time.monotonic() - started
+    await runner.cleanup()
+
+    total = args.users * args.updates_per_user
+    print(f"Updates: {total}, replied: {len(latencies)}, elapsed: {elapsed:.1f} s")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} updates/s")
+    print(f"Webhook errors: {stats['webhook_errors']}, timeouts: {stats['timeouts']}")
+    if latencies:
+        latencies.sort()
+        print(
+            f"Latency p50: {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, "
+            f"max: {latencies[-1] * 1000:.0f} ms"
+        )
+    print(f"Bot API calls: {fake.calls}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--webhook-url", default="http://localhost:8081/bot/webhook")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--updates-per-user", type=int, default=5)
+    parser.add_argument("--first-user-id", type=int, default=10_000_000)
+    parser.add_argument("--text", default="/start")
+    parser.add_argument("--timeout", type=float, default=10)
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0,
+        help="Seconds to wait before sending updates, e.g. while the bot starts.",
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -5,6 +5,7 @@ import docx
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
+from asgiref.sync import sync_to_async
 
 from backend.checker.tasks import (
     check_solution_task,
@@ -13,6 +14,7 @@ from backend.checker.tasks import (
 from bot.keyboards.inline_keyboards import FeedbackCallback
 from bot.states.check import CodeCheck
 from bot.utils.db import get_bot_texts
+from bot.utils.fsm import clear_state
 
 router = Router()
 
@@ -28,6 +30,11 @@ ALLOWED_EXTENSIONS = (".py", ".txt", ".docx")
 MAX_FILE_SIZE_BYTES = 1 * 1024 * 1024
 
 
+def read_docx(file_bytes: bytes) -> str:
+    doc = docx.Document(io.BytesIO(file_bytes))
+    return "\n".join([para.text for para in doc.paragraphs])
+
+
 def decode_file_content(file_bytes: bytes) -> str | None:
     encodings_to_try = ["utf-8", "windows-1251", "cp1251"]
     for encoding in encodings_to_try:
@@ -46,7 +53,7 @@ async def process_code_submission(message: Message, state: FSMContext, code: str
         await message.answer("Произошла ошибка. Пожалуйста, выберите задачу заново.")
         return
 
-    await state.clear()
+    await clear_state(state)
 
     texts = await get_bot_texts()
     await message.answer(texts.code_in_review_message)
@@ -96,9 +103,7 @@ async def code_received_document(message: Message, state: FSMContext):
     code = None
     if file_name.lower().endswith(".docx"):
         try:
-            doc_stream = io.BytesIO(file_bytes)
-            doc = docx.Document(doc_stream)
-            code = "\n".join([para.text for para in doc.paragraphs])
+            code = await sync_to_async(read_docx, thread_sensitive=False)(file_bytes)
         except Exception as e:
             logging.error(
                 f"Failed to read .docx file from user {message.from_user.id}: {e}"
@@ -1,8 +1,9 @@
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery
 
-from backend.courses.models import User, UserTaskStatus
+from backend.content.media import send_media
+from backend.courses.models import User
 from bot.keyboards.callbacks import NavigationCallback
 from bot.keyboards.inline_keyboards import (
     get_courses_kb,
@@ -17,17 +18,19 @@ from bot.utils.db import (
     get_course_modules,
     get_level_tasks,
     get_module_levels,
-    get_task_details,
+    get_task_path,
+    get_task_view,
     get_user_courses,
-    get_user_task_status,
+    is_task_solved,
 )
+from bot.utils.fsm import clear_state, set_state_and_data
 
 router = Router()
 
 
 @router.callback_query(NavigationCallback.filter(F.level == "courses"))
 async def show_courses(callback: CallbackQuery, state: FSMContext):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
     courses = await get_user_courses(callback.from_user.id)
     if not courses:
@@ -43,7 +46,7 @@ async def show_courses(callback: CallbackQuery, state: FSMContext):
 async def show_modules(
     callback: CallbackQuery, callback_data: NavigationCallback, state: FSMContext
 ):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
     modules = await get_course_modules(callback_data.course_id, callback.from_user.id)
     await callback.message.edit_text(
@@ -57,7 +60,7 @@ async def show_modules(
 async def show_levels(
     callback: CallbackQuery, callback_data: NavigationCallback, state: FSMContext
 ):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
     levels = await get_module_levels(callback_data.module_id, callback.from_user.id)
     await callback.message.edit_text(
@@ -73,7 +76,7 @@ async def show_levels(
 async def show_tasks(
     callback: CallbackQuery, callback_data: NavigationCallback, state: FSMContext
 ):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
     tasks = await get_level_tasks(callback_data.level_id, callback.from_user.id)
     text = texts.choose_task_message
@@ -95,42 +98,38 @@ async def show_tasks(
 async def show_task_view(
     callback: CallbackQuery, callback_data: NavigationCallback, user: User
 ):
-    task = await get_task_details(callback_data.task_id, user.telegram_id)
-    if not task:
+    card, path = await get_task_view(callback_data.task_id, user.telegram_id)
+    if not card:
         await callback.answer(
             "Задача не найдена или у вас нет к ней доступа.", show_alert=True
         )
         return
 
-    status = await get_user_task_status(user.telegram_id, task.id)
-    status_text = ""
-    if status and status.status == UserTaskStatus.Status.SOLVED:
-        status_text = "✅ *Решение принято*\n\n"
-
-    message_text = (
-        f"**Задача #{task.number}: {task.title}**\n\n{status_text}{task.description}"
-    )
-
+    course_id, module_id, level_id = path
+    message_text = card.render(await is_task_solved(user.telegram_id, card.id))
     keyboard = get_task_view_kb(
-        task_id=task.id,
-        level_id=callback_data.level_id,
-        module_id=callback_data.module_id,
-        course_id=callback_data.course_id,
+        task_id=card.id,
+        level_id=level_id,
+        module_id=module_id,
+        course_id=course_id,
     )
 
-    if task.image:
+    if card.image:
         await callback.message.delete()
-        await callback.message.answer_photo(
-            photo=FSInputFile(task.image.path),
+        await send_media(
+            callback.bot,
+            callback.message.chat.id,
+            card.image_path,
+            "PHOTO",
             caption=message_text,
             reply_markup=keyboard,
-            parse_mode="Markdown",
+            parse_mode=card.parse_mode,
         )
     else:
         await callback.message.edit_text(
             message_text,
             reply_markup=keyboard,
-            parse_mode="Markdown",
+            parse_mode=card.parse_mode,
         )
     await callback.answer()
 
@@ -142,12 +141,12 @@ async def start_solving_task(
     state: FSMContext,
     user: User,
 ):
-    task = await get_task_details(callback_data.task_id, user.telegram_id)
-    if not task:
+    if not await get_task_path(callback_data.task_id, user.telegram_id):
         await callback.answer("Задача не найдена либо доступ запрещен", show_alert=True)
         return
-    await state.set_state(CodeCheck.waiting_for_code)
-    await state.update_data(task_id=callback_data.task_id)
+    await set_state_and_data(
+        state, CodeCheck.waiting_for_code, {"task_id": callback_data.task_id}
+    )
 
     texts = await get_bot_texts()
     await callback.message.answer(texts.request_code_message)
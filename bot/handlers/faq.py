@@ -3,8 +3,9 @@ import logging
 
 from aiogram import F, Router
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-from aiogram.types import CallbackQuery, FSInputFile
+from aiogram.types import CallbackQuery
 
+from backend.content.media import send_media
 from bot.keyboards.inline_keyboards import FaqCallback, get_faq_list_kb
 from bot.utils.db import get_bot_texts, get_faq_item, get_faq_list
 
@@ -41,17 +42,13 @@ async def show_faq_answer_handler(callback: CallbackQuery, callback_data: FaqCal
 
     try:
         if faq_item.media_file and faq_item.media_type:
-            file = FSInputFile(faq_item.media_file.path)
-            media_type = faq_item.media_type
-
-            if media_type == faq_item.MediaType.PHOTO:
-                await callback.message.answer_photo(file, caption=full_text)
-            elif media_type == faq_item.MediaType.VIDEO:
-                await callback.message.answer_video(file, caption=full_text)
-            elif media_type == faq_item.MediaType.DOCUMENT:
-                await callback.message.answer_document(file, caption=full_text)
-            elif media_type == faq_item.MediaType.AUDIO:
-                await callback.message.answer_audio(file, caption=full_text)
+            await send_media(
+                callback.bot,
+                callback.message.chat.id,
+                faq_item.media_file.path,
+                faq_item.media_type,
+                caption=full_text,
+            )
         else:
             await callback.message.answer(full_text)
     except TelegramForbiddenError as e:
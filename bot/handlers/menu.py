@@ -4,6 +4,7 @@ from aiogram.types import CallbackQuery, Message
 
 from bot.keyboards.inline_keyboards import get_main_menu_kb
 from bot.utils.db import get_bot_texts
+from bot.utils.fsm import clear_state
 
 router = Router()
 
@@ -14,7 +15,7 @@ async def show_main_menu(message: Message, text: str):
 
 @router.callback_query(F.data == "back_to_main_menu")
 async def back_to_main_menu_handler(callback: CallbackQuery, state: FSMContext):
-    await state.clear()
+    await clear_state(state)
     await callback.message.delete()
     texts = await get_bot_texts()
     await show_main_menu(callback.message, texts.menu_return_message)
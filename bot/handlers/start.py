@@ -7,13 +7,14 @@ from backend.users.models import User
 from bot.handlers.menu import show_main_menu
 from bot.keyboards.reply_keyboards import request_contact_kb
 from bot.utils.db import get_bot_texts, is_whitelisted, register_user
+from bot.utils.fsm import clear_state
 
 router = Router()
 
 
 @router.message(CommandStart())
 async def start_handler(message: Message, state: FSMContext, user: User | None = None):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
     if user:
         await show_main_menu(message, texts.welcome_message)
@@ -28,7 +29,7 @@ async def start_handler(message: Message, state: FSMContext, user: User | None =
 async def contact_handler(
     message: Message, state: FSMContext, user: User | None = None
 ):
-    await state.clear()
+    await clear_state(state)
     texts = await get_bot_texts()
 
     if user:
@@ -1,11 +1,13 @@
 import asyncio
 import logging
 import os
+import re
 import sys
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
-from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.core.settings")
 import django
@@ -13,25 +15,102 @@ import django
 django.setup()
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
+from backend.core.cache import listen_for_invalidations
+from backend.core.telegram import create_bot
 from bot.handlers import setup_handlers
 from bot.middlewares import setup_middlewares
+from bot.polling import ShardedPoller
+from bot.utils.fsm import create_storage
 
+logger = logging.getLogger(__name__)
+
+# Ограничения Telegram для secret_token в setWebhook.
+WEBHOOK_SECRET_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,256}")
 
-async def main():
-    bot = Bot(token=settings.BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
-    storage = RedisStorage.from_url(
-        f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB_CELERY}"
-    )
-    dp = Dispatcher(storage=storage)
+
+def create_dispatcher() -> Dispatcher:
+    dp = Dispatcher(storage=create_storage())
 
     setup_middlewares(dp)
     setup_handlers(dp)
+    return dp
+
+
+async def main():
+    bot = create_bot(default=DefaultBotProperties(parse_mode="HTML"))
+    dp = create_dispatcher()
+
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
 
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    poller = ShardedPoller(
+        dp,
+        bot,
+        shards=settings.BOT_POLLING_SHARDS,
+        queue_size=settings.BOT_SHARD_QUEUE_SIZE,
+        concurrency=settings.BOT_SHARD_CONCURRENCY,
+    )
+    try:
+        await poller.run()
+    finally:
+        invalidation_listener.cancel()
+        await bot.session.close()
+
+
+def create_webhook_app(bot: Bot, dp: Dispatcher) -> web.Application:
+    """
+    Приложение для режима webhook. Состояние FSM и кэши общие (redis), поэтому
+    можно запускать несколько реплик бота за nginx. Адрес webhook регистрирует
+    каждая реплика при старте — вызов идемпотентный. Endpoint публичный,
+    поэтому без WEBHOOK_SECRET бот не запускается: иначе любой мог бы
+    отправить поддельный апдейт.
+    """
+    if not WEBHOOK_SECRET_PATTERN.fullmatch(settings.WEBHOOK_SECRET):
+        raise ImproperlyConfigured(
+            "WEBHOOK_SECRET must be set in webhook mode "
+            "(1-256 characters: A-Z, a-z, 0-9, _ and -)."
+        )
+
+    async def on_startup(bot: Bot):
+        dp["invalidation_listener"] = asyncio.create_task(listen_for_invalidations())
+        if settings.WEBHOOK_BASE_URL:
+            await bot.set_webhook(
+                f"{settings.WEBHOOK_BASE_URL}{settings.WEBHOOK_PATH}",
+                secret_token=settings.WEBHOOK_SECRET,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+        else:
+            logger.warning("WEBHOOK_BASE_URL is not set, webhook is not registered")
+
+    async def on_shutdown(bot: Bot):
+        dp["invalidation_listener"].cancel()
+
+    dp.startup.register(on_startup)
+    dp.shutdown.register(on_shutdown)
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp, bot=bot, secret_token=settings.WEBHOOK_SECRET
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+def run_webhook():
+    bot = create_bot(default=DefaultBotProperties(parse_mode="HTML"))
+    dp = create_dispatcher()
+    web.run_app(
+        create_webhook_app(bot, dp),
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+    )
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO, stream=sys.stdout)
-    asyncio.run(main())
+    if settings.BOT_MODE == "webhook":
+        run_webhook()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import signal
+from contextlib import asynccontextmanager, suppress
+
+from aiogram import Bot, Dispatcher
+from aiogram.methods import GetUpdates
+from aiogram.types import Update
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+logger = logging.getLogger(__name__)
+
+BACKOFF_CONFIG = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+SHUTDOWN_TIMEOUT_SECONDS = 10
+
+
+def get_partition_key(update: Update) -> int:
+    """
+    Апдейты одного пользователя попадают в один шард и обрабатываются строго
+    по порядку. Апдейты без пользователя распределяются по update_id.
+    """
+    event = update.event
+    user = getattr(event, "from_user", None)
+    if user:
+        return user.id
+    chat = getattr(event, "chat", None)
+    if chat:
+        return chat.id
+    return update.update_id
+
+
+class ShardedPoller:
+    """
+    Long polling с обработкой апдейтов в нескольких шардах. У каждого шарда
+    своя ограниченная очередь и до concurrency одновременно обрабатываемых
+    апдейтов: разные пользователи обрабатываются параллельно, апдейты одного
+    пользователя — по очереди под его блокировкой. Медленный обработчик
+    задерживает только своего пользователя. Когда все слоты шарда заняты
+    и его очередь заполнена, чтение новых апдейтов из Telegram
+    приостанавливается.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        shards: int,
+        queue_size: int,
+        concurrency: int,
+        polling_timeout: int = 30,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.concurrency = concurrency
+        self.polling_timeout = polling_timeout
+        self.queues: list[asyncio.Queue[Update]] = [
+            asyncio.Queue(maxsize=queue_size) for _ in range(shards)
+        ]
+        # Блокировка и число ожидающих апдейтов на пользователя; запись
+        # удаляется, когда апдейтов пользователя в обработке не осталось.
+        self._user_locks: dict[int, tuple[asyncio.Lock, int]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @asynccontextmanager
+    async def _user_lock(self, key: int):
+        lock, waiting = self._user_locks.get(key, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._user_locks[key] = (lock, waiting + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, waiting = self._user_locks[key]
+            if waiting == 1:
+                del self._user_locks[key]
+            else:
+                self._user_locks[key] = (lock, waiting - 1)
+
+    async def _process(
+        self,
+        queue: asyncio.Queue,
+        semaphore: asyncio.Semaphore,
+        update: Update,
+        **kwargs,
+    ):
+        try:
+            # asyncio.Lock пропускает ожидающих в порядке очереди, а задачи
+            # стартуют в порядке создания — порядок апдейтов сохраняется.
+            async with self._user_lock(get_partition_key(update)):
+                await self.dp.feed_update(self.bot, update, **kwargs)
+        except Exception as e:
+            logger.exception(f"Failed to process update {update.update_id}: {e}")
+        finally:
+            semaphore.release()
+            queue.task_done()
+
+    async def _worker(self, queue: asyncio.Queue, **kwargs):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            update = await queue.get()
+            await semaphore.acquire()
+            task = asyncio.create_task(
+                self._process(queue, semaphore, update, **kwargs)
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _listen(self):
+        backoff = Backoff(config=BACKOFF_CONFIG)
+        get_updates = GetUpdates(
+            timeout=self.polling_timeout,
+            allowed_updates=self.dp.resolve_used_update_types(),
+        )
+        request_timeout = int(self.bot.session.timeout + self.polling_timeout)
+        while True:
+            try:
+                updates = await self.bot(get_updates, request_timeout=request_timeout)
+            except Exception as e:
+                logger.error(
+                    f"Failed to fetch updates: {e}, retry in {backoff.next_delay:.1f} s"
+                )
+                await backoff.asleep()
+                continue
+            backoff.reset()
+
+            for update in updates:
+                shard = get_partition_key(update) % len(self.queues)
+                await self.queues[shard].put(update)
+                get_updates.offset = update.update_id + 1
+
+    async def run(self):
+        workflow_data = {"dispatcher": self.dp, "bots": [self.bot], **self.dp.workflow_data}
+        await self.dp.emit_startup(bot=self.bot, **workflow_data)
+        workers = [
+            asyncio.create_task(self._worker(queue, **workflow_data))
+            for queue in self.queues
+        ]
+        listener = asyncio.create_task(self._listen())
+        loop = asyncio.get_running_loop()
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(signal.SIGTERM, listener.cancel)
+            loop.add_signal_handler(signal.SIGINT, listener.cancel)
+
+        logger.info(
+            f"Start sharded polling with {len(self.queues)} shards, "
+            f"{self.concurrency} concurrent updates per shard"
+        )
+        try:
+            with suppress(asyncio.CancelledError):
+                await listener
+        finally:
+            logger.info("Polling stopped, waiting for queued updates")
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    asyncio.gather(*(queue.join() for queue in self.queues)),
+                    timeout=SHUTDOWN_TIMEOUT_SECONDS,
+                )
+            for worker in workers:
+                worker.cancel()
+            await self.dp.emit_shutdown(bot=self.bot, **workflow_data)
@@ -1,21 +1,22 @@
-from asgiref.sync import sync_to_async
-from django.db.models import Exists, OuterRef
 from phonenumber_field.phonenumber import to_python
 from phonenumbers.phonenumberutil import is_valid_number
 
 from backend.checker.models import Check
-from backend.content.models import FAQ, BotTexts, SiteSettings
-from backend.courses.models import (
-    Course,
-    DifficultyLevel,
-    Module,
-    Task,
-    UserTaskStatus,
+from backend.content.cache import get_bot_texts_cached, get_site_settings_cached
+from backend.content.models import FAQ
+from backend.core.db_pool import db_query
+from backend.courses.cards import get_task_card
+from backend.courses.catalog import get_catalog
+from backend.courses.progress import get_solved_task_ids, is_task_solved
+from backend.users.cache import (
+    get_cached_user,
+    get_user_course_ids,
+    is_whitelisted_cached,
 )
-from backend.users.models import User, Whitelist
+from backend.users.models import User
 
 
-@sync_to_async
+@db_query
 def register_user(telegram_id: int, username: str | None, phone_number_str: str):
     phone_number = to_python(phone_number_str)
     if not is_valid_number(phone_number):
@@ -31,38 +32,32 @@ def register_user(telegram_id: int, username: str | None, phone_number_str: str)
     return user, status
 
 
-@sync_to_async
-def is_whitelisted(phone_number):
-    if not phone_number:
-        return False
-    return Whitelist.objects.filter(phone_number=phone_number).exists()
+async def is_whitelisted(phone_number):
+    return await is_whitelisted_cached(phone_number)
 
 
-@sync_to_async
-def get_user_and_check_whitelist(telegram_id: int):
-    try:
-        user = User.objects.get(telegram_id=telegram_id)
-        if not user.phone_number:
-            return user, False
-
-        allowed = Whitelist.objects.filter(phone_number=user.phone_number).exists()
-        return user, allowed
-    except User.DoesNotExist:
+async def get_user_and_check_whitelist(telegram_id: int):
+    user = await get_cached_user(telegram_id)
+    if not user:
         return None, False
+    if not user.phone_number:
+        return user, False
+
+    allowed = await is_whitelisted_cached(user.phone_number)
+    return user, allowed
 
 
-@sync_to_async
-def get_support_link():
-    settings, _ = SiteSettings.objects.get_or_create(pk=1)
-    return settings.support_link
+async def get_support_link():
+    site_settings = await get_site_settings_cached()
+    return site_settings.support_link
 
 
-@sync_to_async
+@db_query
 def get_faq_list():
     return list(FAQ.objects.values_list("id", "question"))
 
 
-@sync_to_async
+@db_query
 def get_faq_item(faq_id: int):
     try:
         return FAQ.objects.get(id=faq_id)
@@ -70,86 +65,70 @@ def get_faq_item(faq_id: int):
         return None
 
 
-@sync_to_async
-def get_bot_texts():
-    texts, _ = BotTexts.objects.get_or_create(pk=1)
-    return texts
+async def get_bot_texts():
+    return await get_bot_texts_cached()
 
 
-@sync_to_async
-def get_user_courses(user_id: int):
-    return list(
-        Course.objects.filter(user_accesses__user_id=user_id).values_list("id", "title")
-    )
+async def get_user_courses(user_id: int):
+    catalog = await get_catalog()
+    return catalog.get_courses(await get_user_course_ids(user_id))
 
 
-@sync_to_async
-def get_course_modules(course_id: int, user_id: int):
-    return list(
-        Module.objects.filter(
-            course_id=course_id, course__user_accesses__user_id=user_id
-        )
-        .order_by("order")
-        .values_list("id", "title")
-    )
+async def get_course_modules(course_id: int, user_id: int):
+    if course_id not in await get_user_course_ids(user_id):
+        return []
+    catalog = await get_catalog()
+    return catalog.get_course_modules(course_id)
 
 
-@sync_to_async
-def get_module_levels(module_id: int, user_id: int):
-    return list(
-        DifficultyLevel.objects.filter(
-            module_id=module_id, module__course__user_accesses__user_id=user_id
-        )
-        .order_by("order")
-        .values_list("id", "title")
-    )
-
+async def get_module_levels(module_id: int, user_id: int):
+    catalog = await get_catalog()
+    if catalog.get_module_course_id(module_id) not in await get_user_course_ids(
+        user_id
+    ):
+        return []
+    return catalog.get_module_levels(module_id)
 
-@sync_to_async
-def get_level_tasks(level_id: int, user_id: int):
-    solved_subquery = UserTaskStatus.objects.filter(
-        task=OuterRef("pk"),
-        user_id=user_id,
-        status=UserTaskStatus.Status.SOLVED,
-    )
 
-    tasks = (
-        Task.objects.filter(
-            level_id=level_id, level__module__course__user_accesses__user_id=user_id
-        )
-        .annotate(is_solved=Exists(solved_subquery))
-        .order_by("number")
-        .values("id", "number", "title", "is_solved")
-    )
-    return list(tasks)
+async def get_level_tasks(level_id: int, user_id: int):
+    catalog = await get_catalog()
+    if catalog.get_level_course_id(level_id) not in await get_user_course_ids(
+        user_id
+    ):
+        return []
+    tasks = catalog.get_level_tasks(level_id)
+    solved_ids = await get_solved_task_ids(user_id, [task["id"] for task in tasks])
+    return [{**task, "is_solved": task["id"] in solved_ids} for task in tasks]
 
 
-@sync_to_async
-def get_task_details(task_id: int, user_id: int):
-    try:
-        return Task.objects.select_related("level__module__course").get(
-            id=task_id, level__module__course__user_accesses__user_id=user_id
-        )
-    except Task.DoesNotExist:
+async def get_task_path(task_id: int, user_id: int):
+    catalog = await get_catalog()
+    path = catalog.get_task_path(task_id)
+    if not path or path[0] not in await get_user_course_ids(user_id):
         return None
+    return path
 
 
-@sync_to_async
-def get_user_task_status(user_id: int, task_id: int):
-    try:
-        return UserTaskStatus.objects.get(user_id=user_id, task_id=task_id)
-    except UserTaskStatus.DoesNotExist:
-        return None
+async def get_task_view(task_id: int, user_id: int):
+    path = await get_task_path(task_id, user_id)
+    if not path:
+        return None, None
+    return await get_task_card(task_id), path
 
 
-@sync_to_async
-def get_check_for_feedback(check_id: int, user_id: int):
-    try:
-        check = Check.objects.select_related("task__level__module__course").get(
-            id=check_id,
-            user_id=user_id,
-            task__level__module__course__user_accesses__user_id=user_id,
-        )
-        return check, check.task
-    except Check.DoesNotExist:
+@db_query
+def _load_check(check_id: int, user_id: int):
+    return (
+        Check.objects.select_related("task__level__module__course")
+        .filter(id=check_id, user_id=user_id)
+        .first()
+    )
+
+
+async def get_check_for_feedback(check_id: int, user_id: int):
+    check = await _load_check(check_id, user_id)
+    if not check or check.task.level.module.course_id not in await get_user_course_ids(
+        user_id
+    ):
         return None, None
+    return check, check.task
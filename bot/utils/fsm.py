@@ -0,0 +1,71 @@
+from typing import Any
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from django.conf import settings
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from backend.core.redis_client import get_redis_url
+
+
+class PipelinedRedisStorage(RedisStorage):
+    """
+    RedisStorage, который умеет записывать состояние и данные FSM за один
+    запрос к redis.
+    """
+
+    async def set_state_and_data(
+        self, key: StorageKey, state: StateType, data: dict[str, Any]
+    ) -> None:
+        state_key = self.key_builder.build(key, "state")
+        data_key = self.key_builder.build(key, "data")
+        if state is None and not data:
+            await self.redis.delete(state_key, data_key)
+            return
+
+        pipe = self.redis.pipeline(transaction=False)
+        if state is None:
+            pipe.delete(state_key)
+        else:
+            pipe.set(
+                state_key,
+                state.state if isinstance(state, State) else state,
+                ex=self.state_ttl,
+            )
+        if data:
+            pipe.set(data_key, self.json_dumps(data), ex=self.data_ttl)
+        else:
+            pipe.delete(data_key)
+        await pipe.execute()
+
+
+def create_storage() -> PipelinedRedisStorage:
+    # Апдейты обрабатываются параллельно без ограничения (webhook), поэтому при
+    # всплеске запрос ждет свободное соединение, а не падает с
+    # "Too many connections", как с обычным ConnectionPool.
+    pool = BlockingConnectionPool.from_url(
+        get_redis_url(settings.REDIS_DB_FSM),
+        max_connections=settings.FSM_REDIS_MAX_CONNECTIONS,
+        timeout=settings.FSM_REDIS_POOL_TIMEOUT,
+    )
+    return PipelinedRedisStorage(
+        redis=Redis(connection_pool=pool),
+        state_ttl=settings.FSM_STATE_TTL,
+        data_ttl=settings.FSM_DATA_TTL,
+    )
+
+
+async def set_state_and_data(
+    state: FSMContext, new_state: StateType, data: dict[str, Any]
+) -> None:
+    if isinstance(state.storage, PipelinedRedisStorage):
+        await state.storage.set_state_and_data(state.key, new_state, data)
+    else:
+        await state.set_state(new_state)
+        await state.set_data(data)
+
+
+async def clear_state(state: FSMContext) -> None:
+    await set_state_and_data(state, None, {})